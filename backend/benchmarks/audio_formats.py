@@ -0,0 +1,143 @@
+"""Bytes on the wire and time to first byte per /api/tts output format.
+
+The synthesizer is replaced by a paced stand-in that streams a real MP3
+(generated once with ffmpeg, 24 kHz / 48 kbps mono like edge-tts) faster
+than real time, so transcoded formats run through the actual ffmpeg
+pipeline. Requests are driven straight through the ASGI app, recording when
+the first and last body bytes are sent. Every request is a cache miss.
+
+Needs ffmpeg on PATH for anything but MP3.
+
+Usage (from the repo root):
+  python -m backend.benchmarks.audio_formats
+  python -m backend.benchmarks.audio_formats --seconds 20 --speedup 8 --requests 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import time
+
+from fastapi import FastAPI
+
+from backend.routes import audio_formats, tts
+from backend.routes.audio_cache import AudioCache
+
+
+def source_mp3(seconds: float) -> bytes:
+    """A speech-length MP3 in edge-tts' output format (tone plus noise, so the encoders have work to do)."""
+    return subprocess.run(
+        [
+            audio_formats.FFMPEG, "-hide_banner", "-loglevel", "error",
+            "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}",
+            "-f", "lavfi", "-i", f"anoisesrc=amplitude=0.05:duration={seconds}",
+            "-filter_complex", "amix=inputs=2", "-ar", "24000", "-ac", "1", "-b:a", "48k", "-f", "mp3", "pipe:1",
+        ],
+        check=True,
+        capture_output=True,
+    ).stdout
+
+
+def build_app(mp3: bytes, speedup: float, chunk_bytes: int = 4096) -> FastAPI:
+    # 48 kbps = 6000 bytes per second of audio
+    interval = chunk_bytes / 6000 / speedup
+
+    class PacedCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str, **kwargs):
+            pass
+
+        async def stream(self):
+            for start in range(0, len(mp3), chunk_bytes):
+                await asyncio.sleep(interval)
+                yield {"type": "audio", "data": mp3[start:start + chunk_bytes]}
+
+    tts.edge_tts.Communicate = PacedCommunicate
+    tts.audio_cache = AudioCache(memory_bytes=0, disk_dir=None)
+    app = FastAPI()
+    app.include_router(tts.router, prefix="/api")
+    return app
+
+
+async def request(app: FastAPI, body: dict) -> dict:
+    payload = json.dumps(body).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/api/tts", "raw_path": b"/api/tts", "query_string": b"", "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"host", b"bench")],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    sent = {"status": None, "bytes": 0, "first": None}
+    messages = [{"type": "http.request", "body": payload, "more_body": False}]
+    finished = asyncio.Event()
+    started = time.perf_counter()
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # The client stays connected until the whole body has been sent
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            if message.get("body"):
+                if sent["first"] is None:
+                    sent["first"] = time.perf_counter() - started
+                sent["bytes"] += len(message["body"])
+            if not message.get("more_body"):
+                finished.set()
+
+    await app(scope, receive, send)
+    assert sent["status"] == 200, sent
+    return {"bytes": sent["bytes"], "ttfb": sent["first"], "total": time.perf_counter() - started}
+
+
+async def run(app: FastAPI, formats: list, n_requests: int) -> dict:
+    results = {}
+    for name in formats:
+        samples = [await request(app, {"text": f"benchmark {name} {i}", "format": name}) for i in range(n_requests)]
+        results[name] = {
+            "bytes": statistics.median(s["bytes"] for s in samples),
+            "ttfb": statistics.median(s["ttfb"] for s in samples),
+            "total": statistics.median(s["total"] for s in samples),
+        }
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0, help="audio length per clip")
+    parser.add_argument("--speedup", type=float, default=4.0, help="synthesizer speed relative to real time")
+    parser.add_argument("--requests", type=int, default=3, help="requests per format (medians are reported)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if audio_formats.FFMPEG is None:
+        print("ffmpeg not found on PATH; only mp3 is available, nothing to compare.")
+        return 1
+    mp3 = source_mp3(args.seconds)
+    app = build_app(mp3, args.speedup)
+    formats = [f.name for f in audio_formats.available_formats()]
+    results = asyncio.run(run(app, formats, args.requests))
+
+    print(f"{args.seconds:.0f} s clip, synthesizer at {args.speedup:g}x real time, median of {args.requests}")
+    print(f"{'format':<10}{'bytes':>10}{'vs mp3':>9}{'kbps':>8}{'ttfb ms':>10}{'total ms':>10}")
+    for name in formats:
+        r = results[name]
+        print(
+            f"{name:<10}{r['bytes']:>10.0f}{r['bytes'] / results['mp3']['bytes']:>8.0%}"
+            f"{r['bytes'] * 8 / args.seconds / 1000:>8.1f}{r['ttfb'] * 1000:>10.1f}{r['total'] * 1000:>10.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,108 @@
+"""Latency saved by skipping translation for text already in the persona's language.
+
+Plans /api/tts requests (moderation, persona, language detection, translation)
+for native-language text against a translator stand-in with a fixed delay,
+once with local detection and once with detection disabled (the old
+always-translate behaviour). Also reports the detector's own cost per call.
+Everything runs in-process; no network is needed.
+
+Usage (from the repo root):
+  python -m backend.benchmarks.language_detection
+  python -m backend.benchmarks.language_detection --delay 0.3 --rounds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from backend.routes import language_detect, translator, tts
+
+# (persona, text in that persona's language)
+NATIVE = [
+    ("Madhur", "क्या आप मुझे शुक्रवार तक रिपोर्ट भेज सकते हैं?"),
+    ("Nirmala", "आम्हाला प्रकल्प पूर्ण करण्यासाठी अधिक वेळ हवा आहे."),
+    ("Karthik", "வணக்கம், எப்படி இருக்கிறீர்கள்?"),
+    ("Sagar", "আপনি কেমন আছেন?"),
+    ("Nanami", "今日はいい天気ですね。"),
+    ("Sun-Hi", "안녕하세요, 만나서 반갑습니다."),
+    ("Remy", "Je voudrais réserver une table pour deux personnes ce soir."),
+    ("Lukas", "Ich möchte einen Tisch für zwei Personen reservieren."),
+    ("Alvaro", "Muchas gracias por tu ayuda, eres muy amable."),
+    ("Francisca", "Precisamos de mais tempo para terminar o projeto."),
+]
+
+
+def install_translator(delay: float) -> dict:
+    calls = {"count": 0}
+
+    class SlowTranslator:
+        def __init__(self, source: str, target: str):
+            self.target = target
+
+        def translate(self, text: str) -> str:
+            calls["count"] += 1
+            time.sleep(delay)
+            return text
+
+    translator.GoogleTranslator = SlowTranslator
+    return calls
+
+
+async def plan_all(rounds: int) -> list:
+    samples = []
+    for i in range(rounds):
+        for persona, text in NATIVE:
+            # A new translator per request: every translation is a cache miss
+            translator.translator = translator.CachedTranslator()
+            started = time.perf_counter()
+            await tts.plan_synthesis(tts.TTSRequest(text=f"{text} {i}", voice=persona))
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def detector_cost(repeats: int = 2000) -> float:
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for _, text in NATIVE:
+            language_detect.detect(text)
+    return (time.perf_counter() - started) / (repeats * len(NATIVE))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delay", type=float, default=0.15, help="translator round trip in seconds")
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the sample texts")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    calls = install_translator(args.delay)
+    detect = tts.detect_language
+
+    results = {}
+    for mode in ("always translate", "local detection"):
+        tts.detect_language = detect if mode == "local detection" else lambda text: language_detect.Detection(
+            None, None, "undetermined"
+        )
+        calls["count"] = 0
+        samples = asyncio.run(plan_all(args.rounds))
+        results[mode] = (samples, calls["count"])
+    tts.detect_language = detect
+
+    print(f"{len(NATIVE)} native-language texts x {args.rounds}, translator round trip {args.delay * 1000:.0f} ms")
+    print(f"{'mode':<18}{'translations':>14}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+    for mode, (samples, count) in results.items():
+        p95 = statistics.quantiles(samples, n=20)[-1]
+        print(
+            f"{mode:<18}{count:>14}{statistics.median(samples) * 1000:>10.1f}{p95 * 1000:>10.1f}{sum(samples):>10.2f}"
+        )
+    print(f"detector cost: {detector_cost() * 1e6:.1f} µs per text")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,395 @@
+"""Offline load test: the real app under uvicorn, against local stand-ins.
+
+Starts ``backend.app`` in a child process (uvicorn on 127.0.0.1, random
+port) with the stand-ins from ``backend.benchmarks.standins`` installed: a
+paced fake synthesizer, a fake translator and an in-memory history
+collection. It then drives concurrent load at /api/tts, /api/translate and
+/api/history and reports throughput, latency percentiles, time to first
+byte and the server's peak RSS. No network is used.
+
+Thresholds turn the run into a regression gate: the exit code is 1 when
+any of them is breached or any request fails.
+
+``--workers`` runs the server as several uvicorn worker processes (each
+installs its own stand-ins); ``--disk-cache-bytes`` gives them the shared
+on-disk audio and translation cache, in a fresh temp directory per run.
+
+Usage (from the repo root):
+  python -m backend.benchmarks.loadtest
+  python -m backend.benchmarks.loadtest --requests 500 --concurrency 64 --json results.json
+  python -m backend.benchmarks.loadtest --scenarios tts --handshake-ms 80 --jitter-ms 40
+  python -m backend.benchmarks.loadtest --max-p95-ms tts=400 --min-rps tts=50 --max-rss-mb 300
+  python -m backend.benchmarks.loadtest --error-rate 0.05 --stall-rate 0.01
+  python -m backend.benchmarks.loadtest --workers 4 --unique 50 --disk-cache-bytes 268435456
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import shutil
+import tempfile
+import time
+from typing import Optional
+
+import httpx
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+# Server options handed to multi-worker processes (uvicorn imports the app by name there)
+SERVER_ARGS_ENV = "LOADTEST_SERVER_ARGS"
+
+# name -> (method, path, request kwargs for the i-th request)
+SCENARIOS = {
+    "tts": lambda i, unique: (
+        "POST", "/api/tts",
+        # every fourth request uses a Hindi persona, so it also goes through translation
+        {"json": {"text": f"Load test sentence number {i % unique}.", "voice": "Madhur" if i % 4 == 3 else "Kore"}},
+    ),
+    "translate": lambda i, unique: (
+        "POST", "/api/translate", {"json": {"text": f"Load test sentence number {i % unique}.", "target_lang": "es"}}
+    ),
+    "history_save": lambda i, unique: (
+        "POST", "/api/history",
+        {
+            "data": {"text": f"Load test sentence number {i % unique}.", "voice": "Kore", "emotion": "Neutral"},
+            "files": {"file": ("clip.mp3", b"\xff\xf3" * 512, "audio/mpeg")},
+        },
+    ),
+    "history_list": lambda i, unique: ("GET", "/api/history", {"params": {"limit": 20}}),
+}
+
+
+def percentile(values: list, pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values`` (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(latencies: list, ttfbs: list, errors: int, elapsed: float, cache: Optional[tuple] = None) -> dict:
+    """``cache`` is (hits, responses with an X-Cache header), when any had one."""
+    ms = lambda v: None if v is None else round(v * 1000, 2)  # noqa: E731
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "ttfb_p50_ms": ms(percentile(ttfbs, 50)),
+        "ttfb_p95_ms": ms(percentile(ttfbs, 95)),
+        "hit_rate": round(cache[0] / cache[1], 3) if cache and cache[1] else None,
+    }
+
+
+# ---------- server side ----------
+
+def _standin_options(args) -> dict:
+    from backend.benchmarks.standins import Faults, Latency
+
+    faults = {"error_rate": args.error_rate, "stall_rate": args.stall_rate, "stall": args.stall_ms / 1000}
+    return {
+        "handshake": Latency(args.handshake_ms / 1000, args.jitter_ms / 1000),
+        "chunk_interval": Latency(args.chunk_interval_ms / 1000, args.jitter_ms / 2000),
+        "chunks": args.chunks,
+        "chunk_bytes": args.chunk_bytes,
+        "translate_latency": Latency(args.translate_ms / 1000, args.jitter_ms / 1000),
+        "cache_bytes": args.cache_bytes,
+        "seed": args.seed,
+        "synthesizer_faults": Faults(**faults),
+        "translator_faults": Faults(**faults),
+        "disk_cache_dir": args.disk_cache_dir,
+        "disk_cache_bytes": args.disk_cache_bytes,
+    }
+
+
+# The stand-ins of a ``--workers`` process; entered once and kept (exiting restores the real upstreams)
+_worker_standins = None
+
+
+def worker_app():
+    """uvicorn app factory for ``--workers`` runs: the stand-ins stay installed for the worker's lifetime."""
+    global _worker_standins
+    from backend.benchmarks.standins import standins
+
+    args = parse_args(json.loads(os.environ[SERVER_ARGS_ENV]))
+    _worker_standins = standins(**_standin_options(args))
+    return _worker_standins.__enter__()
+
+
+def serve(args, argv: list) -> int:
+    import uvicorn
+
+    from backend.benchmarks.standins import standins
+
+    options = {"host": "127.0.0.1", "port": args.serve, "log_level": "warning", "access_log": False}
+    if args.workers > 1:
+        os.environ[SERVER_ARGS_ENV] = json.dumps(argv)
+        uvicorn.run("backend.benchmarks.loadtest:worker_app", factory=True, workers=args.workers, **options)
+    else:
+        with standins(**_standin_options(args)) as app:
+            uvicorn.run(app, **options)
+
+    if args.rss_file:
+        with open(args.rss_file, "w") as f:
+            json.dump({"peak_rss_bytes": _peak_rss_bytes()}, f)
+    return 0
+
+
+def _peak_rss_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    # With worker processes: the largest of them (they have exited by now)
+    peak = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# ---------- load generator ----------
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _server_command(args, port: int, rss_file: str, disk_cache_dir: Optional[str]) -> list:
+    command = [
+        sys.executable, "-m", "backend.benchmarks.loadtest",
+        "--serve", str(port), "--rss-file", rss_file,
+        "--handshake-ms", str(args.handshake_ms), "--chunk-interval-ms", str(args.chunk_interval_ms),
+        "--jitter-ms", str(args.jitter_ms), "--translate-ms", str(args.translate_ms),
+        "--chunks", str(args.chunks), "--chunk-bytes", str(args.chunk_bytes),
+        "--cache-bytes", str(args.cache_bytes), "--seed", str(args.seed),
+        "--error-rate", str(args.error_rate), "--stall-rate", str(args.stall_rate), "--stall-ms", str(args.stall_ms),
+        "--workers", str(args.workers),
+    ]
+    if disk_cache_dir:
+        command += ["--disk-cache-dir", disk_cache_dir, "--disk-cache-bytes", str(args.disk_cache_bytes)]
+    return command
+
+
+async def _wait_ready(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with code {server.returncode} before becoming ready")
+        try:
+            if (await client.get("/healthz")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not become ready")
+
+
+async def _drive(client: httpx.AsyncClient, scenario: str, requests: int, concurrency: int, unique: int, offset: int = 0) -> dict:
+    build = SCENARIOS[scenario]
+    latencies, ttfbs = [], []
+    errors = hits = tagged = 0
+    next_index = iter(range(offset, offset + requests))
+
+    async def worker():
+        nonlocal errors, hits, tagged
+        for i in next_index:
+            method, path, kwargs = build(i, unique)
+            started = time.perf_counter()
+            first = None
+            try:
+                async with client.stream(method, path, **kwargs) as res:
+                    async for _ in res.aiter_raw():
+                        if first is None:
+                            first = time.perf_counter()
+                    ok = res.status_code < 400
+                    if "x-cache" in res.headers:
+                        tagged += 1
+                        hits += res.headers["x-cache"] == "HIT"
+            except httpx.HTTPError:
+                ok = False
+            done = time.perf_counter()
+            if not ok:
+                errors += 1
+                continue
+            latencies.append(done - started)
+            ttfbs.append((first or done) - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, ttfbs, errors, time.perf_counter() - started, (hits, tagged))
+
+
+async def _run_load(args, base_url: str, server: subprocess.Popen) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60.0, limits=limits) as client:
+        await _wait_ready(client, server)
+        results = {}
+        for scenario in args.scenarios:
+            if args.warmup:
+                await _drive(client, scenario, args.warmup, min(args.concurrency, args.warmup), args.unique, offset=10**6)
+            results[scenario] = await _drive(client, scenario, args.requests, args.concurrency, args.unique)
+        return results
+
+
+def run_suite(args) -> dict:
+    """Start the stand-in server, run every scenario against it and return the report."""
+    port = _free_port()
+    fd, rss_file = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    disk_cache_dir = tempfile.mkdtemp(prefix="loadtest-cache-") if args.disk_cache_bytes else None
+    server = subprocess.Popen(
+        _server_command(args, port, rss_file, disk_cache_dir),
+        cwd=REPO_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    try:
+        scenarios = asyncio.run(_run_load(args, f"http://127.0.0.1:{port}", server))
+    finally:
+        if server.poll() is None:
+            server.send_signal(signal.SIGINT)
+        try:
+            _, stderr = server.communicate(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+            _, stderr = server.communicate()
+    try:
+        with open(rss_file) as f:
+            peak = json.load(f).get("peak_rss_bytes")
+    except (OSError, ValueError):
+        peak = None
+        if stderr:
+            print(stderr.decode(errors="replace"), file=sys.stderr)
+    finally:
+        os.unlink(rss_file)
+        if disk_cache_dir:
+            shutil.rmtree(disk_cache_dir, ignore_errors=True)
+    return {
+        "config": {key: getattr(args, key) for key in (
+            "requests", "concurrency", "unique", "handshake_ms", "chunk_interval_ms", "jitter_ms",
+            "translate_ms", "chunks", "chunk_bytes", "cache_bytes", "error_rate", "stall_rate", "stall_ms",
+            "workers", "disk_cache_bytes",
+        )},
+        "scenarios": scenarios,
+        "peak_rss_mb": round(peak / (1024 * 1024), 1) if peak else None,
+    }
+
+
+def check_thresholds(report: dict, args) -> list:
+    """Human-readable list of breached thresholds (empty when the run passes)."""
+    failures = []
+    limits = [
+        ("p95_ms", args.max_p95_ms, lambda value, limit: value > limit, ">"),
+        ("p99_ms", args.max_p99_ms, lambda value, limit: value > limit, ">"),
+        ("ttfb_p95_ms", args.max_ttfb_p95_ms, lambda value, limit: value > limit, ">"),
+        ("rps", args.min_rps, lambda value, limit: value < limit, "<"),
+    ]
+    for name, result in report["scenarios"].items():
+        if result["errors"]:
+            failures.append(f"{name}: {result['errors']} failed requests")
+        for metric, thresholds, breached, op in limits:
+            limit = thresholds.get(name)
+            value = result[metric]
+            if limit is not None and value is not None and breached(value, limit):
+                failures.append(f"{name}: {metric} {value} {op} {limit}")
+    peak = report["peak_rss_mb"]
+    if args.max_rss_mb is not None and peak is not None and peak > args.max_rss_mb:
+        failures.append(f"peak RSS {peak} MB > {args.max_rss_mb} MB")
+    return failures
+
+
+def print_report(report: dict) -> None:
+    config = report["config"]
+    print(
+        f"{config['requests']} requests per scenario, concurrency {config['concurrency']}, "
+        f"handshake {config['handshake_ms']} ms, {config['chunks']} chunks every {config['chunk_interval_ms']} ms, "
+        f"translator {config['translate_ms']} ms, jitter {config['jitter_ms']} ms, {config['workers']} worker(s)"
+    )
+    columns = ("rps", "p50_ms", "p95_ms", "p99_ms", "ttfb_p50_ms", "ttfb_p95_ms", "hit_rate", "errors")
+    print(f"{'scenario':<14}" + "".join(f"{c:>13}" for c in columns))
+    for name, result in report["scenarios"].items():
+        cells = ["-" if result[c] is None else f"{result[c]}" for c in columns]
+        print(f"{name:<14}" + "".join(f"{cell:>13}" for cell in cells))
+    print(f"server peak RSS: {report['peak_rss_mb'] if report['peak_rss_mb'] is not None else 'n/a'} MB")
+
+
+def _per_scenario(values: list) -> dict:
+    """Parse repeated ``scenario=value`` options; a bare value applies to every scenario."""
+    parsed = {}
+    for item in values or []:
+        name, sep, value = item.rpartition("=")
+        for scenario in ([name] if sep else SCENARIOS):
+            parsed[scenario] = float(value)
+    return parsed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per scenario")
+    parser.add_argument("--unique", type=int, default=10**9, help="distinct texts; lower it to exercise the caches")
+    parser.add_argument("--handshake-ms", type=float, default=50.0, help="fake synthesizer delay before the first chunk")
+    parser.add_argument("--chunk-interval-ms", type=float, default=10.0, help="fake synthesizer delay between chunks")
+    parser.add_argument("--chunks", type=int, default=8, help="audio chunks per clip")
+    parser.add_argument("--chunk-bytes", type=int, default=1024)
+    parser.add_argument("--translate-ms", type=float, default=50.0, help="fake translator latency")
+    parser.add_argument("--jitter-ms", type=float, default=20.0, help="uniform jitter added to the delays")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream calls that fail (both stand-ins)")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="share of upstream calls that hang")
+    parser.add_argument("--stall-ms", type=float, default=30000.0, help="how long a hung upstream call hangs")
+    parser.add_argument("--cache-bytes", type=int, default=0, help="in-memory audio cache budget (0 disables it)")
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes")
+    parser.add_argument(
+        "--disk-cache-bytes", type=int, default=0,
+        help="shared on-disk audio and translation cache budget (0 disables it)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--max-p95-ms", action="append", metavar="[SCENARIO=]MS")
+    parser.add_argument("--max-p99-ms", action="append", metavar="[SCENARIO=]MS")
+    parser.add_argument("--max-ttfb-p95-ms", action="append", metavar="[SCENARIO=]MS")
+    parser.add_argument("--min-rps", action="append", metavar="[SCENARIO=]RPS")
+    parser.add_argument("--max-rss-mb", type=float)
+    # internal: run the stand-in server on this port
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--rss-file", help=argparse.SUPPRESS)
+    parser.add_argument("--disk-cache-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+    for option in ("max_p95_ms", "max_p99_ms", "max_ttfb_p95_ms", "min_rps"):
+        setattr(args, option, _per_scenario(getattr(args, option)))
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.serve:
+        return serve(args, sys.argv[1:] if argv is None else argv)
+
+    report = run_suite(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failures = check_thresholds(report, args)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,131 @@
+"""Per-request logging overhead on /api/tts.
+
+Runs cache-hit /api/tts requests in-process (no network, fake synthesizer)
+under each logging mode and reports the mean cost per request relative to
+logging disabled:
+
+  off         LOG_LEVEL=off
+  info        default: debug payloads gated out by level
+  debug       every request's plan payload queued and written as JSON
+  debug@10%   debug payloads sampled at 10%
+  print       the old behaviour: four synchronous print() calls per request
+
+Log output goes to /dev/null so only the logging path itself is measured.
+
+Usage (from the repo root):
+  python -m backend.benchmarks.logging_overhead
+  python -m backend.benchmarks.logging_overhead --requests 5000 --text-chars 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import contextlib
+import logging
+import os
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from backend.routes import logs, tts
+from backend.routes.audio_cache import AudioCache
+
+MODES = ["off", "info", "debug", "debug@10%", "print"]
+
+
+class _PrintLogger:
+    """Stand-in for the removed print() debugging in plan_synthesis."""
+
+    def debug(self, event, persona=None, lang=None, voice_id=None, text=None, **fields):
+        print(f"[TTS DEBUG] Persona={persona}")
+        print(f"[TTS DEBUG] Lang={lang}")
+        print(f"[TTS DEBUG] VoiceID={voice_id}")
+        print(f"[TTS DEBUG] FinalText={text}")
+
+    def error(self, event, **fields):
+        print("[ERROR]", fields)
+
+
+def build_app() -> FastAPI:
+    class FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            pass
+
+        async def stream(self):
+            yield {"type": "audio", "data": b"\xff\xf3" * 256}
+
+    tts.edge_tts.Communicate = FakeCommunicate
+    tts.audio_cache = AudioCache(memory_bytes=64 * 1024 * 1024, disk_dir=None)
+    app = FastAPI()
+    app.include_router(tts.router, prefix="/api")
+    return app
+
+
+@contextlib.contextmanager
+def logging_mode(mode: str, sink):
+    root = logging.getLogger(logs.ROOT_LOGGER)
+    original_log, original_stdout = tts.log, sys.stdout
+    listener = None
+    if mode == "off":
+        root.setLevel(logging.CRITICAL + 1)
+    elif mode == "print":
+        tts.log = _PrintLogger()
+        sys.stdout = sink
+    else:
+        listener = logs.configure_logging(level="INFO" if mode == "info" else "DEBUG", stream=sink)
+        tts.log = logs.EventLogger(tts.log.logger, debug_sample_rate=0.1 if mode == "debug@10%" else 1.0)
+    try:
+        yield
+    finally:
+        if listener:
+            listener.stop()
+        tts.log, sys.stdout = original_log, original_stdout
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.setLevel(logging.NOTSET)
+        root.propagate = True
+
+
+async def run(app: FastAPI, n_requests: int, text: str) -> float:
+    transport = httpx.ASGITransport(app=app)
+    body = {"text": text, "voice": "Kore"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.post("/api/tts", json=body)  # populate the cache
+        started = time.perf_counter()
+        for _ in range(n_requests):
+            res = await client.post("/api/tts", json=body)
+            assert res.headers["X-Cache"] == "HIT"
+        return (time.perf_counter() - started) / n_requests
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--text-chars", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs per mode")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    app = build_app()
+    text = ("The quick brown fox jumps over the lazy dog. " * (args.text_chars // 45 + 1))[: args.text_chars]
+
+    results = {}
+    with open(os.devnull, "w") as sink:
+        for mode in MODES:
+            with logging_mode(mode, sink):
+                results[mode] = min(asyncio.run(run(app, args.requests, text)) for _ in range(args.repeat))
+
+    print(f"{args.requests} cache-hit /api/tts requests, {args.text_chars}-char text, best of {args.repeat}")
+    print(f"{'mode':<12}{'µs/request':>12}{'overhead µs':>14}")
+    for mode in MODES:
+        print(f"{mode:<12}{results[mode] * 1e6:>12.1f}{(results[mode] - results['off']) * 1e6:>14.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
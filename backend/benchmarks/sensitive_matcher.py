@@ -0,0 +1,76 @@
+"""contains_sensitive: per-call regex rebuild vs. the precompiled matcher.
+
+Scans clean text (the worst case: no early exit) for text sizes from
+100 characters to 100 KB and lexicons from 20 to 10,000 terms.
+
+Usage (from the repo root):
+  python -m backend.benchmarks.sensitive_matcher
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import string
+import timeit
+import unicodedata
+
+from backend.routes.utils import SENSITIVE_WORDS, SensitiveMatcher, normalize_text
+
+TEXT_SIZES = [100, 1_000, 10_000, 100_000]
+LEXICON_SIZES = [20, 1_000, 10_000]
+
+
+def legacy_contains(text, words):
+    # The implementation this replaced: list-based normalize plus a fresh
+    # alternation regex on every call.
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join([c for c in text if not unicodedata.combining(c)]).lower()
+    pattern = r"(" + r"|".join([re.escape(word) for word in words]) + r")"
+    return re.search(pattern, text, re.IGNORECASE) is not None
+
+
+def make_lexicon(size, rng):
+    words = list(SENSITIVE_WORDS)
+    while len(words) < size:
+        words.append("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 10))) + "qz")
+    return words[:size]
+
+
+def make_text(size, rng):
+    # Accented prose so the normalization path is exercised too.
+    vocab = ["voice", "généré", "naïve", "cafe", "stream", "audio", "persona", "über", "latency", "résumé"]
+    out = []
+    length = 0
+    while length < size:
+        word = rng.choice(vocab)
+        out.append(word)
+        length += len(word) + 1
+    return " ".join(out)[:size]
+
+
+def best_of(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number
+
+
+def main() -> int:
+    rng = random.Random(42)
+    print(f"{'lexicon':>8}{'text':>10}{'legacy µs':>14}{'compiled µs':>14}{'speedup':>10}")
+    for lex_size in LEXICON_SIZES:
+        words = make_lexicon(lex_size, rng)
+        matcher = SensitiveMatcher(words)
+        for text_size in TEXT_SIZES:
+            text = make_text(text_size, rng)
+            assert matcher.search(normalize_text(text)) is None
+            number = max(1, 200_000 // (text_size + lex_size * 10))
+            legacy = best_of(lambda: legacy_contains(text, words), number)
+            compiled = best_of(lambda: matcher.search(normalize_text(text)), number)
+            print(
+                f"{lex_size:>8}{text_size:>10}{legacy * 1e6:>14.1f}"
+                f"{compiled * 1e6:>14.1f}{legacy / compiled:>9.1f}x"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
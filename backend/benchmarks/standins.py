@@ -0,0 +1,272 @@
+"""Local stand-ins for the app's upstreams, used by the load-test suite.
+
+- a paced synthesizer in place of ``edge_tts.Communicate`` (handshake delay,
+  then fixed-size MP3-ish chunks at a fixed interval, all with jitter)
+- a translator in place of ``GoogleTranslator`` (blocking, like the real one)
+- optional fault injection for both (errors and stalls, see ``Faults``)
+- an in-memory history collection and a ``Database`` drop-in that serves it
+
+``standins(...)`` installs all of them into the already-imported app modules
+and restores the originals on exit. Nothing here touches the network.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from importlib import import_module
+from typing import Any, Optional
+
+
+@dataclass
+class Latency:
+    """``base`` seconds plus up to ``jitter`` seconds, uniformly drawn."""
+
+    base: float = 0.0
+    jitter: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        return self.base + (rng.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+
+
+class Faults:
+    """Failure injection for a stand-in upstream.
+
+    Each call takes the next outcome from ``script`` while it lasts, then
+    draws one from the rates: "ok", "error" (raise after the usual delay),
+    "stall" (hang ``stall`` seconds before answering) or, for the
+    synthesizer only, "stall_mid" (hang after the first chunk). ``voices``
+    limits synthesizer faults to those voice IDs.
+    """
+
+    def __init__(self, error_rate: float = 0.0, stall_rate: float = 0.0, stall: float = 30.0, script=(), voices=()):
+        self.error_rate = error_rate
+        self.stall_rate = stall_rate
+        self.stall = stall
+        self.voices = set(voices)
+        self._script = list(script)
+        self._lock = threading.Lock()
+
+    def next(self, rng: random.Random, voice: Optional[str] = None) -> str:
+        if self.voices and voice not in self.voices:
+            return "ok"
+        with self._lock:
+            if self._script:
+                return self._script.pop(0)
+            draw = rng.random()
+        if draw < self.error_rate:
+            return "error"
+        if draw < self.error_rate + self.stall_rate:
+            return "stall"
+        return "ok"
+
+
+def paced_communicate(
+    handshake: Latency,
+    chunk_interval: Latency,
+    chunks: int = 8,
+    chunk_bytes: int = 1024,
+    seed: int = 0,
+    faults: Optional[Faults] = None,
+):
+    """A ``Communicate`` class whose ``stream()`` behaves like edge-tts on a good day (or, with ``faults``, a bad one)."""
+    rng = random.Random(seed)
+    frame = (b"\xff\xf3\x64\xc4" * (chunk_bytes // 4 + 1))[:chunk_bytes]
+
+    class PacedCommunicate:
+        def __init__(self, text: str, voice: str, rate: str = "+0%", pitch: str = "+0Hz", **kwargs):
+            self.text = text
+            self.voice = voice
+
+        async def stream(self):
+            fault = faults.next(rng, self.voice) if faults else "ok"
+            await asyncio.sleep(handshake.sample(rng))
+            if fault == "error":
+                raise ConnectionError("injected fault: websocket closed")
+            if fault == "stall":
+                await asyncio.sleep(faults.stall)
+            yield {"type": "SentenceBoundary", "offset": 0, "duration": 0, "text": self.text}
+            for i in range(chunks):
+                yield {"type": "audio", "data": frame}
+                if i == 0 and fault == "stall_mid":
+                    await asyncio.sleep(faults.stall)
+                await asyncio.sleep(chunk_interval.sample(rng))
+
+    return PacedCommunicate
+
+
+def delayed_translator(latency: Latency, seed: int = 0, faults: Optional[Faults] = None):
+    """A ``GoogleTranslator`` class that blocks its worker thread for ``latency`` (plus injected ``faults``)."""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    class DelayedTranslator:
+        def __init__(self, source: str = "auto", target: str = "en"):
+            self.target = target
+
+        def translate(self, text: str) -> str:
+            with lock:
+                delay = latency.sample(rng)
+                fault = faults.next(rng) if faults else "ok"
+            time.sleep(delay)
+            if fault == "error":
+                raise RuntimeError("injected fault: translation quota exceeded")
+            if fault == "stall":
+                time.sleep(faults.stall)
+            return f"[{self.target}] {text}"
+
+    return DelayedTranslator
+
+
+class _Cursor:
+    def __init__(self, items: list):
+        self._items = items
+
+    def sort(self, key, direction: int = 1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for name, order in reversed(keys):
+            self._items.sort(key=lambda x: (x.get(name) is not None, x.get(name)), reverse=order == -1)
+        return self
+
+    def limit(self, n: int):
+        self._items = self._items[:n]
+        return self
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class InMemoryCollection:
+    """Just enough of a pymongo collection for the history routes (equality filters only)."""
+
+    def __init__(self):
+        self.items: list = []
+        self._lock = threading.Lock()
+
+    def insert_one(self, doc: dict[str, Any]):
+        with self._lock:
+            doc.setdefault("_id", len(self.items) + 1)
+            doc.setdefault("timestamp", datetime.utcnow())
+            self.items.append(dict(doc))
+        return doc["_id"]
+
+    def insert_many(self, docs: list, ordered: bool = True):
+        return [self.insert_one(doc) for doc in docs]
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None):
+        query = {k: v for k, v in (query or {}).items() if not k.startswith("$")}
+        with self._lock:
+            docs = [doc for doc in self.items if all(doc.get(k) == v for k, v in query.items())]
+        if projection:
+            keep = set(projection) | {"_id"}
+            return _Cursor([{k: v for k, v in doc.items() if k in keep} for doc in docs])
+        return _Cursor([dict(doc) for doc in docs])
+
+    def create_index(self, keys, **kwargs):
+        return "_".join(f"{name}_{order}" for name, order in keys)
+
+
+class InMemoryDatabase:
+    """Drop-in for ``backend.routes.db.Database`` backed by one InMemoryCollection."""
+
+    collection = InMemoryCollection()
+    configured = True
+
+    def __init__(self):
+        self.ready = False
+        self.last_error = None
+        self.last_checked = None
+        self.client_options = {}
+
+    @classmethod
+    def from_env(cls) -> "InMemoryDatabase":
+        return cls()
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.ready = False
+
+    @property
+    def voice_history(self):
+        return self.collection
+
+    async def check(self, timeout: float = 2.0) -> bool:
+        self.ready, self.last_checked = True, time.time()
+        return True
+
+
+@contextmanager
+def standins(
+    handshake: Latency = Latency(0.05, 0.02),
+    chunk_interval: Latency = Latency(0.01, 0.005),
+    chunks: int = 8,
+    chunk_bytes: int = 1024,
+    translate_latency: Latency = Latency(0.05, 0.02),
+    cache_bytes: int = 0,
+    seed: int = 0,
+    synthesizer_faults: Optional[Faults] = None,
+    translator_faults: Optional[Faults] = None,
+    disk_cache_dir: Optional[str] = None,
+    disk_cache_bytes: int = 256 * 1024 * 1024,
+):
+    """Patch the app modules to use the stand-ins; ``cache_bytes=0`` disables the in-memory audio cache.
+
+    With ``disk_cache_dir``, audio and translations are also cached on disk
+    there (shared by every worker process pointed at the same directory).
+    """
+    from backend import app as app_module
+
+    # Patch the route modules the app actually imported: depending on sys.path
+    # that is either ``routes.*`` or ``backend.routes.*``.
+    tts = app_module.tts
+    translator = import_module(tts.__package__ + ".translator")
+    AudioCache = import_module(tts.__package__ + ".audio_cache").AudioCache
+    Upstream = import_module(tts.__package__ + ".resilience").Upstream
+    SharedDiskCache = import_module(tts.__package__ + ".shared_cache").SharedDiskCache
+
+    cached_translator = translator.CachedTranslator.from_env()
+    # Never reuse the default on-disk translation cache: runs must start cold
+    cached_translator.shared = SharedDiskCache(
+        os.path.join(disk_cache_dir, "translate"), disk_cache_bytes, inline_bytes=64 * 1024
+    ) if disk_cache_dir else None
+    audio_cache = AudioCache(
+        memory_bytes=cache_bytes,
+        disk_dir=os.path.join(disk_cache_dir, "tts") if disk_cache_dir else None,
+        disk_bytes=disk_cache_bytes,
+    )
+
+    InMemoryDatabase.collection = InMemoryCollection()
+    patches = [
+        (
+            tts.edge_tts, "Communicate",
+            paced_communicate(handshake, chunk_interval, chunks, chunk_bytes, seed, synthesizer_faults),
+        ),
+        (tts, "audio_cache", audio_cache),
+        # Fresh circuit breakers and latency history for every run
+        (
+            tts, "synthesis_upstream",
+            Upstream.from_env(
+                "edge-tts", "TTS_UPSTREAM", deadline=10.0, idle_timeout=15.0, is_failure=tts.is_synthesis_failure
+            ),
+        ),
+        (translator, "GoogleTranslator", delayed_translator(translate_latency, seed, translator_faults)),
+        (translator, "translator", cached_translator),
+        (app_module, "Database", InMemoryDatabase),
+    ]
+    originals = [(target, name, getattr(target, name)) for target, name, _ in patches]
+    for target, name, value in patches:
+        setattr(target, name, value)
+    try:
+        yield app_module.app
+    finally:
+        translator.translator.shutdown()
+        for target, name, value in originals:
+            setattr(target, name, value)
@@ -0,0 +1,114 @@
+"""Concurrent /api/tts throughput with a slow translator.
+
+Compares the old behaviour (GoogleTranslator called synchronously on the
+event loop) with the offloaded, bounded translate_async path. Everything
+runs in-process against fakes, so no network is needed.
+
+Usage (from the repo root):
+  python -m backend.benchmarks.translate_offload
+  python -m backend.benchmarks.translate_offload --requests 64 --delay 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from backend.routes import translator, tts
+from backend.routes.audio_cache import AudioCache
+
+
+def build_app(delay: float, workers: int) -> FastAPI:
+    class SlowTranslator:
+        def __init__(self, source: str, target: str):
+            self.target = target
+
+        def translate(self, text: str) -> str:
+            time.sleep(delay)
+            return f"[{self.target}] {text}"
+
+    class FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            pass
+
+        async def stream(self):
+            for _ in range(4):
+                await asyncio.sleep(0.005)
+                yield {"type": "audio", "data": b"\xff\xf3" * 256}
+
+    translator.GoogleTranslator = SlowTranslator
+    translator.translator = translator.CachedTranslator(max_workers=workers, timeout_seconds=60)
+    tts.edge_tts.Communicate = FakeCommunicate
+    tts.audio_cache = AudioCache(memory_bytes=0, disk_dir=None)
+
+    app = FastAPI()
+    app.include_router(tts.router, prefix="/api")
+    return app
+
+
+async def run(app: FastAPI, n_requests: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies = {"en": [], "hi": []}
+
+    async def one(i: int, client: httpx.AsyncClient):
+        # Half the traffic needs translation (Hindi persona), half does not.
+        voice = "Madhur" if i % 2 else "Kore"
+        started = time.perf_counter()
+        res = await client.post("/api/tts", json={"text": f"Sentence number {i}", "voice": voice})
+        res.raise_for_status()
+        latencies["hi" if i % 2 else "en"].append(time.perf_counter() - started)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i, client) for i in range(n_requests)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "elapsed": elapsed,
+        "rps": n_requests / elapsed,
+        "en_p50": statistics.median(latencies["en"]),
+        "en_max": max(latencies["en"]),
+        "hi_p50": statistics.median(latencies["hi"]),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--delay", type=float, default=0.1, help="fake translator latency in seconds")
+    parser.add_argument("--workers", type=int, default=8, help="translation pool size")
+    args = parser.parse_args()
+
+    app = build_app(args.delay, args.workers)
+    offloaded = asyncio.run(run(app, args.requests))
+
+    # Old behaviour: the blocking call runs on the event loop.
+    async def blocking_translate(text, target, source="auto", timeout=None):
+        return translator.translator.translate(text, target, source)
+
+    original = tts.translate_async
+    tts.translate_async = blocking_translate
+    translator.translator.clear()
+    try:
+        blocking = asyncio.run(run(app, args.requests))
+    finally:
+        tts.translate_async = original
+        translator.translator.shutdown()
+
+    print(f"{args.requests} concurrent /api/tts requests, translator delay {args.delay * 1000:.0f} ms")
+    print(f"{'mode':<12}{'wall s':>10}{'req/s':>10}{'en p50 ms':>12}{'en max ms':>12}{'hi p50 ms':>12}")
+    for name, r in (("blocking", blocking), ("offloaded", offloaded)):
+        print(
+            f"{name:<12}{r['elapsed']:>10.2f}{r['rps']:>10.1f}"
+            f"{r['en_p50'] * 1000:>12.1f}{r['en_max'] * 1000:>12.1f}{r['hi_p50'] * 1000:>12.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
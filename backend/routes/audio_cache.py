@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from .shared_cache import SharedDiskCache
+
+CACHE_VERSION = "v1"
+
+
+def cache_key(voice_id: str, rate: str, pitch: str, text: str, variant: str = "") -> str:
+    """Content address for one synthesized clip.
+
+    Built from exactly what is sent to edge-tts, so two requests that end up
+    with the same voice, prosody and (post-translation) text share an entry.
+    ``variant`` separates renderings of the same input that produce different
+    bytes (e.g. segmented long-text synthesis).
+    """
+    parts = [CACHE_VERSION, voice_id, rate, pitch, text]
+    if variant:
+        parts.append(variant)
+    raw = "\x1f".join(parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """Two-tier cache for synthesized audio.
+
+    A byte-bounded in-memory LRU sits in front of an on-disk store with its
+    own byte budget. Disk entries are promoted to memory on read. Both tiers
+    are safe to use from the event loop and from worker threads.
+
+    The disk tier is a SharedDiskCache: every worker process on the host
+    pointed at the same ``disk_dir`` shares its entries and its budget. The
+    memory tier belongs to one process.
+    """
+
+    def __init__(
+        self,
+        memory_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_bytes: int = 1024 * 1024 * 1024,
+    ):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir
+        self.disk_bytes = disk_bytes
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_size = 0
+        # Entries are MP3, Ogg, WebM or WAV audio and JSON timings: no format-specific extension
+        self._disk = (
+            SharedDiskCache(disk_dir, disk_bytes, suffix=".bin", legacy_suffixes=(".mp3",)) if disk_dir else None
+        )
+
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "AudioCache":
+        disk_dir = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "voxopen-tts-cache"))
+        return cls(
+            memory_bytes=int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024))),
+            disk_dir=disk_dir or None,
+            disk_bytes=int(os.getenv("TTS_CACHE_DISK_BYTES", str(1024 * 1024 * 1024))),
+        )
+
+    # ---------- async API (used by request handlers) ----------
+
+    async def fetch(self, key: str) -> Optional[bytes]:
+        data = self._get_memory(key)
+        if data is not None:
+            return data
+        if not self.disk_dir:
+            self._count("misses")
+            return None
+        return await asyncio.to_thread(self._get_disk, key)
+
+    async def store(self, key: str, data: bytes) -> None:
+        self._put_memory(key, data)
+        self._count("stores")
+        if self.disk_dir:
+            await asyncio.to_thread(self._put_disk, key, data)
+
+    # ---------- sync API ----------
+
+    def get(self, key: str) -> Optional[bytes]:
+        data = self._get_memory(key)
+        if data is not None:
+            return data
+        if not self.disk_dir:
+            self._count("misses")
+            return None
+        return self._get_disk(key)
+
+    def put(self, key: str, data: bytes) -> None:
+        self._put_memory(key, data)
+        self._count("stores")
+        if self.disk_dir:
+            self._put_disk(key, data)
+
+    def stats(self) -> dict:
+        disk = self._disk.stats() if self._disk else None
+        with self._lock:
+            return {
+                **self._counters,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "memory_budget_bytes": self.memory_bytes,
+                "disk_evictions": disk["evictions"] if disk else 0,
+                "disk_entries": disk["entries"] if disk else None,
+                "disk_bytes": disk["bytes"] if disk else None,
+                "disk_budget_bytes": self.disk_bytes if self.disk_dir else 0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+
+    # ---------- memory tier ----------
+
+    def _count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += n
+
+    def _get_memory(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is None:
+                return None
+            self._memory.move_to_end(key)
+            self._counters["memory_hits"] += 1
+            return data
+
+    def _put_memory(self, key: str, data: bytes) -> None:
+        size = len(data)
+        if size > self.memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_size -= len(old)
+            self._memory[key] = data
+            self._memory_size += size
+            while self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+                self._counters["memory_evictions"] += 1
+
+    # ---------- disk tier ----------
+
+    def _get_disk(self, key: str) -> Optional[bytes]:
+        data = self._disk.get(key)
+        if data is None:
+            self._count("misses")
+            return None
+        self._count("disk_hits")
+        self._put_memory(key, data)
+        return data
+
+    def _put_disk(self, key: str, data: bytes) -> None:
+        self._disk.put(key, data)
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import struct
+from dataclasses import dataclass
+from typing import Optional
+
+# edge-tts only produces 24 kHz / 48 kbps mono MP3; every other format is
+# transcoded from that stream by ffmpeg, when it is installed.
+FFMPEG = shutil.which(os.getenv("FFMPEG_BINARY", "ffmpeg"))
+
+# Bytes read from ffmpeg per chunk; small enough to keep time to first byte low
+READ_CHUNK_BYTES = 4096
+
+# Tail of ffmpeg's stderr kept for the TranscodeError message
+STDERR_TAIL_BYTES = 4096
+
+
+class TranscodeError(Exception):
+    pass
+
+
+class UnsupportedFormat(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    name: str
+    media_type: str
+    extension: str
+    # ffmpeg output options; None for the synthesizer's native MP3
+    ffmpeg_args: Optional[tuple] = None
+
+    @property
+    def native(self) -> bool:
+        return self.ffmpeg_args is None
+
+    @property
+    def available(self) -> bool:
+        return self.native or FFMPEG is not None
+
+
+# In server preference order: ties in Accept go to the earliest (mp3 costs no transcoding)
+FORMATS = {
+    "mp3": AudioFormat("mp3", "audio/mpeg", "mp3"),
+    "mp3-low": AudioFormat(
+        "mp3-low", "audio/mpeg", "mp3",
+        ("-ar", "16000", "-ac", "1", "-c:a", "libmp3lame", "-b:a", "24k", "-f", "mp3"),
+    ),
+    "opus": AudioFormat(
+        "opus", "audio/ogg; codecs=opus", "opus",
+        ("-c:a", "libopus", "-b:a", "24k", "-f", "ogg"),
+    ),
+    "webm": AudioFormat(
+        "webm", "audio/webm; codecs=opus", "webm",
+        ("-c:a", "libopus", "-b:a", "24k", "-f", "webm"),
+    ),
+    # Telephony: 8 kHz G.711 µ-law
+    "mulaw-8k": AudioFormat(
+        "mulaw-8k", "audio/wav", "wav",
+        ("-ar", "8000", "-ac", "1", "-c:a", "pcm_mulaw", "-f", "wav"),
+    ),
+}
+DEFAULT_FORMAT = "mp3"
+
+# Leading bytes → media type, for content-addressed reads that only know the key
+_SIGNATURES = (
+    (b"OggS", "audio/ogg; codecs=opus"),
+    (b"\x1a\x45\xdf\xa3", "audio/webm; codecs=opus"),
+    (b"RIFF", "audio/wav"),
+)
+
+
+def available_formats() -> list:
+    return [f for f in FORMATS.values() if f.available]
+
+
+def _parse_accept(header: str) -> list:
+    """(media range, q) pairs from an Accept header, parameters other than q ignored."""
+    ranges = []
+    for part in header.split(","):
+        media_range, *params = [p.strip() for p in part.split(";")]
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        ranges.append((media_range.lower(), q))
+    return ranges
+
+
+def _quality(audio_format: AudioFormat, ranges: list) -> float:
+    media_type = audio_format.media_type.split(";")[0]
+    kind = media_type.split("/")[0]
+    best, specificity = 0.0, -1
+    for media_range, q in ranges:
+        if media_range == media_type:
+            level = 2
+        elif media_range == f"{kind}/*":
+            level = 1
+        elif media_range == "*/*":
+            level = 0
+        else:
+            continue
+        # The most specific matching range decides
+        if level > specificity:
+            best, specificity = q, level
+    return best
+
+
+def negotiate(requested: Optional[str] = None, accept: Optional[str] = None) -> AudioFormat:
+    """Output format from an explicit ``format`` name, else the Accept header, else MP3.
+
+    Raises UnsupportedFormat when the named format is unknown or can't be
+    produced here, or when Accept rules out every available format.
+    """
+    if requested:
+        audio_format = FORMATS.get(requested.lower())
+        if audio_format is None or not audio_format.available:
+            names = ", ".join(f.name for f in available_formats())
+            raise UnsupportedFormat(f"Unsupported format: {requested!r}. Available: {names}.")
+        return audio_format
+    if not accept:
+        return FORMATS[DEFAULT_FORMAT]
+    ranges = _parse_accept(accept)
+    scored = [(_quality(f, ranges), f) for f in available_formats()]
+    best = max((q for q, _ in scored), default=0.0)
+    if best <= 0:
+        raise UnsupportedFormat("None of the available audio formats is acceptable.")
+    return next(f for q, f in scored if q == best)
+
+
+def finalize(audio: bytes, audio_format: AudioFormat) -> bytes:
+    """A complete clip as it should be stored, from the bytes streamed out of ``transcode``.
+
+    Writing to a pipe, ffmpeg can't seek back to fill in a WAV header's
+    sizes and leaves placeholders there; the stored copy gets real ones.
+    """
+    if audio_format.extension == "wav":
+        return _finalize_wav(audio)
+    return audio
+
+
+def _finalize_wav(audio: bytes) -> bytes:
+    if len(audio) < 12 or audio[:4] != b"RIFF" or audio[8:12] != b"WAVE":
+        return audio
+    out = bytearray(audio)
+    struct.pack_into("<I", out, 4, len(out) - 8)
+    offset, block_align, fact = 12, 0, None
+    while offset + 8 <= len(out):
+        chunk_id = bytes(out[offset:offset + 4])
+        (size,) = struct.unpack_from("<I", out, offset + 4)
+        body = offset + 8
+        if chunk_id == b"data":
+            size = len(out) - body
+            struct.pack_into("<I", out, offset + 4, size)
+            # Non-PCM codecs (µ-law) carry the frame count in a fact chunk
+            if fact is not None and block_align:
+                struct.pack_into("<I", out, fact, size // block_align)
+            break
+        if chunk_id == b"fmt " and size >= 14:
+            (block_align,) = struct.unpack_from("<H", out, body + 12)
+        elif chunk_id == b"fact" and size >= 4:
+            fact = body
+        offset = body + size + (size & 1)
+    return bytes(out)
+
+
+def sniff_media_type(data: bytes) -> str:
+    for signature, media_type in _SIGNATURES:
+        if data.startswith(signature):
+            return media_type
+    return "audio/mpeg"
+
+
+async def transcode(source, audio_format: AudioFormat):
+    """Re-encode an async iterator of MP3 chunks through ffmpeg, yielding output as it is produced.
+
+    Non-bytes items (boundary events) are passed through in arrival order
+    relative to the output read so far. Upstream errors are re-raised once
+    ffmpeg has flushed what it received; ffmpeg failures raise TranscodeError.
+    WAV output has placeholder sizes in its header; see ``finalize``.
+    """
+    process = await asyncio.create_subprocess_exec(
+        FFMPEG, "-hide_banner", "-loglevel", "error",
+        # Start decoding after the first frames instead of probing ~5 s of input
+        "-f", "mp3", "-probesize", "4096", "-analyzeduration", "0", "-i", "pipe:0",
+        *audio_format.ffmpeg_args, "-flush_packets", "1", "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    passthrough = []
+    stderr = bytearray()
+
+    async def drain_stderr():
+        # Read continuously so ffmpeg never blocks on a full stderr pipe
+        while chunk := await process.stderr.read(READ_CHUNK_BYTES):
+            stderr.extend(chunk)
+            del stderr[:-STDERR_TAIL_BYTES]
+
+    async def feed():
+        try:
+            async for item in source:
+                if isinstance(item, bytes):
+                    process.stdin.write(item)
+                    await process.stdin.drain()
+                else:
+                    passthrough.append(item)
+        finally:
+            process.stdin.close()
+            await source.aclose()
+
+    feeder = asyncio.create_task(feed())
+    drainer = asyncio.create_task(drain_stderr())
+    try:
+        while True:
+            data = await process.stdout.read(READ_CHUNK_BYTES)
+            while passthrough:
+                yield passthrough.pop(0)
+            if not data:
+                break
+            yield data
+        try:
+            await feeder
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpeg quit early; its exit status says why
+        await drainer
+        if await process.wait() != 0:
+            raise TranscodeError(stderr.decode(errors="replace").strip() or f"ffmpeg exited with {process.returncode}")
+        while passthrough:
+            yield passthrough.pop(0)
+    finally:
+        feeder.cancel()
+        drainer.cancel()
+        await asyncio.gather(feeder, drainer, return_exceptions=True)
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
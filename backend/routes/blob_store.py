@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+# Uploads are the only copy of the user's audio: keep them under the project's
+# data directory (a volume in Docker), never in the temp dir
+DEFAULT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data/history-blobs"))
+
+
+class BlobTooLarge(Exception):
+    pass
+
+
+class FileBlobStore:
+    """Content-addressed store for uploaded audio, one file per SHA-256 digest.
+
+    Uploads are copied in ``chunk_size`` pieces into a temporary file while
+    being hashed, so memory per upload is one chunk regardless of file size.
+    The finished file is renamed to its digest; identical uploads share it.
+    """
+
+    def __init__(self, root: str, chunk_size: int = 256 * 1024, max_bytes: int = 25 * 1024 * 1024):
+        self.root = root
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def from_env(cls) -> "FileBlobStore":
+        return cls(
+            root=os.getenv("HISTORY_BLOB_DIR") or DEFAULT_ROOT,
+            chunk_size=int(os.getenv("HISTORY_UPLOAD_CHUNK_BYTES", str(256 * 1024))),
+            max_bytes=int(os.getenv("HISTORY_UPLOAD_MAX_BYTES", str(25 * 1024 * 1024))),
+        )
+
+    def path(self, digest: str) -> Optional[str]:
+        """On-disk location for ``digest``, or None when it is not a SHA-256 hex digest."""
+        if not _DIGEST.match(digest):
+            return None
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        path = self.path(digest)
+        return path is not None and os.path.isfile(path)
+
+    async def put(self, source) -> dict:
+        """Stream ``source`` (anything with ``async read(n)``, e.g. an UploadFile) into the store.
+
+        Returns ``{"sha256", "size", "deduplicated"}``. Raises BlobTooLarge,
+        leaving nothing behind, once more than ``max_bytes`` have been read.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as f:
+                while True:
+                    chunk = await source.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise BlobTooLarge(f"Upload exceeds {self.max_bytes} bytes.")
+                    await run_in_threadpool(_write_chunk, f, digest, chunk)
+            sha256 = digest.hexdigest()
+            deduplicated = await run_in_threadpool(self._commit, tmp_path, sha256)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return {"sha256": sha256, "size": size, "deduplicated": deduplicated}
+
+    def _commit(self, tmp_path: str, sha256: str) -> bool:
+        path = self.path(sha256)
+        if os.path.exists(path):
+            os.unlink(tmp_path)
+            return True
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        return False
+
+
+def _write_chunk(f, digest, chunk: bytes) -> None:
+    digest.update(chunk)
+    f.write(chunk)
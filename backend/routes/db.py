@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Optional
+
+from fastapi import HTTPException, Request
+from pymongo import MongoClient
+
+class Database:
+    """Mongo client owned by the app's lifespan and shared by the routers.
+
+    ``open`` builds the client with ``connect=False``: no DNS/SRV lookup or
+    socket is opened until the first operation, so importing the app and
+    booting a worker never wait on the cluster. ``check`` pings with a short
+    deadline and records readiness for /healthz.
+
+    Without a ``uri`` (MONGO_URI unset) the database is not configured: no
+    client is built, ``voice_history`` is None and the history routes
+    answer 503.
+    """
+
+    def __init__(
+        self,
+        uri: Optional[str],
+        db_name: str = "voice_ai_db",
+        max_pool_size: int = 50,
+        min_pool_size: int = 0,
+        max_idle_time_ms: int = 60_000,
+        server_selection_timeout_ms: int = 5_000,
+        connect_timeout_ms: int = 5_000,
+        socket_timeout_ms: int = 10_000,
+    ):
+        self.uri = uri
+        self.db_name = db_name
+        self.client_options = {
+            "maxPoolSize": max_pool_size,
+            "minPoolSize": min_pool_size,
+            "maxIdleTimeMS": max_idle_time_ms,
+            "serverSelectionTimeoutMS": server_selection_timeout_ms,
+            "connectTimeoutMS": connect_timeout_ms,
+            "socketTimeoutMS": socket_timeout_ms,
+        }
+        self.client: Optional[MongoClient] = None
+        self.ready = False
+        self.last_error: Optional[str] = None
+        self.last_checked: Optional[float] = None
+
+    @classmethod
+    def from_env(cls) -> "Database":
+        return cls(
+            os.getenv("MONGO_URI") or None,
+            db_name=os.getenv("MONGO_DB_NAME", "voice_ai_db"),
+            max_pool_size=int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+            min_pool_size=int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+            max_idle_time_ms=int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000")),
+            server_selection_timeout_ms=int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+            connect_timeout_ms=int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+            socket_timeout_ms=int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "10000")),
+        )
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.uri)
+
+    def open(self) -> None:
+        if self.client is None and self.configured:
+            self.client = MongoClient(self.uri, connect=False, **self.client_options)
+
+    def close(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+        self.ready = False
+
+    @property
+    def voice_history(self):
+        self.open()
+        if self.client is None:
+            return None
+        return self.client[self.db_name]["voice_history"]
+
+    async def check(self, timeout: float = 2.0) -> bool:
+        """Ping the cluster off the event loop; never waits longer than ``timeout``."""
+        self.open()
+        if self.client is None:
+            self.ready, self.last_error = False, "MONGO_URI is not set"
+            return False
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self.client.admin.command, "ping"), timeout)
+            self.ready, self.last_error = True, None
+        except asyncio.TimeoutError:
+            self.ready, self.last_error = False, f"ping timed out after {timeout:g}s"
+        except Exception as e:
+            self.ready, self.last_error = False, str(e)
+        self.last_checked = time.time()
+        return self.ready
+
+
+def get_history_collection(request: Request):
+    """FastAPI dependency: the voice_history collection set up by the app's lifespan."""
+    collection = getattr(request.app.state, "voice_history_collection", None)
+    if collection is None:
+        raise HTTPException(status_code=503, detail="Database is not available.")
+    return collection
@@ -1,8 +1,24 @@
 
-from fastapi import APIRouter, HTTPException, Request, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+import base64
+import json
+import os
+import re
+import time
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
 from datetime import datetime
 
+from .audio_formats import sniff_media_type
+from .blob_store import BlobTooLarge
+from .db import get_history_collection
+from .http_cache import IMMUTABLE, etag_matches
+from .history_writer import HistoryQueueFull
+from .metrics import HISTORY_STAGE_SECONDS
+from .translator import translate_async
 from .utils import contains_sensitive, normalize_text
 
 router = APIRouter()
@@ -15,28 +31,43 @@ async def save_uploaded_history(
     voice: str = Form(""),
     emotion: str = Form(""),
     pitch: int = Form(0),
-    speed: float = Form(1.0)
+    speed: float = Form(1.0),
+    voice_history_collection=Depends(get_history_collection),
 ):
     # Always check all user input for sensitive words: text, file name, and translation to English
     file_text = file.filename if file and hasattr(file, 'filename') else ""
-    from deep_translator import GoogleTranslator
     translated_text = text
     translated_to_en = text
     try:
-        translated_text = GoogleTranslator(source='auto', target='en').translate(text)
+        with HISTORY_STAGE_SECONDS.time(operation="save", stage="translation"):
+            translated_text = await translate_async(text, 'en')
         translated_to_en = translated_text
     except Exception:
         translated_to_en = text
     # Check all relevant user input fields
     user_inputs = [text, file_text, translated_text, translated_to_en]
-    for value in user_inputs:
-        if contains_sensitive(value):
-            return JSONResponse({"warning": "Input contains sensitive or inappropriate language."})
+    with HISTORY_STAGE_SECONDS.time(operation="save", stage="moderation"):
+        sensitive = any(contains_sensitive(value) for value in user_inputs)
+    if sensitive:
+        return JSONResponse({"warning": "Input contains sensitive or inappropriate language."})
+    # Stream the audio into the content-addressed blob store (constant memory per upload)
+    audio = None
+    blob_store = getattr(request.app.state, "blob_store", None)
+    if blob_store is not None and file is not None:
+        try:
+            with HISTORY_STAGE_SECONDS.time(operation="save", stage="upload"):
+                blob = await blob_store.put(file)
+        except BlobTooLarge as e:
+            return JSONResponse({"error": str(e)}, status_code=413)
+        if blob["size"]:
+            audio = {
+                "sha256": blob["sha256"],
+                "size": blob["size"],
+                "content_type": file.content_type,
+                "filename": file.filename,
+            }
+    persist_started = time.perf_counter()
     try:
-        voice_history_collection = request.app.voice_history_collection if hasattr(request.app, 'voice_history_collection') else None
-        if voice_history_collection is None:
-            from backend.app import voice_history_collection as vcol
-            voice_history_collection = vcol
         doc = {
             "text": text,
             "voice": voice,
@@ -44,28 +75,129 @@ async def save_uploaded_history(
             "pitch": pitch,
             "speed": speed,
             "timestamp": datetime.utcnow(),
-            # Optionally store file.filename or other info
         }
-        voice_history_collection.insert_one(doc)
+        if audio:
+            doc["audio"] = audio
+        # Write-behind: the app's HistoryWriter batches inserts in the background
+        writer = getattr(request.app.state, "history_writer", None)
+        if writer is not None:
+            await writer.enqueue(doc)
+        else:
+            await run_in_threadpool(voice_history_collection.insert_one, doc)
+        HISTORY_STAGE_SECONDS.observe(time.perf_counter() - persist_started, operation="save", stage="persist")
         return JSONResponse({"status": "ok"})
+    except HistoryQueueFull as e:
+        return JSONResponse({"error": str(e)}, status_code=503, headers={"Retry-After": "1"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/history/audio/{digest}")
+def get_history_audio(digest: str, request: Request):
+    """Uploaded audio by SHA-256, with Range support; the content never changes under a digest."""
+    blob_store = getattr(request.app.state, "blob_store", None)
+    if blob_store is None:
+        raise HTTPException(status_code=503, detail="Audio storage is not configured.")
+    path = blob_store.path(digest)
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Audio not found.")
+    headers = {"ETag": f'"{digest}"', "Cache-Control": IMMUTABLE}
+    if etag_matches(request.headers.get("if-none-match", ""), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    with open(path, "rb") as f:
+        media_type = sniff_media_type(f.read(16))
+    # FileResponse streams from disk and answers Range / If-Range itself
+    return FileResponse(path, media_type=media_type, headers=headers)
+
+
+# Newest first; _id breaks ties between equal timestamps so pages never overlap
+HISTORY_SORT = [("timestamp", -1), ("_id", -1)]
+HISTORY_INDEXES = [
+    [("timestamp", -1), ("_id", -1)],
+    [("voice", 1), ("timestamp", -1), ("_id", -1)],
+    [("emotion", 1), ("timestamp", -1), ("_id", -1)],
+]
+HISTORY_MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "100"))
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def ensure_history_indexes(collection):
+    """Create the indexes backing GET /history (no-op when they already exist)."""
+    for keys in HISTORY_INDEXES:
+        collection.create_index(keys)
+
+
+def encode_cursor(item):
+    """Opaque keyset cursor pointing just after ``item`` in HISTORY_SORT order."""
+    timestamp = item.get("timestamp")
+    raw = {
+        "t": timestamp.isoformat() if isinstance(timestamp, datetime) else None,
+        "id": str(item["_id"]),
+        "oid": isinstance(item["_id"], ObjectId),
+    }
+    return base64.urlsafe_b64encode(json.dumps(raw, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        timestamp = datetime.fromisoformat(raw["t"]) if raw["t"] else None
+        last_id = ObjectId(raw["id"]) if raw["oid"] else raw["id"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return timestamp, last_id
+
+
+def history_query(voice=None, emotion=None, cursor=None):
+    query = {}
+    if voice:
+        query["voice"] = voice
+    if emotion:
+        query["emotion"] = emotion
+    if cursor:
+        timestamp, last_id = decode_cursor(cursor)
+        after = [{"timestamp": timestamp, "_id": {"$lt": last_id}}]
+        if timestamp is not None:
+            # Documents without a timestamp sort after every dated one
+            after = [{"timestamp": {"$lt": timestamp}}, *after, {"timestamp": None}]
+        query["$or"] = after
+    return query
+
+
 @router.get("/history")
-def get_voice_history(request: Request):
+def get_voice_history(
+    limit: int = Query(20, ge=1),
+    cursor: Optional[str] = None,
+    voice: Optional[str] = None,
+    emotion: Optional[str] = None,
+    fields: Optional[str] = None,
+    voice_history_collection=Depends(get_history_collection),
+):
+    """Newest-first history, keyset-paginated on (timestamp, _id).
+
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next page;
+    it is null on the last page. ``fields`` is a comma-separated projection
+    (``_id`` and ``timestamp`` are always included).
+    """
+    limit = min(limit, HISTORY_MAX_PAGE_SIZE)
+    projection = None
+    if fields:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        if not all(_FIELD_NAME.match(name) for name in names):
+            raise HTTPException(status_code=400, detail="Invalid fields.")
+        projection = {name: 1 for name in names}
+        projection["timestamp"] = 1
+
+    query = history_query(voice, emotion, cursor)
     try:
-        # Use the same collection as app.py
-        voice_history_collection = request.app.voice_history_collection if hasattr(request.app, 'voice_history_collection') else None
-        if voice_history_collection is None:
-            # fallback for direct import
-            from backend.app import voice_history_collection as vcol
-            voice_history_collection = vcol
-        history = list(voice_history_collection.find().sort("timestamp", -1).limit(20))
+        # One extra row tells us whether there is a next page
+        with HISTORY_STAGE_SECONDS.time(operation="list", stage="query"):
+            history = list(voice_history_collection.find(query, projection).sort(HISTORY_SORT).limit(limit + 1))
+        next_cursor = encode_cursor(history[limit - 1]) if len(history) > limit else None
+        history = history[:limit]
         for item in history:
             item["_id"] = str(item["_id"])
-            item["timestamp"] = item["timestamp"].isoformat() if "timestamp" in item else None
-        return {"history": history}
+            timestamp = item.get("timestamp")
+            item["timestamp"] = timestamp.isoformat() if isinstance(timestamp, datetime) else None
+        return {"history": history, "next_cursor": next_cursor}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
-
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Any, Optional
+
+from pymongo.errors import BulkWriteError
+
+from .logs import get_logger
+
+log = get_logger("history")
+
+_STOP = object()
+
+DUPLICATE_KEY = 11000
+# Write errors worth retrying: the server was unreachable, stepping down or
+# out of time. Anything else (e.g. document validation) fails every time.
+TRANSIENT_WRITE_ERRORS = frozenset({
+    6, 7, 50, 89, 91, 112, 189, 262, 9001, 10107, 11600, 11602, 13435, 13436,
+})
+
+
+class HistoryQueueFull(Exception):
+    """Raised when the write-behind queue stays full past the enqueue timeout."""
+
+
+class HistoryWriter:
+    """Write-behind persistence for voice history documents.
+
+    Handlers ``enqueue`` documents into a bounded in-process queue and return
+    immediately. A background task drains the queue with ``insert_many``
+    whenever ``batch_size`` documents are waiting or ``flush_interval``
+    seconds have passed since the first one arrived. The blocking pymongo
+    call runs in a worker thread, never on the event loop.
+
+    When the queue is full, ``enqueue`` waits up to ``enqueue_timeout`` for
+    room (backpressure) and then raises HistoryQueueFull. ``stop`` flushes
+    everything still queued.
+
+    A batch that fails only in part is not re-sent whole: only documents
+    whose write error is transient are retried. A duplicate key means an
+    earlier attempt already stored the document (pymongo sets ``_id`` on
+    each one before sending), so it counts as written.
+    """
+
+    def __init__(
+        self,
+        collection,
+        max_queue: int = 10_000,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        enqueue_timeout: float = 2.0,
+        max_attempts: int = 3,
+    ):
+        self.collection = collection
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_attempts = max_attempts
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._batch_ready = asyncio.Event()
+        self._counters = {"enqueued": 0, "written": 0, "flushes": 0, "rejected": 0, "failed_flushes": 0, "dropped": 0}
+
+    @classmethod
+    def from_env(cls, collection) -> "HistoryWriter":
+        return cls(
+            collection,
+            max_queue=int(os.getenv("HISTORY_QUEUE_SIZE", "10000")),
+            batch_size=int(os.getenv("HISTORY_BATCH_SIZE", "100")),
+            flush_interval=float(os.getenv("HISTORY_FLUSH_INTERVAL_SECONDS", "0.5")),
+            enqueue_timeout=float(os.getenv("HISTORY_ENQUEUE_TIMEOUT_SECONDS", "2")),
+        )
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        return self._queue
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop accepting documents and flush everything already queued."""
+        self._closing = True
+        if self._task is not None:
+            await self.queue.put(_STOP)
+            self._batch_ready.set()
+            await self._task
+            self._task = None
+        else:
+            await self._drain()
+
+    async def enqueue(self, doc: dict[str, Any]) -> None:
+        if self._closing:
+            raise HistoryQueueFull("History writer is shutting down.")
+        try:
+            await asyncio.wait_for(self.queue.put(doc), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            self._counters["rejected"] += 1
+            raise HistoryQueueFull("History queue is full.") from None
+        self._counters["enqueued"] += 1
+        if self.queue.qsize() >= self.batch_size - 1:
+            self._batch_ready.set()
+
+    def stats(self) -> dict:
+        return {**self._counters, "queued": self.queue.qsize(), "max_queue": self.max_queue}
+
+    def _take(self, limit: int) -> tuple[list, bool]:
+        """Pop up to ``limit`` queued docs without waiting; also report whether the stop marker was seen."""
+        docs = []
+        while len(docs) < limit and not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is _STOP:
+                return docs, True
+            docs.append(item)
+        return docs, False
+
+    async def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = await self.queue.get()
+            if first is _STOP:
+                break
+            # Give the batch up to flush_interval to fill before writing it
+            if self.queue.qsize() < self.batch_size - 1:
+                self._batch_ready.clear()
+                try:
+                    await asyncio.wait_for(self._batch_ready.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            docs, stopping = self._take(self.batch_size - 1)
+            await self._flush([first, *docs])
+        await self._drain()
+
+    async def _drain(self) -> None:
+        while not self.queue.empty():
+            docs, _ = self._take(self.batch_size)
+            await self._flush(docs)
+
+    async def _flush(self, docs: list) -> None:
+        pending = docs
+        for attempt in range(self.max_attempts):
+            if not pending:
+                return
+            try:
+                await asyncio.to_thread(self.collection.insert_many, pending, ordered=False)
+                self._counters["flushes"] += 1
+                self._counters["written"] += len(pending)
+                return
+            except BulkWriteError as e:
+                pending = self._partial_failure(pending, e.details)
+                error = str(e)
+            except Exception as e:
+                # Nothing is known about which documents landed: retry them all
+                error = str(e)
+            self._counters["failed_flushes"] += 1
+            log.error(
+                "history_flush_failed", attempt=attempt + 1, max_attempts=self.max_attempts, retrying=len(pending),
+                error=error,
+            )
+            if pending and attempt + 1 < self.max_attempts:
+                await asyncio.sleep(0.2 * 2 ** attempt)
+        self._counters["dropped"] += len(pending)
+
+    def _partial_failure(self, docs: list, details: dict) -> list:
+        """Count what a BulkWriteError says was written or lost; return the documents to retry."""
+        retry, written, dropped = [], len(docs), 0
+        for write_error in details.get("writeErrors", []):
+            code = write_error.get("code")
+            if code == DUPLICATE_KEY:
+                continue
+            written -= 1
+            if code in TRANSIENT_WRITE_ERRORS:
+                retry.append(docs[write_error["index"]])
+            else:
+                dropped += 1
+        self._counters["written"] += written
+        self._counters["dropped"] += dropped
+        return retry
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import re
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# Content-addressed responses never change under the same URL/ETag
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match semantics (weak comparison): any listed tag, or ``*``."""
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def parse_range(header: str, length: int) -> Optional[tuple]:
+    """(start, end) inclusive for a single ``bytes=`` range, or None to send the whole body.
+
+    Multi-range and malformed headers are ignored (a full 200 is always a
+    valid answer); a well-formed range that starts past the end raises
+    RangeNotSatisfiable.
+    """
+    match = _BYTE_RANGE.match(header.strip().replace(" ", ""))
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        suffix = int(last)
+        if suffix == 0:
+            raise RangeNotSatisfiable()
+        return max(0, length - suffix), length - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= length:
+        raise RangeNotSatisfiable()
+    return start, min(int(last), length - 1) if last else length - 1
+
+
+def conditional_response(request: Request, body: bytes, etag: str, media_type: str, headers: dict) -> Response:
+    """200, 206, 304 or 416 for ``body`` depending on If-None-Match / Range / If-Range."""
+    headers = {**headers, "ETag": etag, "Accept-Ranges": "bytes"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, len(body))
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{len(body)}"})
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+            return Response(body[start:end + 1], status_code=206, media_type=media_type, headers=headers)
+    return Response(body, media_type=media_type, headers=headers)
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import math
+import os
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+# Share of a text's letters that must be in one script before the script decides
+MIN_SCRIPT_SHARE = float(os.getenv("LANG_DETECT_MIN_SCRIPT_SHARE", "0.8"))
+# Texts with fewer letter trigrams than this are too short for n-gram scoring
+MIN_NGRAMS = int(os.getenv("LANG_DETECT_MIN_NGRAMS", "8"))
+# Log-likelihood ratio the best language needs over the runner-up (3 ≈ 20:1 odds)
+MIN_LOG_ODDS = float(os.getenv("LANG_DETECT_MIN_LOG_ODDS", "3"))
+
+# (first code point, last code point, script)
+_SCRIPT_RANGES = sorted([
+    (0x0041, 0x005A, "Latin"),
+    (0x0061, 0x007A, "Latin"),
+    (0x00C0, 0x024F, "Latin"),
+    (0x0600, 0x06FF, "Arabic"),
+    (0x0750, 0x077F, "Arabic"),
+    (0x0900, 0x097F, "Devanagari"),
+    (0x0980, 0x09FF, "Bengali"),
+    (0x0A80, 0x0AFF, "Gujarati"),
+    (0x0B80, 0x0BFF, "Tamil"),
+    (0x0C00, 0x0C7F, "Telugu"),
+    (0x0C80, 0x0CFF, "Kannada"),
+    (0x1100, 0x11FF, "Hangul"),
+    (0x3040, 0x309F, "Kana"),
+    (0x30A0, 0x30FF, "Kana"),
+    (0x3130, 0x318F, "Hangul"),
+    (0x4E00, 0x9FFF, "Han"),
+    (0xAC00, 0xD7AF, "Hangul"),
+    (0xFB50, 0xFDFF, "Arabic"),
+    (0xFE70, 0xFEFF, "Arabic"),
+])
+_RANGE_STARTS = [start for start, _, _ in _SCRIPT_RANGES]
+
+# Scripts that identify a persona language on their own
+SCRIPT_LANGUAGES = {
+    "Arabic": "ar",
+    "Bengali": "bn",
+    "Gujarati": "gu",
+    "Tamil": "ta",
+    "Telugu": "te",
+    "Kannada": "kn",
+    "Hangul": "ko",
+    "Kana": "ja",
+    "Han": "zh",
+}
+
+# Frequent words per language sharing a script; their letter trigrams are the
+# n-gram profiles that tell these languages apart.
+_SEED_WORDS = {
+    "Latin": {
+        "en": (
+            "the of and to in is that it for you was with on as have be at by this are not but from or they we "
+            "an which he she what all were when there can said your if will one about would so their has more "
+            "her out up who do them like just my been me how time no some could than then its our into other "
+            "also only over these see after very most because well hello thank please today tomorrow good"
+        ),
+        "fr": (
+            "le la les de des du un une et est en que qui dans pour pas sur au aux il elle ils nous vous je tu "
+            "ne se ce cette son sa ses avec par plus mais ou comme tout fait être avoir été sont était très bien "
+            "aussi leur lui même faire dit peut quand où deux encore sans après avant toujours rien chez moi "
+            "bonjour merci oui non suis c'est aujourd'hui beaucoup voilà ça déjà demain"
+        ),
+        "es": (
+            "el la los las de del un una y es en que por para con no se lo le su sus al como más pero fue ser "
+            "ha han está están muy también cuando donde todo esta este eso hay yo tú nosotros usted ellos hola "
+            "gracias sí bien años mejor entre sobre porque cómo qué día hasta desde mucho señor mañana niño "
+            "nuestro buenos días hoy quiero puedo tiene tengo hacer noche tarde ciudad ahora siempre nunca "
+            "algo nada cada otro otra primero tiempo vez aquí allí entonces después antes"
+        ),
+        "de": (
+            "der die das und ist in zu den von mit sich des auf für nicht ein eine einen dem im auch es an als "
+            "wird werden bei oder aus er sie wir ich du haben hat sind war nach wie noch nur über so aber vor "
+            "zum zur dass kann schon heute sehr gut danke bitte ja nein guten tag morgen möchte können müssen "
+            "größer straße"
+        ),
+        "it": (
+            "il lo la i gli le di del della e è in che per non un una con si sono da al alla come ma più anche "
+            "questo questa essere ha hanno era molto tutto quando dove perché io tu noi voi lui lei ciao grazie "
+            "sì bene oggi domani sempre ancora già cosa fare stato nella nel degli delle buongiorno città"
+            " vorrei posso voglio fatto sera notte tempo volta qui adesso prima dopo niente qualcosa ogni "
+            "altro altra primo questi quelli siamo siete loro"
+        ),
+        "pt": (
+            "o a os as de do da dos das e é em um uma que para com não se por mais como mas foi ser são está "
+            "estão muito também quando onde tudo isso este esta eu você nós eles ela olá obrigado sim bem hoje "
+            "amanhã ainda já coisa fazer pelo pela nos na no ao às então agora bom dia informação coração"
+            " quero posso tenho noite tarde cidade sempre nunca algo nada cada outro outra primeiro tempo "
+            "vez aqui depois antes vocês pão mãe"
+        ),
+    },
+    "Devanagari": {
+        "hi": (
+            "है हैं का की के में और से को यह वह नहीं था थी थे पर भी एक लिए कि तो हो जो कर रहा रही गया ने हम "
+            "आप मैं तुम क्या कैसे बहुत अच्छा नमस्ते धन्यवाद आज कल अब साथ बात लेकिन क्योंकि होता होती करना "
+            "मुझे उसे उनके अपने सकते गए गई दिया लिया जाएगा जाता जाती हूँ अगर फिर सब कुछ यहाँ वहाँ"
+        ),
+        "mr": (
+            "आहे आहेत आणि च्या ची चा चे ला मध्ये नाही हे तो ती ते होते होता होती एक साठी तर जे करून केले "
+            "आम्ही तुम्ही मी तू काय कसे खूप चांगले नमस्कार धन्यवाद आज उद्या आता सोबत पण कारण करणे मला "
+            "त्याला त्यांच्या आपल्या शकता झाले आहोत येथे केली केला दिले गेले जाईल जाते जर मग सर्व काही इथे "
+            "तिथे आपण त्या या"
+        ),
+    },
+}
+
+
+@dataclass(frozen=True)
+class Detection:
+    # None when the text's language could not be determined with confidence
+    language: Optional[str]
+    script: Optional[str]
+    # "script", "ngram" or "undetermined"
+    method: str
+
+
+def _script(char: str) -> Optional[str]:
+    code = ord(char)
+    i = bisect_right(_RANGE_STARTS, code) - 1
+    if i >= 0 and code <= _SCRIPT_RANGES[i][1]:
+        return _SCRIPT_RANGES[i][2]
+    return None
+
+
+def script_counts(text: str) -> Counter:
+    """Letters per script; other letters count as "Other", everything else is ignored."""
+    counts = Counter()
+    for char in text:
+        script = _script(char)
+        if script is not None:
+            counts[script] += 1
+        elif char.isalpha():
+            counts["Other"] += 1
+    return counts
+
+
+def _trigrams(text: str) -> list:
+    """Letter trigrams of each word, padded with spaces at the word boundaries."""
+    grams = []
+    letters = "".join(c if c.isalpha() or _script(c) is not None else " " for c in text.lower())
+    for word in letters.split():
+        padded = f" {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NgramModel:
+    """Naive Bayes over letter trigrams with add-one smoothing."""
+
+    def __init__(self, seeds: dict):
+        counts = {language: Counter(_trigrams(words)) for language, words in seeds.items()}
+        vocabulary = set().union(*counts.values())
+        self.log_probs = {}
+        self.unseen = {}
+        for language, grams in counts.items():
+            total = sum(grams.values()) + len(vocabulary) + 1
+            self.log_probs[language] = {gram: math.log((n + 1) / total) for gram, n in grams.items()}
+            self.unseen[language] = math.log(1 / total)
+
+    def scores(self, grams: list) -> dict:
+        """Log-likelihood of ``grams`` under every language."""
+        return {
+            language: sum(table.get(gram, self.unseen[language]) for gram in grams)
+            for language, table in self.log_probs.items()
+        }
+
+
+_MODELS = {script: NgramModel(seeds) for script, seeds in _SEED_WORDS.items()}
+
+
+def detect(text: str) -> Detection:
+    """Language of ``text`` from its dominant Unicode script, then n-grams where the script is shared.
+
+    Only answers when confident: mixed-script, too-short or ambiguous texts
+    come back with ``language=None``.
+    """
+    counts = script_counts(text)
+    letters = sum(counts.values())
+    if not letters:
+        return Detection(None, None, "undetermined")
+    # Japanese mixes kana with Han; any kana at all means Japanese
+    if counts["Kana"] and counts["Kana"] + counts["Han"] >= MIN_SCRIPT_SHARE * letters:
+        return Detection("ja", "Kana", "script")
+    script, count = counts.most_common(1)[0]
+    if count < MIN_SCRIPT_SHARE * letters:
+        return Detection(None, None, "undetermined")
+    if script in SCRIPT_LANGUAGES:
+        return Detection(SCRIPT_LANGUAGES[script], script, "script")
+
+    model = _MODELS.get(script)
+    grams = _trigrams(text) if model else []
+    if len(grams) < MIN_NGRAMS:
+        return Detection(None, script, "undetermined")
+    ranked = sorted(model.scores(grams).items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), (_, runner_up) = ranked[0], ranked[1]
+    if best_score - runner_up < MIN_LOG_ODDS:
+        return Detection(None, script, "undetermined")
+    return Detection(best, script, "ngram")
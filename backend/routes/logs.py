@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Optional
+
+from .metrics import LOG_RECORDS_DROPPED
+
+# All application loggers live under this name; configure_logging() attaches
+# the queue handler here so third-party loggers are left alone.
+ROOT_LOGGER = "voiceai"
+
+# Fields longer than this are cut in the formatter (user text can be huge)
+MAX_FIELD_CHARS = int(os.getenv("LOG_MAX_FIELD_CHARS", "200"))
+
+
+def truncate(value, limit: int = MAX_FIELD_CHARS):
+    if isinstance(value, str) and len(value) > limit:
+        return f"{value[:limit]}…(+{len(value) - limit} chars)"
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, event, then the event's fields (truncated)."""
+
+    def __init__(self, max_field_chars: int = MAX_FIELD_CHARS):
+        super().__init__()
+        self.max_field_chars = max_field_chars
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        for name, value in getattr(record, "fields", {}).items():
+            payload[name] = truncate(value, self.max_field_chars)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks the caller: a full queue drops the record and counts it."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only resolve what can't cross threads safely (args, exc_info);
+        # JSON formatting and truncation happen on the listener thread.
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+class EventLogger:
+    """Structured logger: ``log.info("event_name", field=value, ...)``.
+
+    Level checks come first so disabled levels cost one comparison and no
+    formatting. DEBUG events are additionally sampled at ``debug_sample_rate``.
+    """
+
+    def __init__(self, logger: logging.Logger, debug_sample_rate: float = 1.0):
+        self.logger = logger
+        self.debug_sample_rate = debug_sample_rate
+
+    def debug(self, event: str, **fields) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG) and (
+            self.debug_sample_rate >= 1.0 or random.random() < self.debug_sample_rate
+        ):
+            self.logger.debug(event, extra={"fields": fields})
+
+    def info(self, event: str, **fields) -> None:
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(event, extra={"fields": fields})
+
+    def warning(self, event: str, **fields) -> None:
+        if self.logger.isEnabledFor(logging.WARNING):
+            self.logger.warning(event, extra={"fields": fields})
+
+    def error(self, event: str, exc_info: bool = False, **fields) -> None:
+        if self.logger.isEnabledFor(logging.ERROR):
+            self.logger.error(event, exc_info=exc_info, extra={"fields": fields})
+
+
+def get_logger(name: str) -> EventLogger:
+    return EventLogger(
+        logging.getLogger(f"{ROOT_LOGGER}.{name}"),
+        debug_sample_rate=float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1")),
+    )
+
+
+def configure_logging(
+    level: str = "INFO",
+    queue_size: int = 10000,
+    max_field_chars: int = MAX_FIELD_CHARS,
+    stream=None,
+) -> logging.handlers.QueueListener:
+    """Route the application loggers through a bounded queue to a JSON stream handler.
+
+    Returns the started listener; call ``stop()`` on shutdown to drain it.
+    """
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter(max_field_chars))
+    records = queue.Queue(maxsize=queue_size)
+
+    root = logging.getLogger(ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DroppingQueueHandler(records))
+    root.setLevel(level.upper())
+    root.propagate = False
+
+    listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def configure_from_env() -> Optional[logging.handlers.QueueListener]:
+    """configure_logging() from LOG_LEVEL / LOG_QUEUE_SIZE; LOG_LEVEL=off disables logging entirely."""
+    level = os.getenv("LOG_LEVEL", "INFO")
+    if level.lower() == "off":
+        logging.getLogger(ROOT_LOGGER).setLevel(logging.CRITICAL + 1)
+        return None
+    return configure_logging(level=level, queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
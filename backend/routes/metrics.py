@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterable, Optional
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+router = APIRouter()
+
+# Latency buckets in seconds, from cache hits (sub-ms) to long streams
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(ABC):
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}", *self._samples()]
+
+    @abstractmethod
+    def _samples(self) -> list:
+        """Exposition lines for this metric's current values."""
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: dict = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            row[index] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        row = self._values.get(self._key(labels))
+        return sum(row[:-1]) if row else 0
+
+    def _samples(self):
+        with self._lock:
+            items = [(key, list(row)) for key, row in self._values.items()]
+        lines = []
+        for key, row in items:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), row[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(row[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list = []
+        # callables returning (name, type, help, [(labels dict, value), ...]) for
+        # components that already keep their own counters (caches, queues)
+        self._collectors: list = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                families = collector()
+            except Exception:
+                continue
+            for name, type_name, documentation, samples in families:
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {type_name}")
+                for labels, value in samples:
+                    names = tuple(labels)
+                    lines.append(f"{name}{_format_labels(names, tuple(labels[n] for n in names))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def stats_collector(prefix: str, documentation: str, get_stats: Callable) -> Callable:
+    """Collector exposing each numeric value of a ``stats()`` dict as ``<prefix>_<name>``."""
+
+    def collect():
+        return [
+            (f"{prefix}_{name}", "gauge", f"{documentation}: {name}.", [({}, value)])
+            for name, value in get_stats().items()
+            if isinstance(value, (int, float)) and not isinstance(value, bool)
+        ]
+
+    return collect
+
+
+REGISTRY = Registry()
+
+TTS_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "tts_stage_seconds",
+    "Time spent in each /api/tts stage (moderation, language_detection, translation, cache_lookup, handshake, first_audio, stream_total).",
+    ["stage"],
+))
+TTS_REQUESTS = REGISTRY.register(Counter(
+    "tts_requests_total", "/api/tts requests by outcome (hit, miss, warning, rejected, error).", ["outcome"]
+))
+TTS_UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "tts_upstream_errors_total", "edge-tts failures by voice ID.", ["voice_id"]
+))
+TTS_ADMISSION_WAIT_SECONDS = REGISTRY.register(Histogram(
+    "tts_admission_wait_seconds", "Time synthesis requests waited for a scheduler slot."
+))
+TTS_LANGUAGE_DETECTIONS = REGISTRY.register(Counter(
+    "tts_language_detections_total",
+    "Local language detection for non-English personas: translation skipped or sent upstream, by target and method.",
+    ["target", "decision", "method"],
+))
+TRANSLATE_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "translate_stage_seconds", "Time spent in /api/translate handlers by route and stage.", ["route", "stage"]
+))
+TRANSLATE_UPSTREAM_ERRORS = REGISTRY.register(Counter(
+    "translate_upstream_errors_total", "Translator failures by target language.", ["target"]
+))
+HISTORY_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "history_stage_seconds", "Time spent in /api/history handlers by operation and stage.", ["operation", "stage"]
+))
+INFLIGHT_REQUESTS = REGISTRY.register(Gauge(
+    "http_inflight_requests", "Requests currently being handled, including streaming bodies.", ["route"]
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_seconds", "End-to-end request time including the streamed body.", ["route", "method", "status"]
+))
+UPSTREAM_ATTEMPTS = REGISTRY.register(Counter(
+    "upstream_attempts_total", "Calls to edge-tts / the translator by outcome (ok, error, timeout, rejected).", ["upstream", "outcome"]
+))
+UPSTREAM_EVENTS = REGISTRY.register(Counter(
+    "upstream_events_total",
+    "Resilience events per upstream: retry, hedged, hedge_won, short_circuited, circuit_opened, stream_aborted.",
+    ["upstream", "event"],
+))
+LOG_RECORDS_DROPPED = REGISTRY.register(Counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full."
+))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: in-flight gauge and end-to-end latency per route.
+
+    Measured around the whole ASGI call, so streaming responses count until
+    their last byte is sent. Only known route prefixes get their own label
+    to keep cardinality bounded.
+    """
+
+    def __init__(self, app, routes: Iterable[str] = ()):
+        self.app = app
+        # longest prefix first so /api/tts/batch wins over /api/tts
+        self.routes = sorted(routes, key=len, reverse=True)
+
+    def _route(self, path: str) -> Optional[str]:
+        for route in self.routes:
+            if path == route or path.startswith(route + "/"):
+                return route
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        route = self._route(scope.get("path", ""))
+        if route is None:
+            return await self.app(scope, receive, send)
+
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        INFLIGHT_REQUESTS.inc(route=route)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            INFLIGHT_REQUESTS.dec(route=route)
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, route=route, method=scope.get("method", ""), status=status["code"]
+            )
+
+
+@router.get("/metrics")
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
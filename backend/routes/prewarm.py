@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from typing import List, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ValidationError
+
+from . import tts
+from .scheduler import AdmissionRejected
+from .tts import TTSRejected, TTSRequest
+
+router = APIRouter()
+
+# Fields that identify one clip; everything else in a manifest entry is ignored
+ENTRY_FIELDS = ("voice", "emotion", "text", "speed", "pitch", "format")
+
+
+def normalize_entries(raw_entries) -> tuple:
+    """Validated, de-duplicated TTSRequests from manifest/history dicts, plus the number rejected.
+
+    ``persona`` is accepted as an alias of ``voice``.
+    """
+    requests, seen, invalid = [], set(), 0
+    for raw in raw_entries:
+        try:
+            entry = {k: raw[k] for k in ENTRY_FIELDS if raw.get(k) not in (None, "")}
+            if "voice" not in entry and raw.get("persona"):
+                entry["voice"] = raw["persona"]
+            request = TTSRequest(**entry)
+        except (TypeError, AttributeError, ValidationError):
+            invalid += 1
+            continue
+        identity = tuple(request.model_dump().items())
+        if identity not in seen:
+            seen.add(identity)
+            requests.append(request)
+    return requests, invalid
+
+
+def load_manifest(path: str) -> list:
+    """Entries from a JSON manifest: a list of {persona|voice, emotion, text, ...} or {"items": [...]}."""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("items", []) if isinstance(data, dict) else data
+
+
+def top_history_entries(collection, limit: int, window: int = 5000) -> list:
+    """The ``limit`` most frequent (voice, emotion, text, pitch, speed) among the newest ``window`` history docs."""
+    projection = {name: 1 for name in ENTRY_FIELDS}
+    docs = collection.find({}, projection).sort([("timestamp", -1), ("_id", -1)]).limit(window)
+    counts = Counter(
+        tuple((name, doc.get(name)) for name in ENTRY_FIELDS)
+        for doc in docs
+        if doc.get("text")
+    )
+    return [dict(entry) for entry, _ in counts.most_common(limit)]
+
+
+def startup_entries(collection) -> list:
+    """Entries to warm after startup, from PREWARM_MANIFEST and/or PREWARM_TOP_HISTORY."""
+    entries = []
+    manifest = os.getenv("PREWARM_MANIFEST")
+    if manifest:
+        entries.extend(load_manifest(manifest))
+    top = int(os.getenv("PREWARM_TOP_HISTORY", "0"))
+    if top > 0 and collection is not None:
+        entries.extend(top_history_entries(collection, top, int(os.getenv("PREWARM_HISTORY_WINDOW", "5000"))))
+    return entries
+
+
+class Prewarmer:
+    """Synthesizes a list of requests into the audio cache at low priority.
+
+    Work only starts while the synthesis scheduler has no queue and is below
+    ``busy_ratio`` of its global cap, so live traffic always goes first.
+    Entries that are already cached are counted and skipped; a busy
+    scheduler (429) is waited out rather than counted as a failure.
+    """
+
+    def __init__(self, concurrency: int = 1, busy_ratio: float = 0.5, idle_poll: float = 0.5, start_delay: float = 5.0):
+        self.concurrency = concurrency
+        self.busy_ratio = busy_ratio
+        self.idle_poll = idle_poll
+        self.start_delay = start_delay
+        self._task: Optional[asyncio.Task] = None
+        self._reset("idle", 0)
+
+    @classmethod
+    def from_env(cls) -> "Prewarmer":
+        return cls(
+            concurrency=int(os.getenv("PREWARM_CONCURRENCY", "1")),
+            busy_ratio=float(os.getenv("PREWARM_BUSY_RATIO", "0.5")),
+            start_delay=float(os.getenv("PREWARM_START_DELAY_SECONDS", "5")),
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self, requests: list, delay: float = 0.0, invalid: int = 0) -> bool:
+        """Begin warming ``requests`` in the background; False if a run is already in progress."""
+        if self.running:
+            return False
+        self._reset("pending", len(requests))
+        self._counters["invalid"] = invalid
+        self._task = asyncio.create_task(self._run(requests, delay))
+        return True
+
+    async def stop(self) -> None:
+        if self.running:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self.state = "cancelled"
+
+    def status(self) -> dict:
+        finished = sum(self._counters[name] for name in ("warmed", "cached", "skipped", "failed"))
+        return {
+            "state": self.state,
+            "total": self.total,
+            "finished": finished,
+            "progress": round(finished / self.total, 3) if self.total else 1.0,
+            **self._counters,
+            "last_error": self.last_error,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    def _reset(self, state: str, total: int) -> None:
+        self.state = state
+        self.total = total
+        self.last_error = None
+        self.started_at = None
+        self.finished_at = None
+        self._counters = {"warmed": 0, "cached": 0, "skipped": 0, "failed": 0, "invalid": 0}
+
+    def _scheduler_busy(self) -> bool:
+        stats = tts.scheduler.stats()
+        return stats["waiting"] > 0 or stats["active"] >= stats["max_active"] * self.busy_ratio
+
+    async def _run(self, requests: list, delay: float) -> None:
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self.state = "running"
+        self.started_at = time.time()
+        pending = iter(requests)
+
+        async def worker():
+            for request in pending:
+                await self._warm(request)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, self.concurrency))))
+        self.state = "done"
+        self.finished_at = time.time()
+
+    async def _warm(self, request: TTSRequest) -> None:
+        while True:
+            while self._scheduler_busy():
+                await asyncio.sleep(self.idle_poll)
+            try:
+                plan = await tts.plan_synthesis(request)
+                cached, _ = await tts.fetch_cached(plan)
+                if cached is not None:
+                    self._counters["cached"] += 1
+                else:
+                    await tts.synthesize(plan)
+                    self._counters["warmed"] += 1
+                return
+            except TTSRejected:
+                self._counters["skipped"] += 1
+                return
+            except AdmissionRejected as e:
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                self._counters["failed"] += 1
+                self.last_error = str(e) or type(e).__name__
+                return
+
+
+class PrewarmRequest(BaseModel):
+    items: List[dict] = []
+    # Also warm the N most frequent recent history entries
+    top_history: int = 0
+
+
+def _get_prewarmer(request: Request) -> Prewarmer:
+    prewarmer = getattr(request.app.state, "prewarmer", None)
+    if prewarmer is None:
+        raise HTTPException(status_code=503, detail="Pre-warming is not available.")
+    return prewarmer
+
+
+@router.get("/tts/prewarm")
+def prewarm_status(request: Request):
+    return _get_prewarmer(request).status()
+
+
+@router.post("/tts/prewarm")
+async def start_prewarm(req: PrewarmRequest, request: Request):
+    """Warm the cache with the given entries and/or the top history entries, in the background."""
+    prewarmer = _get_prewarmer(request)
+    entries = list(req.items)
+    if req.top_history > 0:
+        collection = getattr(request.app.state, "voice_history_collection", None)
+        if collection is None:
+            raise HTTPException(status_code=503, detail="Database is not available.")
+        entries.extend(await run_in_threadpool(top_history_entries, collection, req.top_history))
+    requests, invalid = normalize_entries(entries)
+    if not prewarmer.start(requests, invalid=invalid):
+        return JSONResponse({"error": "A pre-warm run is already in progress.", **prewarmer.status()}, status_code=409)
+    return JSONResponse(prewarmer.status(), status_code=202)
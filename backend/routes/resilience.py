@@ -0,0 +1,397 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+from .metrics import UPSTREAM_ATTEMPTS, UPSTREAM_EVENTS
+
+
+class CircuitOpen(Exception):
+    """The upstream (or this voice on it) is failing; the call was not attempted."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} is temporarily unavailable.")
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class UpstreamTimeout(TimeoutError):
+    pass
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures and fails fast while open.
+
+    Once ``reset_timeout`` has passed the circuit is half-open: calls are let
+    through again, the next failure re-opens it straight away and the next
+    success closes it. Thread-safe.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        return "open" if now - self._opened_at < self.reset_timeout else "half_open"
+
+    def before_call(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self._state(now) == "open":
+                raise CircuitOpen(self.name, self._opened_at + self.reset_timeout - now)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> bool:
+        """Count a failure; True when this one opened (or re-opened) the circuit."""
+        now = time.monotonic()
+        with self._lock:
+            self._failures += 1
+            if self._state(now) == "half_open" or (
+                self._opened_at is None and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = now
+                return True
+            return False
+
+
+class LatencyWindow:
+    """The last ``size`` successful call latencies, for hedging at a quantile."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """None until ``min_samples`` latencies have been seen."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Upstream:
+    """Call policy for one upstream service.
+
+    - ``deadline``: each attempt must produce its result (for streams: the
+      first item) within this many seconds, else UpstreamTimeout
+    - ``attempts``/``backoff``: failed attempts are retried after a full-jitter
+      exponential delay (``backoff * 2**n``, capped at ``max_backoff``). Only
+      idempotent calls go through here; streams are never retried once an
+      item has been handed to the caller
+    - ``hedge``: once ``min_samples`` latencies are known, an attempt still
+      running at the ``hedge_quantile`` latency gets one duplicate; the first
+      success wins and the other is cancelled (or discarded)
+    - circuit breakers for the whole upstream and per ``key`` (e.g. voice ID);
+      an open one raises CircuitOpen without calling the upstream
+    - ``is_failure``: errors it returns False for (caused by the request
+      itself, e.g. an unsupported language) are raised at once: never
+      retried and never counted against the breakers
+
+    ``call``/``stream`` are for coroutines and async iterators on the event
+    loop, ``call_blocking`` for blocking callables on worker threads.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        deadline: float = 10.0,
+        idle_timeout: Optional[float] = None,
+        attempts: int = 2,
+        backoff: float = 0.2,
+        max_backoff: float = 2.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        max_workers: int = 8,
+        is_failure: Optional[Callable[[BaseException], bool]] = None,
+    ):
+        self.name = name
+        self.deadline = deadline
+        self.idle_timeout = idle_timeout
+        self.attempts = max(1, attempts)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_workers = max_workers
+        self.is_failure = is_failure or (lambda error: True)
+        self.latency = LatencyWindow()
+
+        self._lock = threading.Lock()
+        self._breakers: dict = {None: CircuitBreaker(name, failure_threshold, reset_timeout)}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._rng = random.Random()
+
+    @classmethod
+    def from_env(cls, name: str, prefix: str, **defaults) -> "Upstream":
+        """Settings from ``{prefix}_DEADLINE_SECONDS``, ``{prefix}_ATTEMPTS``, ... falling back to ``defaults``.
+
+        Other keyword arguments (e.g. ``is_failure``) are passed through.
+        """
+        def setting(suffix, key, parse):
+            value = os.getenv(f"{prefix}_{suffix}")
+            return parse(value) if value not in (None, "") else defaults.get(key)
+
+        options = {
+            "deadline": setting("DEADLINE_SECONDS", "deadline", float),
+            "idle_timeout": setting("IDLE_TIMEOUT_SECONDS", "idle_timeout", float),
+            "attempts": setting("ATTEMPTS", "attempts", int),
+            "backoff": setting("BACKOFF_SECONDS", "backoff", float),
+            "max_backoff": setting("MAX_BACKOFF_SECONDS", "max_backoff", float),
+            "hedge": setting("HEDGE", "hedge", lambda v: v.lower() in ("1", "true", "yes", "on")),
+            "hedge_quantile": setting("HEDGE_QUANTILE", "hedge_quantile", float),
+            "failure_threshold": setting("BREAKER_FAILURES", "failure_threshold", int),
+            "reset_timeout": setting("BREAKER_RESET_SECONDS", "reset_timeout", float),
+            "max_workers": setting("MAX_WORKERS", "max_workers", int),
+        }
+        extra = {k: v for k, v in defaults.items() if k not in options}
+        return cls(name, **extra, **{k: v for k, v in options.items() if v is not None})
+
+    def breaker(self, key: Optional[str] = None) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(f"{self.name} ({key})", self.failure_threshold, self.reset_timeout)
+                self._breakers[key] = breaker
+            return breaker
+
+    def open_circuits(self) -> list:
+        """Keys of the circuits that are open right now ("*" for the whole upstream)."""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return sorted(key or "*" for key, breaker in breakers.items() if breaker.state == "open")
+
+    def stats(self) -> dict:
+        return {
+            "open_circuits": len(self.open_circuits()),
+            "latency_p95_seconds": self.latency.quantile(0.95) or 0.0,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # ---------- async API ----------
+
+    async def call(self, operation, key: Optional[str] = None, discard=None):
+        """Await ``operation()`` (a coroutine function) under the policy.
+
+        ``discard`` is awaited with any successful result that lost a hedge
+        race, so it can release what the result holds.
+        """
+        for attempt in range(self.attempts):
+            breakers = self._admit(key)
+            started = time.monotonic()
+            try:
+                result = await self._attempt(operation, discard)
+            except Exception as e:
+                delay = self._failed(breakers, e, attempt)
+                await asyncio.sleep(delay)
+                continue
+            self._succeeded(breakers, time.monotonic() - started)
+            return result
+
+    async def stream(self, open_stream, key: Optional[str] = None):
+        """Relay the async iterator returned by ``open_stream()`` under the policy.
+
+        Deadline, retries and hedging apply up to the first item; after that
+        each item must arrive within ``idle_timeout`` seconds and failures are
+        passed on (and counted against the circuit breakers).
+        """
+        async def first():
+            stream = open_stream()
+            try:
+                return await stream.__anext__(), stream
+            except StopAsyncIteration:
+                return _END, stream
+            except BaseException:
+                await stream.aclose()
+                raise
+
+        async def close(result):
+            await result[1].aclose()
+
+        item, stream = await self.call(first, key, discard=close)
+        try:
+            while item is not _END:
+                yield item
+                try:
+                    async with asyncio.timeout(self.idle_timeout):
+                        item = await stream.__anext__()
+                except StopAsyncIteration:
+                    break
+                except TimeoutError:
+                    self._stream_failed(key)
+                    raise UpstreamTimeout(f"{self.name} stalled for {self.idle_timeout:g}s") from None
+                except Exception as e:
+                    if self.is_failure(e):
+                        self._stream_failed(key)
+                    raise
+        finally:
+            await stream.aclose()
+
+    async def _attempt(self, operation, discard):
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline
+        tasks = [asyncio.ensure_future(operation())]
+        winner = None
+        try:
+            hedge_after = self.latency.quantile(self.hedge_quantile) if self.hedge else None
+            if hedge_after is not None and hedge_after < self.deadline:
+                done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+                if not done:
+                    UPSTREAM_EVENTS.inc(upstream=self.name, event="hedged")
+                    tasks.append(asyncio.ensure_future(operation()))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, deadline_at - loop.time()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise UpstreamTimeout(f"{self.name} did not respond within {self.deadline:g}s")
+                for task in sorted(done, key=tasks.index):
+                    if not task.cancelled() and task.exception() is None:
+                        winner = task
+                        break
+                if winner is not None:
+                    if winner is not tasks[0]:
+                        UPSTREAM_EVENTS.inc(upstream=self.name, event="hedge_won")
+                    return winner.result()
+            # Every attempt failed: report the first one's error
+            raise tasks[0].exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if discard is not None:
+                for task in tasks:
+                    if task is not winner and not task.cancelled() and task.exception() is None:
+                        await discard(task.result())
+
+    # ---------- blocking API (worker threads) ----------
+
+    def call_blocking(self, fn, key: Optional[str] = None):
+        """Run ``fn()`` under the policy from a worker thread.
+
+        Attempts run on this upstream's own thread pool; one that misses its
+        deadline is abandoned (its thread finishes in the background).
+        """
+        for attempt in range(self.attempts):
+            breakers = self._admit(key)
+            started = time.monotonic()
+            try:
+                result = self._attempt_blocking(fn)
+            except Exception as e:
+                time.sleep(self._failed(breakers, e, attempt))
+                continue
+            self._succeeded(breakers, time.monotonic() - started)
+            return result
+
+    def _attempt_blocking(self, fn):
+        executor = self._get_executor()
+        deadline_at = time.monotonic() + self.deadline
+        futures = [executor.submit(fn)]
+        try:
+            hedge_after = self.latency.quantile(self.hedge_quantile) if self.hedge else None
+            if hedge_after is not None and hedge_after < self.deadline:
+                done, _ = wait(futures, timeout=hedge_after)
+                if not done:
+                    UPSTREAM_EVENTS.inc(upstream=self.name, event="hedged")
+                    futures.append(executor.submit(fn))
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=max(0.0, deadline_at - time.monotonic()), return_when=FIRST_COMPLETED)
+                if not done:
+                    raise UpstreamTimeout(f"{self.name} did not respond within {self.deadline:g}s")
+                for future in sorted(done, key=futures.index):
+                    if future.exception() is None:
+                        if future is not futures[0]:
+                            UPSTREAM_EVENTS.inc(upstream=self.name, event="hedge_won")
+                        return future.result()
+            raise futures[0].exception()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+            return self._executor
+
+    # ---------- shared bookkeeping ----------
+
+    def _breakers_for(self, key: Optional[str]) -> list:
+        return [self.breaker(None)] + ([self.breaker(key)] if key is not None else [])
+
+    def _admit(self, key: Optional[str]) -> list:
+        breakers = self._breakers_for(key)
+        try:
+            for breaker in breakers:
+                breaker.before_call()
+        except CircuitOpen:
+            UPSTREAM_EVENTS.inc(upstream=self.name, event="short_circuited")
+            raise
+        return breakers
+
+    def _succeeded(self, breakers: list, seconds: float) -> None:
+        UPSTREAM_ATTEMPTS.inc(upstream=self.name, outcome="ok")
+        self.latency.add(seconds)
+        for breaker in breakers:
+            breaker.record_success()
+
+    def _failed(self, breakers: list, error: Exception, attempt: int) -> float:
+        """Record a failed attempt; re-raises it when out of attempts, else returns the backoff delay."""
+        if not isinstance(error, (CircuitOpen, UpstreamTimeout)) and not self.is_failure(error):
+            UPSTREAM_ATTEMPTS.inc(upstream=self.name, outcome="rejected")
+            raise error
+        UPSTREAM_ATTEMPTS.inc(upstream=self.name, outcome="timeout" if isinstance(error, UpstreamTimeout) else "error")
+        self._record_failure(breakers)
+        if attempt + 1 >= self.attempts or isinstance(error, CircuitOpen):
+            raise error
+        UPSTREAM_EVENTS.inc(upstream=self.name, event="retry")
+        return self._rng.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _stream_failed(self, key: Optional[str]) -> None:
+        UPSTREAM_EVENTS.inc(upstream=self.name, event="stream_aborted")
+        self._record_failure(self._breakers_for(key))
+
+    def _record_failure(self, breakers: list) -> None:
+        for breaker in breakers:
+            if breaker.record_failure():
+                UPSTREAM_EVENTS.inc(upstream=self.name, event="circuit_opened")
+
+
+# Marks an upstream stream that ended before its first item
+_END = object()
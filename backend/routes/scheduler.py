@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from .metrics import TTS_ADMISSION_WAIT_SECONDS
+
+
+class AdmissionRejected(Exception):
+    """No synthesis slot could be granted; the client should retry after ``retry_after`` seconds."""
+
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """``weight`` granted synthesis slots for one request. ``release`` is idempotent."""
+
+    __slots__ = ("_scheduler", "voice_id", "weight", "granted_at", "_released")
+
+    def __init__(self, scheduler: "SynthesisScheduler", voice_id: str, weight: int = 1):
+        self._scheduler = scheduler
+        self.voice_id = voice_id
+        self.weight = weight
+        self.granted_at = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._scheduler._release(self)
+
+
+class SynthesisScheduler:
+    """Admission control in front of upstream synthesis sessions.
+
+    At most ``max_active`` sessions run at once, and at most
+    ``max_per_voice`` of them for any one voice ID. Requests that can't
+    start immediately wait in a FIFO queue of at most ``max_waiting``
+    entries; a waiter is skipped (not blocked behind) when only its own
+    voice is at capacity. When the queue is full, or a waiter's
+    ``wait_timeout`` deadline passes, ``acquire`` raises AdmissionRejected
+    with a Retry-After estimate based on how long slots are typically held.
+
+    A request that opens several upstream sessions at once (a chunked clip)
+    acquires with ``weight`` equal to that number and is admitted only when
+    all of them fit; the weight is capped at the limits so it can always be
+    granted eventually.
+
+    Meant to be used from a single event loop.
+    """
+
+    def __init__(self, max_active: int = 32, max_per_voice: int = 8, max_waiting: int = 128, wait_timeout: float = 10.0):
+        self.max_active = max_active
+        self.max_per_voice = max_per_voice
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+
+        self._active = 0
+        self._per_voice: dict = {}
+        self._waiters: deque = deque()
+        self._hold_avg: Optional[float] = None
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._counters = {"admitted": 0, "queued": 0, "rejected_full": 0, "rejected_timeout": 0}
+
+    @classmethod
+    def from_env(cls) -> "SynthesisScheduler":
+        return cls(
+            max_active=int(os.getenv("TTS_MAX_ACTIVE", "32")),
+            max_per_voice=int(os.getenv("TTS_MAX_ACTIVE_PER_VOICE", "8")),
+            max_waiting=int(os.getenv("TTS_MAX_WAITING", "128")),
+            wait_timeout=float(os.getenv("TTS_ADMISSION_TIMEOUT_SECONDS", "10")),
+        )
+
+    async def acquire(self, voice_id: str, weight: int = 1) -> Ticket:
+        started = time.monotonic()
+        weight = max(1, min(weight, self.max_active, self.max_per_voice))
+        if self._has_room(voice_id, weight) and not self._blocked_waiters():
+            return self._grant(voice_id, started, weight)
+        if len(self._waiters) >= self.max_waiting:
+            self._counters["rejected_full"] += 1
+            raise AdmissionRejected("Synthesis queue is full.", self.retry_after())
+
+        self._counters["queued"] += 1
+        waiter = (voice_id, asyncio.get_running_loop().create_future(), started, weight)
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait([waiter[1]], timeout=self.wait_timeout)
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+        if waiter[1].done():
+            return waiter[1].result()
+        self._abandon(waiter)
+        self._counters["rejected_timeout"] += 1
+        raise AdmissionRejected(f"No synthesis slot within {self.wait_timeout:g}s.", self.retry_after())
+
+    @asynccontextmanager
+    async def slot(self, voice_id: str, weight: int = 1):
+        ticket = await self.acquire(voice_id, weight)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def retry_after(self) -> int:
+        """Seconds until a new request would likely get a slot (1..60)."""
+        if not self._hold_avg:
+            return 1
+        estimate = self._hold_avg * (len(self._waiters) + 1) / max(1, self.max_active)
+        return min(60, max(1, math.ceil(estimate)))
+
+    def stats(self) -> dict:
+        admitted = self._counters["admitted"]
+        return {
+            **self._counters,
+            "active": self._active,
+            "waiting": len(self._waiters),
+            "max_active": self.max_active,
+            "max_per_voice": self.max_per_voice,
+            "max_waiting": self.max_waiting,
+            "wait_avg_seconds": self._wait_total / admitted if admitted else 0.0,
+            "wait_max_seconds": self._wait_max,
+            "hold_avg_seconds": self._hold_avg or 0.0,
+            "active_per_voice": dict(self._per_voice),
+        }
+
+    def _has_room(self, voice_id: str, weight: int = 1) -> bool:
+        return (
+            self._active + weight <= self.max_active
+            and self._per_voice.get(voice_id, 0) + weight <= self.max_per_voice
+        )
+
+    def _blocked_waiters(self) -> bool:
+        """True when a queued request is only waiting for global capacity.
+
+        Newcomers then queue behind it instead of taking the slots it needs:
+        otherwise a heavy (chunked) request could be overtaken forever by
+        light ones. Waiters held back only by their own voice's cap don't
+        block anyone.
+        """
+        return any(
+            not future.done() and self._per_voice.get(voice_id, 0) + weight <= self.max_per_voice
+            for voice_id, future, _queued_at, weight in self._waiters
+        )
+
+    def _grant(self, voice_id: str, started: float, weight: int = 1) -> Ticket:
+        self._active += weight
+        self._per_voice[voice_id] = self._per_voice.get(voice_id, 0) + weight
+        self._counters["admitted"] += 1
+        waited = time.monotonic() - started
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        TTS_ADMISSION_WAIT_SECONDS.observe(waited)
+        return Ticket(self, voice_id, weight)
+
+    def _abandon(self, waiter) -> None:
+        _voice_id, future, _queued_at, _weight = waiter
+        if future.done() and not future.cancelled():
+            # Granted while we were giving up: hand the slot straight back
+            future.result().release()
+            return
+        future.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self, ticket: Ticket) -> None:
+        held = time.monotonic() - ticket.granted_at
+        self._hold_avg = held if self._hold_avg is None else 0.8 * self._hold_avg + 0.2 * held
+        self._active -= ticket.weight
+        remaining = self._per_voice.get(ticket.voice_id, ticket.weight) - ticket.weight
+        if remaining:
+            self._per_voice[ticket.voice_id] = remaining
+        else:
+            self._per_voice.pop(ticket.voice_id, None)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        # Grant waiters in arrival order, skipping those whose voice is still at its cap
+        still_waiting = deque()
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            voice_id, future, queued_at, weight = waiter
+            if future.done():
+                continue
+            if self._active + weight > self.max_active:
+                still_waiting.append(waiter)
+                still_waiting.extend(self._waiters)
+                self._waiters.clear()
+                break
+            if self._per_voice.get(voice_id, 0) + weight <= self.max_per_voice:
+                future.set_result(self._grant(voice_id, queued_at, weight))
+            else:
+                still_waiting.append(waiter)
+        self._waiters = still_waiting
@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import IO, Optional
+
+try:
+    import fcntl
+except ImportError:  # no advisory file locks (Windows): every process acts alone
+    fcntl = None
+
+INDEX_FILE = "index.sqlite3"
+# 2: value files with a legacy suffix are renamed to the current one
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    value BLOB,
+    expires_at REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS totals (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO totals VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS entries_added AFTER INSERT ON entries BEGIN
+    UPDATE totals SET entries = entries + 1, bytes = bytes + NEW.size;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_removed AFTER DELETE ON entries BEGIN
+    UPDATE totals SET entries = entries - 1, bytes = bytes - OLD.size;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_resized AFTER UPDATE OF size ON entries BEGIN
+    UPDATE totals SET bytes = bytes + NEW.size - OLD.size;
+END;
+"""
+
+_UPSERT = """
+INSERT INTO entries (key, size, value, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    size = excluded.size, value = excluded.value, expires_at = excluded.expires_at, accessed_at = excluded.accessed_at
+"""
+
+
+class SharedDiskCache:
+    """Byte-bounded LRU cache on local disk, shared by every worker process on the host.
+
+    A SQLite index (WAL mode) in ``root`` records each entry's size, expiry
+    and last access, and keeps running totals, so all processes see the same
+    entries and one budget. Values up to ``inline_bytes`` are stored in the
+    index itself; larger ones are files under ``root/<key[:2]>/<key><suffix>``,
+    written to a temp file and renamed into place so readers never see a
+    partial value. Writes and evictions run in ``BEGIN IMMEDIATE``
+    transactions; a file that disappears under a reader (evicted by another
+    process) is a miss.
+
+    Files named with one of ``legacy_suffixes`` (written by an older
+    version) are renamed to ``suffix`` and indexed when the index is created
+    or upgraded.
+
+    Last-access times are only rewritten every ``touch_interval`` seconds to
+    keep hits read-only. Disk or SQLite errors are counted and treated as
+    misses (or dropped writes). Safe to use from worker threads.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int = 1024 * 1024 * 1024,
+        inline_bytes: int = 0,
+        suffix: str = "",
+        touch_interval: float = 60.0,
+        busy_timeout: float = 5.0,
+        legacy_suffixes: tuple = (),
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.inline_bytes = inline_bytes
+        self.suffix = suffix
+        self.touch_interval = touch_interval
+        self.busy_timeout = busy_timeout
+        self.legacy_suffixes = tuple(legacy for legacy in legacy_suffixes if legacy != suffix)
+
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._pid: Optional[int] = None
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + self.suffix)
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._connect()
+                row = db.execute(
+                    "SELECT value, expires_at, accessed_at FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[1] is not None and row[1] <= now:
+                    self._remove(db, key)
+                    row = None
+                if row is None:
+                    self._counters["misses"] += 1
+                    return None
+                value, _expires_at, accessed_at = row
+                if now - accessed_at >= self.touch_interval:
+                    db.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        except (sqlite3.Error, OSError):
+            self._count("errors")
+            self._count("misses")
+            return None
+
+        if value is None:
+            try:
+                with open(self.path(key), "rb") as f:
+                    value = f.read()
+            except OSError:
+                # Evicted by another process between the lookup and the read
+                self._forget_file(key)
+                self._count("misses")
+                return None
+        self._count("hits")
+        return bytes(value)
+
+    def put(self, key: str, data: bytes, ttl: Optional[float] = None) -> bool:
+        """Store ``data`` under ``key``; False when it is over budget or the disk write failed."""
+        size = len(data)
+        if size > self.max_bytes:
+            return False
+        inline = size <= self.inline_bytes
+        if not inline and not self._write_file(key, data):
+            return False
+
+        now = time.time()
+        evicted = []
+        try:
+            with self._lock:
+                db = self._connect()
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    db.execute(_UPSERT, (key, size, data if inline else None, now + ttl if ttl else None, now))
+                    evicted = self._evict(db, keep=key, now=now)
+                    db.execute("COMMIT")
+                except BaseException:
+                    db.execute("ROLLBACK")
+                    raise
+                self._counters["stores"] += 1
+                self._counters["evictions"] += len(evicted)
+        except (sqlite3.Error, OSError):
+            self._count("errors")
+            if not inline:
+                self._unlink(key)
+            return False
+
+        for old_key in evicted:
+            self._unlink(old_key)
+        return True
+
+    def stats(self) -> dict:
+        """Host-wide ``entries``/``bytes``; the hit and eviction counters are this process's."""
+        try:
+            with self._lock:
+                entries, size = self._connect().execute("SELECT entries, bytes FROM totals").fetchone()
+        except (sqlite3.Error, OSError):
+            self._count("errors")
+            entries, size = None, None
+        with self._lock:
+            return {**self._counters, "entries": entries, "bytes": size, "budget_bytes": self.max_bytes}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # ---------- internals ----------
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _connect(self) -> sqlite3.Connection:
+        # Called with self._lock held. Connections are per process (never
+        # carried across a fork) and opened on first use.
+        if self._db is not None and self._pid == os.getpid():
+            return self._db
+        os.makedirs(self.root, exist_ok=True)
+        db = sqlite3.connect(
+            os.path.join(self.root, INDEX_FILE), timeout=self.busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        db.execute("PRAGMA journal_mode = WAL")
+        db.execute("PRAGMA synchronous = NORMAL")
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if db.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                for statement in _split_statements(_SCHEMA):
+                    db.execute(statement)
+                self._adopt_files(db)
+                db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            db.close()
+            raise
+        self._db, self._pid = db, os.getpid()
+        return db
+
+    def _adopt_files(self, db: sqlite3.Connection) -> None:
+        """Index value files already in ``root`` (a cache written before the index existed, or by an older version)."""
+        for directory, _dirs, files in os.walk(self.root):
+            for name in files:
+                if directory == self.root:
+                    continue
+                legacy = next((legacy for legacy in self.legacy_suffixes if name.endswith(legacy)), None)
+                if legacy:
+                    renamed = name[: len(name) - len(legacy)] + self.suffix
+                    try:
+                        os.replace(os.path.join(directory, name), os.path.join(directory, renamed))
+                    except OSError:
+                        continue
+                    name = renamed
+                elif self.suffix and not name.endswith(self.suffix):
+                    continue
+                try:
+                    st = os.stat(os.path.join(directory, name))
+                except OSError:
+                    continue
+                key = name[: len(name) - len(self.suffix)] if self.suffix else name
+                if key.endswith(".tmp"):
+                    continue
+                db.execute(
+                    "INSERT OR IGNORE INTO entries (key, size, accessed_at) VALUES (?, ?, ?)", (key, st.st_size, st.st_mtime)
+                )
+        self._evict(db, keep=None, now=time.time())
+
+    def _evict(self, db: sqlite3.Connection, keep: Optional[str], now: float) -> list:
+        """Drop expired, then least recently used, entries until the budget holds. Returns keys with files to unlink."""
+        evicted = []
+        total = db.execute("SELECT bytes FROM totals").fetchone()[0]
+        if total <= self.max_bytes:
+            return evicted
+        queries = [
+            ("SELECT key, size, value IS NULL FROM entries WHERE expires_at <= ? LIMIT 256", (now,)),
+            ("SELECT key, size, value IS NULL FROM entries ORDER BY accessed_at LIMIT 256", ()),
+        ]
+        for query, params in queries:
+            while total > self.max_bytes:
+                rows = [row for row in db.execute(query, params).fetchall() if row[0] != keep]
+                if not rows:
+                    break
+                for key, size, on_disk in rows:
+                    db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    total -= size
+                    if on_disk:
+                        evicted.append(key)
+                    if total <= self.max_bytes:
+                        break
+        return evicted
+
+    def _remove(self, db: sqlite3.Connection, key: str) -> None:
+        # Called with self._lock held
+        on_disk = db.execute("DELETE FROM entries WHERE key = ? RETURNING value IS NULL", (key,)).fetchone()
+        if on_disk and on_disk[0]:
+            self._unlink(key)
+
+    def _forget_file(self, key: str) -> None:
+        try:
+            with self._lock:
+                self._connect().execute("DELETE FROM entries WHERE key = ? AND value IS NULL", (key,))
+        except (sqlite3.Error, OSError):
+            self._count("errors")
+
+    def _write_file(self, key: str, data: bytes) -> bool:
+        path = self.path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            return True
+        except OSError:
+            self._count("errors")
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            return False
+
+    def _unlink(self, key: str) -> None:
+        try:
+            os.unlink(self.path(key))
+        except OSError:
+            pass
+
+
+def _split_statements(script: str) -> list:
+    """Statements of ``script``, keeping trigger bodies (which contain ``;``) whole."""
+    statements, current = [], []
+    for line in script.strip().splitlines():
+        current.append(line)
+        text = "\n".join(current).strip()
+        if sqlite3.complete_statement(text):
+            statements.append(text)
+            current = []
+    return statements
+
+
+def host_lock(path: str) -> Optional[IO]:
+    """Try to take an exclusive advisory lock on ``path`` without waiting.
+
+    Returns the open lock file (the lock is held until it is closed, or the
+    process exits), or None when another process holds it or the file can't
+    be opened. Used to run once-per-host background work in just one of
+    several worker processes.
+    """
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handle = open(path, "a")
+    except OSError:
+        return None
+    if fcntl is None:
+        return handle
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        handle.close()
+        return None
+    return handle
@@ -1,8 +1,55 @@
+import asyncio
+import os
+import re
+from typing import List, Optional
+
+from deep_translator.exceptions import NotValidLength, NotValidPayload
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from deep_translator import GoogleTranslator
+
+from . import translator
+from .logs import get_logger
+from .metrics import REGISTRY, TRANSLATE_STAGE_SECONDS, TRANSLATE_UPSTREAM_ERRORS, stats_collector
+from .resilience import CircuitOpen, UpstreamTimeout
+from .translator import CLIENT_ERRORS, TranslationTimeout, translate_async, translate_batch
 
 router = APIRouter()
+log = get_logger("translate")
+
+BATCH_MAX_TEXTS = int(os.getenv("TRANSLATE_BATCH_MAX_TEXTS", "1000"))
+# Every target is its own set of upstream calls over all the texts
+BATCH_MAX_TARGETS = int(os.getenv("TRANSLATE_BATCH_MAX_TARGETS", "10"))
+_LANG_LABEL = re.compile(r"^[A-Za-z]{2,3}(-[A-Za-z0-9]{2,8})?$")
+
+REGISTRY.add_collector(stats_collector("translate_cache", "Translation cache statistic", lambda: translator.translator.stats()))
+REGISTRY.add_collector(stats_collector(
+    "translate_upstream", "Translator upstream statistic",
+    lambda: translator.translator.upstream.stats() if translator.translator.upstream else {},
+))
+
+
+def _target_label(target):
+    # Target languages come from the client; keep the metric's label set bounded
+    return target if target and _LANG_LABEL.match(target) else "other"
+
+
+def translation_error(error: Exception, target: str) -> tuple:
+    """(status, message, headers) for a failed translation.
+
+    Clients only ever see these stable messages; provider and internal
+    details are logged.
+    """
+    if isinstance(error, (NotValidLength, NotValidPayload)):
+        return 400, "Text can't be translated (empty or too long).", {}
+    if isinstance(error, CLIENT_ERRORS):
+        return 400, f"Unsupported target language: {target!r}.", {}
+    TRANSLATE_UPSTREAM_ERRORS.inc(target=_target_label(target))
+    if isinstance(error, (TranslationTimeout, UpstreamTimeout)):
+        return 504, "Translation timed out.", {}
+    if isinstance(error, CircuitOpen):
+        return 503, str(error), {"Retry-After": str(error.retry_after)}
+    log.error("translation_failed", target=target, error=str(error) or type(error).__name__)
+    return 502, "Translation failed.", {}
 
 class TranslateRequest(BaseModel):
     text: str
@@ -11,12 +58,51 @@ class TranslateRequest(BaseModel):
 @router.post("/translate")
 async def translate_text(req: TranslateRequest):
     try:
-        translated = GoogleTranslator(
-            source="auto",
-            target=req.target_lang
-        ).translate(req.text)
+        with TRANSLATE_STAGE_SECONDS.time(route="translate", stage="translation"):
+            translated = await translate_async(req.text, req.target_lang)
+    except Exception as e:
+        status, message, headers = translation_error(e, req.target_lang)
+        raise HTTPException(status_code=status, detail=message, headers=headers or None)
 
-        return {"translatedText": translated}
+    return {"translatedText": translated}
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+
+class TranslateBatchRequest(BaseModel):
+    texts: List[str]
+    target_langs: List[str] = []
+    # Shorthand for a single target language
+    target_lang: Optional[str] = None
+
+
+@router.post("/translate/batch")
+async def translate_texts(req: TranslateBatchRequest):
+    """Translate many texts into one or more languages.
+
+    Misses are packed into as few upstream calls as the provider's character
+    limit allows. Results come back per target language in input order;
+    items that failed are null and listed under "errors".
+    """
+    targets = list(dict.fromkeys(req.target_langs + ([req.target_lang] if req.target_lang else [])))
+    if not req.texts or not targets:
+        raise HTTPException(status_code=422, detail="texts and at least one target language are required")
+    if len(req.texts) > BATCH_MAX_TEXTS:
+        raise HTTPException(status_code=422, detail=f"at most {BATCH_MAX_TEXTS} texts per batch")
+    if len(targets) > BATCH_MAX_TARGETS:
+        raise HTTPException(status_code=422, detail=f"at most {BATCH_MAX_TARGETS} target languages per batch")
+
+    with TRANSLATE_STAGE_SECONDS.time(route="translate_batch", stage="translation"):
+        per_target = await asyncio.gather(*(translate_batch(req.texts, target) for target in targets))
+
+    translations = {}
+    errors = []
+    for target, results in zip(targets, per_target):
+        translations[target] = []
+        for index, result in enumerate(results):
+            if isinstance(result, Exception):
+                _status, message, _headers = translation_error(result, target)
+                translations[target].append(None)
+                errors.append({"index": index, "target_lang": target, "error": message})
+            else:
+                translations[target].append(result)
+
+    return {"translations": translations, "errors": errors}
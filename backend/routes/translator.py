@@ -0,0 +1,505 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from deep_translator import GoogleTranslator
+from deep_translator.exceptions import (
+    InvalidSourceOrTargetLanguage,
+    LanguageNotSupportedException,
+    NotValidLength,
+    NotValidPayload,
+)
+
+from .language_detect import detect as detect_language
+from .resilience import CircuitOpen, Upstream
+from .shared_cache import SharedDiskCache
+
+
+# GoogleTranslator rejects more than 5000 characters per call; packed
+# requests stay a little under that. Line breaks survive translation, so
+# packed texts are newline-separated.
+PACK_SEPARATOR = "\n"
+
+
+# Errors caused by the request itself (unsupported language, text the
+# provider won't accept): reported to the client, never retried and never
+# counted against the upstream's circuit breaker.
+CLIENT_ERRORS = (InvalidSourceOrTargetLanguage, LanguageNotSupportedException, NotValidLength, NotValidPayload)
+
+
+class TranslationTimeout(TimeoutError):
+    pass
+
+
+class TranslatorBusy(CircuitOpen):
+    """Too many translations are already queued; the call was not attempted."""
+
+    def __init__(self):
+        super().__init__("The translator", retry_after=1)
+
+
+def is_upstream_failure(error: BaseException) -> bool:
+    return not isinstance(error, CLIENT_ERRORS)
+
+
+class CachedTranslator:
+    """Shared front door for every GoogleTranslator call in the backend.
+
+    Results are kept in a bounded TTL cache keyed on (source, target, text).
+    Concurrent misses for the same key are coalesced: the first caller does
+    the upstream call and everyone else waits on its result. Failures are
+    never cached.
+
+    ``translate_async`` is the path for request handlers: upstream calls run
+    on a dedicated bounded thread pool (so a slow translator never blocks the
+    event loop or starves the default executor) and each caller waits at most
+    ``timeout_seconds``. At most ``max_pending`` jobs are queued or running
+    on the pool; past that, new misses fail at once with TranslatorBusy. A
+    queued job whose callers have all timed out is dropped before it reaches
+    the provider.
+
+    ``translate_batch`` packs many short texts into as few upstream calls as
+    the provider's per-request character limit (``pack_chars``) allows.
+
+    With an ``upstream`` policy, every GoogleTranslator call gets its
+    deadline, retries, hedging and circuit breaker.
+
+    With a ``shared`` disk cache, misses are looked up there before going
+    upstream and results are written back to it, so worker processes on the
+    same host reuse each other's translations.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 24 * 3600,
+        max_workers: int = 8,
+        timeout_seconds: float = 10.0,
+        pack_chars: int = 4500,
+        upstream: Optional[Upstream] = None,
+        shared: Optional[SharedDiskCache] = None,
+        max_pending: int = 256,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self.pack_chars = pack_chars
+        self.upstream = upstream
+        self.shared = shared
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        self._lock = threading.Lock()
+        # key -> (expires_at, translated text), least recently used first
+        self._entries: OrderedDict[tuple, tuple[float, str]] = OrderedDict()
+        self._inflight: dict[tuple, Future] = {}
+        # key -> number of callers still waiting on its in-flight future
+        self._waiters: dict[tuple, int] = {}
+        self._pending = 0
+        self._counters = {
+            "hits": 0, "misses": 0, "coalesced": 0, "errors": 0, "packed_calls": 0, "pack_fallbacks": 0,
+            "shared_hits": 0, "rejected": 0, "abandoned": 0,
+        }
+
+    @classmethod
+    def from_env(cls) -> "CachedTranslator":
+        shared_dir = os.getenv("TRANSLATE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "voxopen-translate-cache"))
+        return cls(
+            max_entries=int(os.getenv("TRANSLATE_CACHE_ENTRIES", "10000")),
+            ttl_seconds=float(os.getenv("TRANSLATE_CACHE_TTL_SECONDS", str(24 * 3600))),
+            max_workers=int(os.getenv("TRANSLATE_MAX_WORKERS", "8")),
+            timeout_seconds=float(os.getenv("TRANSLATE_TIMEOUT_SECONDS", "10")),
+            pack_chars=int(os.getenv("TRANSLATE_PACK_CHARS", "4500")),
+            upstream=Upstream.from_env("translator", "TRANSLATE_UPSTREAM", deadline=4.0, is_failure=is_upstream_failure),
+            shared=SharedDiskCache(
+                shared_dir,
+                int(os.getenv("TRANSLATE_CACHE_DISK_BYTES", str(64 * 1024 * 1024))),
+                inline_bytes=64 * 1024,
+            ) if shared_dir else None,
+            max_pending=int(os.getenv("TRANSLATE_MAX_PENDING", "256")),
+        )
+
+    def translate(self, text: str, target: str, source: str = "auto") -> str:
+        key = (source, target, text)
+        future, owner = self._lookup(key)
+        if isinstance(future, str):
+            return future
+        if not owner:
+            self._watch(key, 1)
+            try:
+                return future.result()
+            finally:
+                self._watch(key, -1)
+        return self._fill(key, future)
+
+    async def translate_async(
+        self, text: str, target: str, source: str = "auto", timeout: Optional[float] = None
+    ) -> str:
+        timeout = self.timeout_seconds if timeout is None else timeout
+        key = (source, target, text)
+        future, owner = self._lookup(key)
+        if isinstance(future, str):
+            return future
+        self._watch(key, 1)
+        try:
+            if owner:
+                self._submit([(key, future)], self._fill_quietly, key, future)
+
+            # Shield the shared future: one caller timing out must not cancel the
+            # upstream call that other callers (and the cache) are waiting on.
+            inner = asyncio.wrap_future(future)
+            inner.add_done_callback(_consume_exception)
+            waiter = asyncio.shield(inner)
+            try:
+                return await asyncio.wait_for(waiter, timeout)
+            except asyncio.TimeoutError:
+                raise TranslationTimeout(f"Translation timed out after {timeout:g}s") from None
+        finally:
+            self._watch(key, -1)
+
+    async def translate_batch(
+        self, texts: list, target: str, source: str = "auto", timeout: Optional[float] = None
+    ) -> list:
+        """Translate many texts to one target, packing misses into few upstream calls.
+
+        Returns one entry per input, in input order: the translated string,
+        or the exception that text hit.
+        """
+        timeout = self.timeout_seconds if timeout is None else timeout
+        results: dict = {}
+        waiting: dict = {}
+        owned: dict = {}
+        for text in dict.fromkeys(texts):
+            if not text.strip():
+                results[text] = text
+                continue
+            key = (source, target, text)
+            future, owner = self._lookup(key)
+            if isinstance(future, str):
+                results[text] = future
+                continue
+            waiting[text] = future
+            self._watch(key, 1)
+            if owner:
+                owned[text] = (key, future)
+
+        groups, singles = group_for_packing(list(owned), source)
+        packs = []
+        for group in groups:
+            group_packs, group_singles = pack_texts(group, self.pack_chars)
+            packs.extend(group_packs)
+            singles.extend(group_singles)
+        for pack in packs:
+            if len(pack) == 1:
+                singles.append(pack[0])
+            else:
+                entries = [owned[text] for text in pack]
+                self._submit_quietly(entries, self._fill_pack, source, target, entries)
+        for text in singles:
+            self._submit_quietly([owned[text]], self._fill_quietly, *owned[text])
+
+        async def wait(text, future):
+            inner = asyncio.wrap_future(future)
+            inner.add_done_callback(_consume_exception)
+            try:
+                results[text] = await asyncio.wait_for(asyncio.shield(inner), timeout)
+            except asyncio.TimeoutError:
+                results[text] = TranslationTimeout(f"Translation timed out after {timeout:g}s")
+            except Exception as e:
+                results[text] = e
+            finally:
+                self._watch((source, target, text), -1)
+
+        await asyncio.gather(*(wait(text, future) for text, future in waiting.items()))
+        return [results[text] for text in texts]
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self.upstream is not None:
+            self.upstream.shutdown()
+        if self.shared is not None:
+            self.shared.close()
+
+    def stats(self) -> dict:
+        shared = self.shared.stats() if self.shared is not None else {}
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "inflight": len(self._inflight),
+                "pending": self._pending,
+                "shared_entries": shared.get("entries"),
+                "shared_bytes": shared.get("bytes"),
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="translate")
+            return self._executor
+
+    def _submit(self, entries: list, fn, *args) -> None:
+        """Queue ``fn`` on the pool on behalf of the (key, future) ``entries``.
+
+        Raises TranslatorBusy, after failing the entries' futures so that
+        coalesced waiters see it too, when ``max_pending`` jobs are already
+        queued or running.
+        """
+        with self._lock:
+            busy = self._pending >= self.max_pending
+            if busy:
+                self._counters["rejected"] += 1
+            else:
+                self._pending += 1
+        if busy:
+            error = TranslatorBusy()
+            for key, future in entries:
+                self._fail(key, future, error)
+            raise error
+        try:
+            job = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._job_done(None)
+            raise
+        job.add_done_callback(self._job_done)
+
+    def _submit_quietly(self, entries: list, fn, *args) -> None:
+        # TranslatorBusy is delivered through the entries' futures.
+        try:
+            self._submit(entries, fn, *args)
+        except TranslatorBusy:
+            pass
+
+    def _job_done(self, _job) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _watch(self, key: tuple, delta: int) -> None:
+        with self._lock:
+            count = self._waiters.get(key, 0) + delta
+            if count > 0:
+                self._waiters[key] = count
+            else:
+                self._waiters.pop(key, None)
+
+    def _drop_if_abandoned(self, key: tuple, future: Future) -> bool:
+        """Fail a queued job nobody is waiting for any more, instead of running it."""
+        with self._lock:
+            if self._waiters.get(key):
+                return False
+            self._inflight.pop(key, None)
+            self._counters["abandoned"] += 1
+        future.set_exception(TranslationTimeout("Every caller timed out before the translation started"))
+        return True
+
+    def _fill_quietly(self, key: tuple, future: Future) -> None:
+        if self._drop_if_abandoned(key, future):
+            return
+        # The exception is delivered through the future to every waiter.
+        try:
+            self._fill(key, future)
+        except BaseException:
+            pass
+
+    def _lookup(self, key: tuple):
+        """Return (cached str, False), (someone else's Future, False) or (our Future, True)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return value, False
+                del self._entries[key]
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self._counters["coalesced"] += 1
+                return future, False
+
+            future = Future()
+            self._inflight[key] = future
+            self._counters["misses"] += 1
+            return future, True
+
+    def _fill(self, key: tuple, future: Future) -> str:
+        source, target, text = key
+        result = self._shared_get(key)
+        if result is not None:
+            self._resolve(key, future, result, shared=False)
+            return result
+        try:
+            result = self._call_upstream(source, target, text)
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        self._resolve(key, future, result)
+        return result
+
+    def _fill_pack(self, source: str, target: str, entries: list) -> None:
+        """Translate several keys with one upstream call.
+
+        Texts are joined with PACK_SEPARATOR (which none of them contain)
+        and the reply is split back. If the provider merged or split lines
+        the pack is abandoned and each key is translated on its own. Parts
+        are cached exactly as returned, as a single translation would be.
+        """
+        missing = []
+        for key, future in entries:
+            if self._drop_if_abandoned(key, future):
+                continue
+            result = self._shared_get(key)
+            if result is None:
+                missing.append((key, future))
+            else:
+                self._resolve(key, future, result, shared=False)
+        if len(missing) < 2:
+            for key, future in missing:
+                self._fill_quietly(key, future)
+            return
+        entries = missing
+
+        parts = None
+        try:
+            self._count("packed_calls")
+            joined = self._call_upstream(source, target, PACK_SEPARATOR.join(key[2] for key, _ in entries))
+            if isinstance(joined, str):
+                parts = joined.split(PACK_SEPARATOR)
+        except Exception:
+            parts = None
+
+        if parts is None or len(parts) != len(entries):
+            self._count("pack_fallbacks")
+            for key, future in entries:
+                self._submit_quietly([(key, future)], self._fill_quietly, key, future)
+            return
+        for (key, future), part in zip(entries, parts):
+            self._resolve(key, future, part)
+
+    def _call_upstream(self, source: str, target: str, text: str) -> str:
+        # Built outside the policy: an unsupported language fails here, locally,
+        # without an upstream attempt
+        client = GoogleTranslator(source=source, target=target)
+        if self.upstream is None:
+            return client.translate(text)
+        return self.upstream.call_blocking(lambda: client.translate(text))
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _shared_get(self, key: tuple) -> Optional[str]:
+        if self.shared is None:
+            return None
+        data = self.shared.get(_shared_key(key))
+        if data is None:
+            return None
+        self._count("shared_hits")
+        return data.decode("utf-8")
+
+    def _resolve(self, key: tuple, future: Future, result: str, shared: bool = True) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            if result is not None:
+                self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        future.set_result(result)
+        if shared and self.shared is not None and isinstance(result, str):
+            self.shared.put(_shared_key(key), result.encode("utf-8"), ttl=self.ttl_seconds)
+
+    def _fail(self, key: tuple, future: Future, error: BaseException) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._counters["errors"] += 1
+        future.set_exception(error)
+
+
+def group_for_packing(texts: list, source: str) -> tuple:
+    """Split texts into groups that may share a packed call.
+
+    Returns (groups, singles). With an explicit source everything can go
+    together. With ``source="auto"`` the provider detects one language for
+    the whole pack, so only texts with the same detected script are packed;
+    texts with no clear script are sent on their own.
+    """
+    if source != "auto":
+        return [texts], []
+    groups: dict = {}
+    singles: list = []
+    for text in texts:
+        script = detect_language(text).script
+        if script is None:
+            singles.append(text)
+        else:
+            groups.setdefault(script, []).append(text)
+    return list(groups.values()), singles
+
+
+def pack_texts(texts: list, limit: int) -> tuple:
+    """Greedy first-fit packing of texts into groups joined by PACK_SEPARATOR.
+
+    Returns (packs, singles): packs are lists of texts whose joined length is
+    at most ``limit``; singles are texts that can't be packed (too long, or
+    containing the separator) and must be sent on their own.
+    """
+    packs: list = []
+    sizes: list = []
+    singles: list = []
+    for text in sorted(texts, key=len, reverse=True):
+        if PACK_SEPARATOR in text or len(text) > limit:
+            singles.append(text)
+            continue
+        for i, size in enumerate(sizes):
+            if size + len(PACK_SEPARATOR) + len(text) <= limit:
+                packs[i].append(text)
+                sizes[i] = size + len(PACK_SEPARATOR) + len(text)
+                break
+        else:
+            packs.append([text])
+            sizes.append(len(text))
+    return packs, singles
+
+
+def _shared_key(key: tuple) -> str:
+    return hashlib.sha256("\x1f".join(key).encode("utf-8")).hexdigest()
+
+
+def _consume_exception(future) -> None:
+    # Waiters that timed out no longer look at the result; retrieve the
+    # exception so asyncio does not log it as never retrieved.
+    if not future.cancelled():
+        future.exception()
+
+
+translator = CachedTranslator.from_env()
+
+
+def translate(text: str, target: str, source: str = "auto") -> Optional[str]:
+    return translator.translate(text, target, source)
+
+
+async def translate_async(text: str, target: str, source: str = "auto", timeout: Optional[float] = None) -> Optional[str]:
+    return await translator.translate_async(text, target, source, timeout)
+
+
+async def translate_batch(texts: list, target: str, source: str = "auto", timeout: Optional[float] = None) -> list:
+    return await translator.translate_batch(texts, target, source, timeout)
@@ -1,197 +1,683 @@
-from deep_translator import GoogleTranslator
+import asyncio
+import base64
 import io
+import json
+import math
+import os
+import re
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import List, Literal, Optional
+
 import edge_tts
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse, JSONResponse
 from pydantic import BaseModel
 
-from .utils import contains_sensitive
+from . import voices
+from .audio_cache import AudioCache, cache_key
+from .audio_formats import (
+    FORMATS,
+    UnsupportedFormat,
+    available_formats,
+    finalize,
+    negotiate,
+    sniff_media_type,
+    transcode,
+)
+from .http_cache import IMMUTABLE, conditional_response
+from .language_detect import detect as detect_language
+from .logs import get_logger
+from .metrics import (
+    REGISTRY, TTS_LANGUAGE_DETECTIONS, TTS_REQUESTS, TTS_STAGE_SECONDS, TTS_UPSTREAM_ERRORS, stats_collector
+)
+from .resilience import CircuitOpen, Upstream, UpstreamTimeout
+from .scheduler import AdmissionRejected, SynthesisScheduler
+from .translator import CLIENT_ERRORS, TranslationTimeout, translate_async
+from .utils import contains_sensitive, split_sentences
+from .voices import UnknownPersona
 
 router = APIRouter()
+log = get_logger("tts")
 
-# Persona → Language
-PERSONA_LANGUAGE = {
-    # Hindi
-    "Madhur": "hi-IN",
-    "Swara": "hi-IN",
-    # Tamil
-    "Karthik": "ta-IN",
-    "Pallavi": "ta-IN",
-    # Kannada
-    "Gagan": "kn-IN",
-    "Sapna": "kn-IN",
-    # Telugu
-    "Mohan": "te-IN",
-    "Shruti": "te-IN",
-    # Bengali
-    "Sagar": "bn-IN",
-    "Tanishaa": "bn-IN",
-    # English
-    "Kore": "en-US",
-    "Jenny": "en-US",
-    "Ryan": "en-GB",
-    "Sonia": "en-GB",
-    "Liam": "en-CA",
-    "Natasha": "en-AU",
-    # French
-    "Eloise": "fr-FR",
-    # Spanish
-    "Alvaro": "es-ES",
-    "Elena": "es-ES",
-    # German
-    "Lukas": "de-DE",
-    "Katrin": "de-DE",
-    # Italian
-    "Bibi": "it-IT",
-    # Japanese
-    "Nanami": "ja-JP",
-    "Keita": "ja-JP",
-    # Chinese
-    "Zhiyu": "zh-CN",
-    # Korean
-    "Sun-Hi": "ko-KR",
-    # Arabic
-    "Layla": "ar-AE",
-    "Ali": "ar-AE",
-    # Portuguese
-    "Francisca": "pt-BR",
-    "Antonio": "pt-BR",
-}
-
-# Persona → Real Microsoft Voice ID
-VOICE_MAP = {
-    # Hindi
-    "Madhur": "hi-IN-MadhurNeural",
-    "Swara": "hi-IN-SwaraNeural",
-    # Tamil
-    "Karthik": "ta-IN-ValluvarNeural",
-    "Pallavi": "ta-IN-PallaviNeural",
-    # Kannada
-    "Gagan": "kn-IN-GaganNeural",
-    "Sapna": "kn-IN-SapnaNeural",
-    # Telugu
-    "Mohan": "te-IN-MohanNeural",
-    "Shruti": "te-IN-ShrutiNeural",
-    # Bengali
-    "Sagar": "bn-IN-BashkarNeural",
-    "Tanishaa": "bn-IN-TanishaaNeural",
-    # English
-    "Kore": "en-US-ChristopherNeural",
-    "Jenny": "en-US-JennyNeural",
-    "Ryan": "en-GB-RyanNeural",
-    "Sonia": "en-GB-SoniaNeural",
-    "Liam": "en-CA-LiamNeural",
-    "Natasha": "en-AU-NatashaNeural",
-    # French
-    "Eloise": "fr-FR-EloiseNeural",
-    # Spanish
-    "Alvaro": "es-ES-AlvaroNeural",
-    "Elena": "es-ES-ElviraNeural",
-    # German
-    "Lukas": "de-DE-KillianNeural",
-    "Katrin": "de-DE-KatjaNeural",
-    # Italian
-    "Bibi": "it-IT-ElsaNeural",
-    # Japanese
-    "Nanami": "ja-JP-NanamiNeural",
-    "Keita": "ja-JP-KeitaNeural",
-    # Chinese
-    "Zhiyu": "zh-CN-XiaoxiaoNeural",
-    # Korean
-    "Sun-Hi": "ko-KR-SunHiNeural",
-    # Arabic
-    "Layla": "ar-AE-FatimaNeural",
-    "Ali": "ar-AE-HamdanNeural",
-    # Portuguese
-    "Francisca": "pt-BR-FranciscaNeural",
-    "Antonio": "pt-BR-AntonioNeural",
-}
+# Synthesized audio, keyed on exactly what is sent to edge-tts
+audio_cache = AudioCache.from_env()
+REGISTRY.add_collector(stats_collector("tts_cache", "Audio cache statistic", lambda: audio_cache.stats()))
 
-class TTSRequest(BaseModel):
-    text: str
-    voice: str = "Kore"
-    emotion: str = "Neutral"
-    speed: float = 1.0
-    pitch: float = 0
+# Admission control for upstream sessions: global and per-voice caps plus a bounded wait queue
+scheduler = SynthesisScheduler.from_env()
+REGISTRY.add_collector(stats_collector("tts_scheduler", "Synthesis scheduler statistic", lambda: scheduler.stats()))
 
+# Synthesis errors caused by the request itself (edge-tts got no audio for
+# this text): not retried, not counted against the breakers. Voice and
+# prosody are validated in plan_synthesis, so they never reach edge-tts bad.
+SYNTHESIS_CLIENT_ERRORS = (edge_tts.exceptions.NoAudioReceived,)
 
-@router.post("/tts")
-async def text_to_speech(req: TTSRequest):
 
-    if not req.text or not req.text.strip():
-        return JSONResponse({"warning": "Input text is required."})
+def is_synthesis_failure(error: BaseException) -> bool:
+    return not isinstance(error, SYNTHESIS_CLIENT_ERRORS)
 
-    # Sensitive check
-    if contains_sensitive(req.text):
-        return JSONResponse({"warning": "Input contains sensitive language."})
 
-    # Strict persona → language
-    lang_code = PERSONA_LANGUAGE.get(req.voice, "en-US")
-    short_code = lang_code.split("-")[0]
+# Deadlines, retries, optional hedging and circuit breakers (per voice and overall) for edge-tts sessions
+synthesis_upstream = Upstream.from_env(
+    "edge-tts", "TTS_UPSTREAM", deadline=10.0, idle_timeout=15.0, is_failure=is_synthesis_failure
+)
+REGISTRY.add_collector(stats_collector("tts_upstream", "edge-tts upstream statistic", lambda: synthesis_upstream.stats()))
 
-    # Strict persona → voice
-    voice_id = VOICE_MAP.get(req.voice)
-    if not voice_id:
-        voice_id = VOICE_MAP["Kore"]
+# Long-text mode: texts longer than the threshold are split into segments
+# that are synthesized concurrently and streamed back in order.
+CHUNK_THRESHOLD_CHARS = int(os.getenv("TTS_CHUNK_THRESHOLD_CHARS", "600"))
+CHUNK_MAX_CHARS = int(os.getenv("TTS_CHUNK_MAX_CHARS", "300"))
+CHUNK_PARALLELISM = int(os.getenv("TTS_CHUNK_PARALLELISM", "3"))
+# Audio chunks buffered per segment ahead of the one being relayed; a full
+# buffer pauses that segment's upstream reads
+CHUNK_BUFFER_ITEMS = int(os.getenv("TTS_CHUNK_BUFFER_ITEMS", "256"))
 
-    # Translate if needed
-    translated_text = req.text
-    if not lang_code.startswith("en"):
-        translated_text = GoogleTranslator(
-            source="auto",
-            target=short_code
-        ).translate(req.text)
+# /tts/batch limits
+BATCH_MAX_ITEMS = int(os.getenv("TTS_BATCH_MAX_ITEMS", "1000"))
+BATCH_CONCURRENCY = int(os.getenv("TTS_BATCH_CONCURRENCY", "4"))
 
-    print(f"[TTS DEBUG] Persona={req.voice}")
-    print(f"[TTS DEBUG] Lang={lang_code}")
-    print(f"[TTS DEBUG] VoiceID={voice_id}")
-    print(f"[TTS DEBUG] FinalText={translated_text}")
+class TTSRequest(BaseModel):
+    text: str
+    voice: str = "Kore"
+    emotion: str = "Neutral"
+    speed: float = 1.0
+    pitch: float = 0
+    # None = decide from text length; True/False forces long-text mode on/off
+    chunked: Optional[bool] = None
+    # "word" / "sentence": stream NDJSON with boundary offsets interleaved with the audio
+    timings: Optional[Literal["word", "sentence"]] = None
+    # Output format name (see audio_formats.FORMATS); None = negotiate from Accept
+    format: Optional[str] = None
 
-    # Emotion engine
-    base_pitch = int(req.pitch)
-    base_speed = float(req.speed)
 
-    if req.emotion == "Cheerful":
+def resolve_prosody(emotion, pitch, speed):
+    """Emotion engine: map emotion + user pitch/speed to edge-tts (rate, pitch)."""
+    base_pitch = int(pitch)
+    base_speed = float(speed)
+
+    if emotion == "Cheerful":
         base_pitch += 15
         base_speed += 0.1
-    elif req.emotion == "Angry":
+    elif emotion == "Angry":
         base_pitch -= 10
         base_speed += 0.2
-    elif req.emotion == "Sad":
+    elif emotion == "Sad":
         base_pitch -= 15
         base_speed -= 0.2
-    elif req.emotion == "Excited":
+    elif emotion == "Excited":
         base_pitch += 20
         base_speed += 0.2
-    elif req.emotion == "Whispering":
+    elif emotion == "Whispering":
         base_pitch -= 5
         base_speed -= 0.3
 
     final_pitch = f"{base_pitch:+d}Hz"
     final_rate = f"{int((base_speed - 1) * 100):+d}%"
+    return final_rate, final_pitch
+
+
+# cache_key() digests; anything else can't be a cached clip
+_AUDIO_KEY = re.compile(r"^[0-9a-f]{64}$")
+
+
+class TTSRejected(Exception):
+    """A request that must be answered with a JSON body instead of audio."""
+
+    def __init__(self, body, status_code=200, headers=None):
+        super().__init__(body)
+        self.body = body
+        self.status_code = status_code
+        self.headers = headers
+
+
+@dataclass
+class SynthesisPlan:
+    """Everything edge-tts needs for one clip, resolved from a TTSRequest."""
+
+    voice_id: str
+    rate: str
+    pitch: str
+    text: str
+    segments: list
+    key: str
+    # "word" / "sentence" when boundary offsets are wanted with the audio
+    boundary: Optional[str] = None
+    format: str = "mp3"
+
+    @property
+    def chunked(self):
+        return bool(self.segments)
+
+    @property
+    def sessions(self):
+        """Upstream sessions open at once while synthesizing: the scheduler weight of this plan."""
+        return min(len(self.segments), CHUNK_PARALLELISM) if self.chunked else 1
+
+    @property
+    def audio_format(self):
+        return FORMATS[self.format]
+
+    @property
+    def timings_key(self):
+        """Cache key of the boundary offsets stored next to this plan's audio."""
+        return cache_key(self.voice_id, self.rate, self.pitch, self.text, f"timings:{self.boundary}")
+
+
+async def plan_synthesis(req: TTSRequest, accept: Optional[str] = None) -> SynthesisPlan:
+    """Moderation, persona resolution, translation, prosody and output format for one request.
+
+    ``accept`` is the client's Accept header, used when the request names
+    no format. Raises TTSRejected with the JSON body to return when the
+    request can't be synthesized.
+    """
+    if not req.text or not req.text.strip():
+        raise TTSRejected({"warning": "Input text is required."})
 
     try:
-        communicate = edge_tts.Communicate(
-            text=translated_text,
-            voice=voice_id,
-            rate=final_rate,
-            pitch=final_pitch
+        audio_format = negotiate(req.format, accept)
+    except UnsupportedFormat as e:
+        raise TTSRejected({"error": str(e)}, 406)
+
+    # resolve_prosody always yields strings edge-tts accepts for finite numbers
+    if not (math.isfinite(req.speed) and math.isfinite(req.pitch)):
+        raise TTSRejected({"error": "speed and pitch must be finite numbers."}, 400)
+
+    # Sensitive check
+    with TTS_STAGE_SECONDS.time(stage="moderation"):
+        sensitive = contains_sensitive(req.text)
+    if sensitive:
+        raise TTSRejected({"warning": "Input contains sensitive language."})
+
+    # Strict persona → voice and language
+    try:
+        persona = voices.resolve(req.voice)
+    except UnknownPersona:
+        raise TTSRejected({"error": f"Unknown voice: {req.voice!r}. See /api/voices."}, 400)
+    voice_id = persona.voice_id
+    lang_code = persona.locale
+    short_code = persona.language
+
+    # Translate if needed; text already in the persona's language skips the round trip
+    translated_text = req.text
+    if not lang_code.startswith("en"):
+        with TTS_STAGE_SECONDS.time(stage="language_detection"):
+            detection = detect_language(req.text)
+        native = detection.language == short_code
+        TTS_LANGUAGE_DETECTIONS.inc(
+            target=short_code, decision="skip" if native else "translate", method=detection.method
         )
+        if not native:
+            try:
+                with TTS_STAGE_SECONDS.time(stage="translation"):
+                    translated_text = await translate_async(req.text, short_code)
+            except CLIENT_ERRORS:
+                raise TTSRejected({"error": f"Text can't be translated to {short_code!r}."}, 400)
+            except (TranslationTimeout, UpstreamTimeout) as e:
+                raise TTSRejected({"error": str(e)}, 504)
+            except CircuitOpen as e:
+                raise TTSRejected({"error": str(e)}, 503, {"Retry-After": str(e.retry_after)})
+            except Exception as e:
+                log.error("translation_failed", target=short_code, error=str(e) or type(e).__name__)
+                raise TTSRejected({"error": "Translation failed."}, 502)
+
+    log.debug("tts_plan", persona=req.voice, lang=lang_code, voice_id=voice_id, text=translated_text)
+
+    final_rate, final_pitch = resolve_prosody(req.emotion, req.pitch, req.speed)
+
+    chunked = req.chunked
+    if req.timings:
+        # Offsets come from one upstream session, so timed clips are never segmented
+        chunked = False
+    elif chunked is None:
+        chunked = len(translated_text) > CHUNK_THRESHOLD_CHARS
+    segments = split_sentences(translated_text, CHUNK_MAX_CHARS) if chunked else []
+    if len(segments) < 2:
+        segments = []
+
+    # Each output format is its own cache entry; native MP3 keeps the plain key
+    variant = ["chunked"] if segments else []
+    if not audio_format.native:
+        variant.append(f"format:{audio_format.name}")
+    key = cache_key(voice_id, final_rate, final_pitch, translated_text, ",".join(variant))
+    return SynthesisPlan(
+        voice_id, final_rate, final_pitch, translated_text, segments, key, req.timings, audio_format.name
+    )
 
-        audio_bytes = b""
-        async for chunk in communicate.stream():
-            if chunk["type"] == "audio":
-                audio_bytes += chunk["data"]
 
-        if not audio_bytes:
-            return JSONResponse({"error": "No audio generated."}, status_code=500)
+def open_audio_stream(plan: SynthesisPlan):
+    """Async iterator of audio chunks for a plan, straight from the synthesizer.
 
-        return StreamingResponse(
-            io.BytesIO(audio_bytes),
-            media_type="audio/mpeg"
+    MP3 is relayed as is; other formats are transcoded on the fly. When the
+    plan asks for a boundary kind, boundary events (dicts, see
+    _boundary_event) are interleaved with the audio bytes.
+    """
+    stream = _synthesizer_stream(plan)
+    if plan.audio_format.native:
+        return stream
+    return transcode(stream, plan.audio_format)
+
+
+def _synthesizer_stream(plan: SynthesisPlan):
+    if plan.chunked:
+        return _segmented_audio(
+            plan.segments, plan.voice_id, plan.rate, plan.pitch, CHUNK_PARALLELISM, CHUNK_BUFFER_ITEMS
         )
+    options = {"boundary": BOUNDARY_TYPES[plan.boundary]} if plan.boundary else {}
+    return _upstream_audio(plan.voice_id, plan.text, plan.rate, plan.pitch, bool(plan.boundary), **options)
+
+
+async def fetch_cached(plan: SynthesisPlan):
+    """(audio, boundary events) from the cache; audio is None unless everything the plan wants is cached."""
+    audio = await audio_cache.fetch(plan.key)
+    if audio is None or not plan.boundary:
+        return audio, []
+    timings = await audio_cache.fetch(plan.timings_key)
+    if timings is None:
+        return None, []
+    return audio, json.loads(timings)
+
+
+async def store_result(plan: SynthesisPlan, chunks, events) -> bytes:
+    """Cache a finished clip (and its timings); returns the audio as stored."""
+    audio = finalize(b"".join(chunks), plan.audio_format)
+    await audio_cache.store(plan.key, audio)
+    if plan.boundary:
+        await audio_cache.store(plan.timings_key, json.dumps(events).encode("utf-8"))
+    return audio
+
+
+async def synthesize(plan: SynthesisPlan) -> bytes:
+    """Whole clip for a plan, from the cache when possible (non-streaming callers)."""
+    cached = await audio_cache.fetch(plan.key)
+    if cached is not None:
+        return cached
+    async with scheduler.slot(plan.voice_id, plan.sessions):
+        audio_stream = open_audio_stream(plan)
+        try:
+            items = [item async for item in audio_stream]
+        finally:
+            await audio_stream.aclose()
+    chunks = [item for item in items if isinstance(item, bytes)]
+    if not chunks:
+        raise RuntimeError("No audio generated.")
+    return await store_result(plan, chunks, [item for item in items if isinstance(item, dict)])
+
+
+@router.post("/tts")
+async def text_to_speech(req: TTSRequest, request: Request):
+    return await _speak(req, request)
+
+
+@router.get("/tts")
+async def text_to_speech_get(request: Request, req: TTSRequest = Depends()):
+    """POST /tts as a GET with query parameters, so browsers and CDNs can cache it.
+
+    Honours If-None-Match and byte Range requests on cached audio. A 304
+    is only sent once the complete clip is confirmed in the cache, after
+    planning (moderation, language detection, translation), which the key
+    depends on.
+    """
+    return await _speak(req, request, conditional=True)
+
+
+@router.get("/tts/audio/{key}", name="tts_audio")
+async def cached_audio(key: str, request: Request):
+    """Audio by content address, as linked from the Content-Location of /tts responses.
+
+    Only complete clips are ever cached, so a matching If-None-Match is
+    answered with 304 once the clip is found. 404 once it has been evicted.
+    """
+    audio = await audio_cache.fetch(key) if _AUDIO_KEY.match(key) else None
+    if audio is None:
+        return JSONResponse({"error": "Audio not found."}, status_code=404)
+    return conditional_response(request, audio, f'"{key}"', sniff_media_type(audio), {"Cache-Control": IMMUTABLE})
+
+
+@router.get("/tts/formats")
+def output_formats():
+    """Output formats this server can produce (transcoded ones need ffmpeg)."""
+    return {"formats": [{"name": f.name, "media_type": f.media_type} for f in available_formats()]}
+
+
+async def _speak(req: TTSRequest, request: Request, conditional: bool = False):
+    started = time.perf_counter()
+    try:
+        plan = await plan_synthesis(req, request.headers.get("accept"))
+    except TTSRejected as e:
+        TTS_REQUESTS.inc(outcome="warning" if "warning" in e.body else "error")
+        return JSONResponse(e.body, status_code=e.status_code, headers=e.headers)
+
+    # Cached audio points at its content address; boundary streams are not cacheable
+    etag = f'"{plan.key}"'
+    media_type = plan.audio_format.media_type
+    vary = {"Vary": "Accept"} if not req.format and not plan.boundary else {}
+    validators = {} if plan.boundary else {
+        **vary,
+        "ETag": etag,
+        "Content-Location": request.url_for("tts_audio", key=plan.key).path,
+    }
+
+    # If-None-Match is only answered (304) from a HIT: a clip that was
+    # streamed but never cached must not be revalidated as complete
+    with TTS_STAGE_SECONDS.time(stage="cache_lookup"):
+        cached, events = await fetch_cached(plan)
+    if cached is not None:
+        TTS_REQUESTS.inc(outcome="hit")
+        if plan.boundary:
+            return StreamingResponse(
+                _ndjson(_replay(events, cached)), media_type="application/x-ndjson", headers={"X-Cache": "HIT"}
+            )
+        headers = {**validators, "X-Cache": "HIT"}
+        if conditional:
+            return conditional_response(request, cached, etag, media_type, {**headers, "Cache-Control": IMMUTABLE})
+        return Response(cached, media_type=media_type, headers=headers)
+
+    try:
+        ticket = await scheduler.acquire(plan.voice_id, plan.sessions)
+    except AdmissionRejected as e:
+        TTS_REQUESTS.inc(outcome="rejected")
+        return JSONResponse({"error": str(e)}, status_code=429, headers={"Retry-After": str(e.retry_after)})
+
+    try:
+        audio_stream = open_audio_stream(plan)
+
+        # Wait for the first audio chunk before committing to a 200 so that
+        # upstream failures still come back as JSON errors.
+        first_chunk = await audio_stream.__anext__()
+
+    except StopAsyncIteration:
+        ticket.release()
+        TTS_REQUESTS.inc(outcome="error")
+        return JSONResponse({"error": "No audio generated."}, status_code=500)
+
+    except Exception as e:
+        ticket.release()
+        TTS_REQUESTS.inc(outcome="error")
+        return _upstream_error(e, plan)
+
+    TTS_REQUESTS.inc(outcome="miss")
+    TTS_STAGE_SECONDS.observe(time.perf_counter() - started, stage="first_audio")
+    body = _relay_audio(first_chunk, audio_stream, plan, started)
+    if plan.boundary:
+        return _SlotStreamingResponse(_ndjson(body), ticket, media_type="application/x-ndjson", headers={"X-Cache": "MISS"})
+    # The streamed body may still be cut short: no validators, so a browser
+    # can't revalidate a truncated copy; the next request gets the cached one
+    headers = {**vary, "X-Cache": "MISS", "Cache-Control": "no-cache"}
+    return _SlotStreamingResponse(body, ticket, media_type=media_type, headers=headers)
+
+
+def _upstream_error(error: Exception, plan: SynthesisPlan) -> JSONResponse:
+    """Stable JSON error for a synthesis failure before the first chunk; details go to the log."""
+    status, body, headers = synthesis_error(error, voice_id=plan.voice_id)
+    return JSONResponse(body, status_code=status, headers=headers)
+
+
+def synthesis_error(error: Exception, **context) -> tuple:
+    """(status, body, headers) for a synthesis failure.
+
+    Clients only ever see these stable messages; upstream and internal
+    details are logged with ``context``.
+    """
+    if isinstance(error, (CircuitOpen, AdmissionRejected)):
+        status = 503 if isinstance(error, CircuitOpen) else 429
+        return status, {"error": str(error)}, {"Retry-After": str(error.retry_after)}
+    if isinstance(error, UpstreamTimeout):
+        return 504, {"error": "Speech synthesis timed out."}, {}
+    if isinstance(error, SYNTHESIS_CLIENT_ERRORS):
+        log.info("tts_no_audio", error=str(error) or type(error).__name__, **context)
+        return 422, {"error": "No audio could be synthesized for this text."}, {}
+    log.error("tts_failed", error=str(error) or type(error).__name__, **context)
+    return 502, {"error": "Speech synthesis failed."}, {}
+
+
+class TTSBatchRequest(BaseModel):
+    items: List[TTSRequest]
+    concurrency: Optional[int] = None
+
+
+@router.post("/tts/batch")
+async def text_to_speech_batch(req: TTSBatchRequest):
+    """Synthesize many requests and stream them back as a zip archive.
+
+    Identical items are synthesized once. Audio entries are written as they
+    finish (``0000.mp3`` named after the first input index that produced
+    them) and ``manifest.json`` comes last, mapping every input index to its
+    file or to the warning/error that item hit. One bad item never fails the
+    batch.
+    """
+    if not req.items:
+        raise HTTPException(status_code=422, detail="items must not be empty")
+    if len(req.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"at most {BATCH_MAX_ITEMS} items per batch")
+
+    # Dedupe identical requests; remember which inputs share a result
+    unique = {}
+    for index, item in enumerate(req.items):
+        unique.setdefault(tuple(item.model_dump().items()), []).append(index)
+
+    concurrency = max(1, min(req.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+    return StreamingResponse(
+        _batch_archive(req.items, list(unique.values()), concurrency),
+        media_type="application/zip",
+        headers={"Content-Disposition": 'attachment; filename="tts-batch.zip"'},
+    )
+
+
+@router.get("/tts/cache")
+def audio_cache_stats():
+    return audio_cache.stats()
+
+
+@router.get("/tts/scheduler")
+def scheduler_stats():
+    return scheduler.stats()
+
+
+class _SlotStreamingResponse(StreamingResponse):
+    """StreamingResponse that gives its scheduler slot back once the response is over.
+
+    Released here rather than in the body generator so the slot is freed
+    even when the client disconnects before the body starts.
+    """
+
+    def __init__(self, content, ticket, **kwargs):
+        super().__init__(content, **kwargs)
+        self.ticket = ticket
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.ticket.release()
+
+
+# edge-tts boundary option per timing kind, and back
+BOUNDARY_TYPES = {"word": "WordBoundary", "sentence": "SentenceBoundary"}
+_BOUNDARY_KINDS = {v: k for k, v in BOUNDARY_TYPES.items()}
 
+
+def _boundary_event(chunk):
+    # edge-tts reports offsets and durations in 100 ns ticks
+    return {
+        "type": _BOUNDARY_KINDS[chunk["type"]],
+        "offset_ms": round(chunk["offset"] / 10_000, 1),
+        "duration_ms": round(chunk["duration"] / 10_000, 1),
+        "text": chunk["text"],
+    }
+
+
+async def _audio_chunks(communicate, voice_id="", boundaries=False):
+    """Yield MP3 frames from an edge-tts stream as soon as they arrive.
+
+    With ``boundaries``, word/sentence boundary events are yielded too, as
+    dicts. The time to the first upstream message of any kind is recorded as
+    the "handshake" stage; failures are counted per voice ID.
+    """
+    opened = time.perf_counter()
+    handshake = True
+    try:
+        async for chunk in communicate.stream():
+            if handshake:
+                TTS_STAGE_SECONDS.observe(time.perf_counter() - opened, stage="handshake")
+                handshake = False
+            if chunk["type"] == "audio" and chunk["data"]:
+                yield chunk["data"]
+            elif boundaries and chunk["type"] in _BOUNDARY_KINDS:
+                yield _boundary_event(chunk)
+    except Exception:
+        TTS_UPSTREAM_ERRORS.inc(voice_id=voice_id)
+        raise
+
+
+def _upstream_audio(voice_id, text, rate, pitch, boundaries=False, **options):
+    """_audio_chunks for one edge-tts session, run under synthesis_upstream's policy.
+
+    Sessions that fail (or miss the deadline) before their first chunk are
+    retried; the per-voice circuit breaker is keyed on the voice ID.
+    """
+    def open_stream():
+        communicate = edge_tts.Communicate(text=text, voice=voice_id, rate=rate, pitch=pitch, **options)
+        return _audio_chunks(communicate, voice_id, boundaries)
+
+    return synthesis_upstream.stream(open_stream, key=voice_id)
+
+
+async def _segmented_audio(segments, voice_id, rate, pitch, parallelism, buffer_items):
+    """Synthesize segments concurrently and yield their audio in order.
+
+    At most ``parallelism`` upstream sessions are open at once. Segment 0 is
+    relayed live while later segments buffer, so playback starts as soon as
+    the first sentence is ready. Each segment buffers at most ``buffer_items``
+    chunks; past that its producer waits, so a slow client holds back the
+    upstream reads instead of growing memory. A segment that fails before
+    producing any audio is retried under the upstream policy; any other
+    failure ends the stream.
+    """
+    queues = [asyncio.Queue(maxsize=buffer_items) for _ in segments]
+    limit = asyncio.Semaphore(parallelism)
+
+    async def synthesize(index, segment):
+        async with limit:
+            try:
+                async for data in _upstream_audio(voice_id, segment, rate, pitch):
+                    await queues[index].put(data)
+            except Exception as e:
+                await queues[index].put(e)
+            await queues[index].put(None)
+
+    # Tasks acquire the semaphore in creation order, i.e. segment order.
+    tasks = [asyncio.create_task(synthesize(i, segment)) for i, segment in enumerate(segments)]
+    try:
+        for queue in queues:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _relay_audio(first_chunk, audio_stream, plan, started):
+    items = [first_chunk]
+    yield first_chunk
+    try:
+        async for item in audio_stream:
+            items.append(item)
+            yield item
     except Exception as e:
-        print("[ERROR]", e)
-        return JSONResponse({"error": str(e)}, status_code=500)
+        # Headers are already on the wire; all we can do is end the body early.
+        log.error("tts_stream_aborted", voice_id=plan.voice_id, error=str(e))
+        return
+    finally:
+        await audio_stream.aclose()
+
+    TTS_STAGE_SECONDS.observe(time.perf_counter() - started, stage="stream_total")
+    chunks = [item for item in items if isinstance(item, bytes)]
+    events = [item for item in items if isinstance(item, dict)]
+    # Only complete clips are cached
+    await store_result(plan, chunks, events)
+    if plan.boundary:
+        yield {"type": "end", "bytes": sum(len(chunk) for chunk in chunks)}
+
+
+async def _replay(events, audio):
+    for event in events:
+        yield event
+    yield audio
+    yield {"type": "end", "bytes": len(audio)}
+
+
+async def _ndjson(items):
+    """Timed mode body: one JSON object per line, audio as base64 "audio" events."""
+    async for item in items:
+        if isinstance(item, bytes):
+            item = {"type": "audio", "data": base64.b64encode(item).decode("ascii")}
+        yield json.dumps(item, ensure_ascii=False) + "\n"
+
+
+class _ZipSink(io.RawIOBase):
+    """Non-seekable sink for zipfile; buffered bytes are handed out by drain()."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer += data
+        return len(data)
+
+    def drain(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+async def _batch_archive(items, groups, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+    done = asyncio.Queue()
+
+    async def run(indices):
+        async with limit:
+            try:
+                plan = await plan_synthesis(items[indices[0]])
+                result = {"audio": await synthesize(plan), "extension": plan.audio_format.extension}
+            except TTSRejected as e:
+                result = e.body
+            except Exception as e:
+                _status, result, _headers = synthesis_error(e, index=indices[0])
+        await done.put((indices, result))
+
+    tasks = [asyncio.create_task(run(indices)) for indices in groups]
+    manifest = [None] * len(items)
+    sink = _ZipSink()
+    try:
+        # ZIP_STORED: audio is already compressed. A non-seekable sink makes
+        # zipfile write data descriptors, so each entry can be sent as soon
+        # as it is complete.
+        with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_STORED) as archive:
+            for _ in groups:
+                indices, result = await done.get()
+                audio = result.pop("audio", None)
+                if audio is not None:
+                    name = f"{indices[0]:04d}.{result.pop('extension')}"
+                    archive.writestr(name, audio)
+                    result = {"file": name, "bytes": len(audio)}
+                for index in indices:
+                    manifest[index] = {"index": index, **result}
+                yield sink.drain()
+            archive.writestr("manifest.json", json.dumps({"items": manifest}, ensure_ascii=False, indent=2))
+        yield sink.drain()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
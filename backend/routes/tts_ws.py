@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from . import tts
+from .logs import get_logger
+from .resilience import CircuitOpen, UpstreamTimeout
+from .scheduler import AdmissionRejected
+from .tts import TTSRejected, TTSRequest
+from .utils import PhraseSegmenter
+
+router = APIRouter()
+log = get_logger("tts_ws")
+
+# Phrases synthesized ahead of the one being sent
+WS_PARALLELISM = int(os.getenv("TTS_WS_PARALLELISM", "2"))
+WS_MAX_PHRASE_CHARS = int(os.getenv("TTS_WS_MAX_PHRASE_CHARS", str(tts.CHUNK_MAX_CHARS)))
+WS_MIN_CLAUSE_CHARS = int(os.getenv("TTS_WS_MIN_CLAUSE_CHARS", "40"))
+# Phrases accepted but not yet sent; reading from the client pauses beyond this
+WS_MAX_PENDING = int(os.getenv("TTS_WS_MAX_PENDING", "32"))
+
+SETTINGS_FIELDS = ("voice", "emotion", "speed", "pitch", "timings", "format")
+
+
+@router.websocket("/tts/ws")
+async def tts_websocket(websocket: WebSocket):
+    """Incremental text in, audio out.
+
+    Client messages (JSON text frames):
+      {"type": "config", "voice": ..., "emotion": ..., "speed": ..., "pitch": ...,
+       "timings": null | "word" | "sentence", "format": null | "opus" | ...}
+      {"type": "text", "text": "next fragment"}
+      {"type": "flush"}   synthesize what is buffered without waiting for a boundary
+      {"type": "end"}     flush, send the remaining audio, then close
+
+    Server messages, per phrase and in input order:
+      {"type": "segment", "index": n, "text": ...}, then binary audio frames
+      (MP3 unless a format is configured; each phrase is a complete stream)
+      as they are synthesized, then {"type": "segment_end", "index": n}.
+    With timings on, {"type": "word" | "sentence", "index": n, "offset_ms",
+    "duration_ms", "text"} events (offsets relative to the phrase's audio)
+    are interleaved with the frames.
+    A phrase that can't be synthesized gets a {"type": "warning" | "error",
+    "index": n, "message": ...} message in place of its audio; the session
+    carries on. After "end", {"type": "done"} is the last message.
+    """
+    await websocket.accept()
+    settings = TTSRequest(text="")
+    segmenter = PhraseSegmenter(WS_MAX_PHRASE_CHARS, WS_MIN_CLAUSE_CHARS)
+    # Everything sent to the client goes through this queue, in order
+    outbox = asyncio.Queue(maxsize=WS_MAX_PENDING)
+    limit = asyncio.Semaphore(WS_PARALLELISM)
+    sender = asyncio.create_task(_send_outbox(websocket, outbox))
+    index = 0
+
+    async def submit(phrases):
+        nonlocal index
+        for phrase in phrases:
+            request = settings.model_copy(update={"text": phrase, "chunked": False})
+            frames = asyncio.Queue()
+            task = asyncio.create_task(_synthesize(request, frames, limit))
+            await _unless_sender_died(outbox.put(("phrase", index, phrase, frames, task)), sender, task)
+            index += 1
+
+    async def reply(message):
+        await _unless_sender_died(outbox.put(("message", message)), sender)
+
+    try:
+        while True:
+            raw = await _unless_sender_died(websocket.receive_text(), sender)
+            try:
+                message = json.loads(raw)
+                kind = message.get("type")
+            except (TypeError, ValueError, AttributeError):
+                await reply({"type": "error", "message": "Messages must be JSON objects."})
+                continue
+
+            if kind == "text":
+                await submit(segmenter.feed(str(message.get("text", ""))))
+            elif kind == "config":
+                try:
+                    update = {k: message[k] for k in SETTINGS_FIELDS if k in message}
+                    settings = TTSRequest(**{**settings.model_dump(), **update})
+                except ValidationError as e:
+                    await reply({"type": "error", "message": f"Invalid config: {e.errors()[0]['msg']}"})
+            elif kind == "flush":
+                await submit(segmenter.flush())
+            elif kind == "end":
+                await submit(segmenter.flush())
+                break
+            else:
+                await reply({"type": "error", "message": f"Unknown message type: {kind!r}"})
+
+        await _unless_sender_died(outbox.put(None), sender)
+        await sender
+        await websocket.send_json({"type": "done"})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        # Sending failed midway (client gone); nothing left to tell it
+        log.error("websocket_session_failed", error=str(e))
+    finally:
+        sender.cancel()
+        while not outbox.empty():
+            item = outbox.get_nowait()
+            if item and item[0] == "phrase":
+                item[4].cancel()
+        await asyncio.gather(sender, return_exceptions=True)
+
+
+async def _unless_sender_died(awaitable, sender, *orphans):
+    """Await ``awaitable``, giving up with WebSocketDisconnect if the sender task ends first.
+
+    The sender only stops early when sending failed, i.e. the client went
+    away; reading or queueing would otherwise wait forever. ``orphans`` are
+    cancelled in that case.
+    """
+    waiter = asyncio.ensure_future(awaitable)
+    await asyncio.wait([waiter, sender], return_when=asyncio.FIRST_COMPLETED)
+    if waiter.done():
+        return waiter.result()
+    for task in (waiter, *orphans):
+        task.cancel()
+    await asyncio.gather(waiter, *orphans, return_exceptions=True)
+    raise WebSocketDisconnect()
+
+
+async def _send_outbox(websocket, outbox):
+    while True:
+        item = await outbox.get()
+        if item is None:
+            return
+        if item[0] == "message":
+            await websocket.send_json(item[1])
+            continue
+
+        _, index, phrase, frames, task = item
+        try:
+            await websocket.send_json({"type": "segment", "index": index, "text": phrase})
+            sent = 0
+            while True:
+                frame = await frames.get()
+                if frame is None:
+                    break
+                if isinstance(frame, dict):
+                    await websocket.send_json({**frame, "index": index})
+                    continue
+                sent += len(frame)
+                await websocket.send_bytes(frame)
+            await websocket.send_json({"type": "segment_end", "index": index, "bytes": sent})
+        finally:
+            task.cancel()
+
+
+async def _synthesize(request, frames, limit):
+    """Plan and synthesize one phrase, pushing MP3 frames (or one status dict) into ``frames``."""
+    try:
+        async with limit:
+            plan = await tts.plan_synthesis(request)
+            cached, events = await tts.fetch_cached(plan)
+            if cached is not None:
+                for event in events:
+                    frames.put_nowait(event)
+                frames.put_nowait(cached)
+                return
+            chunks, events = [], []
+            async with tts.scheduler.slot(plan.voice_id, plan.sessions):
+                audio_stream = tts.open_audio_stream(plan)
+                try:
+                    async for item in audio_stream:
+                        (chunks if isinstance(item, bytes) else events).append(item)
+                        frames.put_nowait(item)
+                finally:
+                    await audio_stream.aclose()
+            if chunks:
+                await tts.store_result(plan, chunks, events)
+    except TTSRejected as e:
+        kind = "warning" if "warning" in e.body else "error"
+        frames.put_nowait({"type": kind, "message": e.body.get(kind)})
+    except (AdmissionRejected, CircuitOpen) as e:
+        frames.put_nowait({"type": "error", "message": str(e), "retry_after": e.retry_after})
+    except UpstreamTimeout:
+        frames.put_nowait({"type": "error", "message": "Speech synthesis timed out."})
+    except tts.SYNTHESIS_CLIENT_ERRORS:
+        frames.put_nowait({"type": "error", "message": "No audio could be synthesized for this text."})
+    except Exception as e:
+        log.error("websocket_phrase_failed", error=str(e) or type(e).__name__)
+        frames.put_nowait({"type": "error", "message": "Speech synthesis failed."})
+    finally:
+        frames.put_nowait(None)
@@ -1,24 +1,244 @@
+import asyncio
+import os
 import re
 import unicodedata
 
+from .logs import get_logger
+
+log = get_logger("moderation")
+
 SENSITIVE_WORDS = [
     "fuck", "shit", "bitch", "asshole", "bastard", "dick", "pussy", "cunt", "nigger", "fag", "slut", "whore",
     "rape", "kill", "murder", "suicide", "terrorist", "bomb", "nazi", "hitler"
 ]
 
+
+class _CombiningStripTable(dict):
+    """str.translate table that deletes combining marks.
+
+    Filled lazily per code point, so only characters actually seen are
+    classified and repeat lookups stay in C.
+    """
+
+    def __missing__(self, cp):
+        value = None if unicodedata.combining(chr(cp)) else cp
+        self[cp] = value
+        return value
+
+
+_STRIP_COMBINING = _CombiningStripTable()
+
+
 def normalize_text(text):
     # Remove accents, normalize unicode, lower case
     if not isinstance(text, str):
         return ""
+    if text.isascii():
+        return text.lower()
     text = unicodedata.normalize("NFKD", text)
-    text = "".join([c for c in text if not unicodedata.combining(c)])
+    text = text.translate(_STRIP_COMBINING)
     return text.lower()
 
+
+class SensitiveMatcher:
+    """Multi-pattern matcher compiled once per lexicon.
+
+    The lexicon is folded into a trie and emitted as a single factored regex
+    (``f(?:ag|uck)|s(?:hit|lut)|...``), so the work per input character is
+    bounded by the longest term rather than by the number of terms. Terms
+    match even when embedded in other words (e.g. "i'llkillyou" -> "kill").
+    """
+
+    def __init__(self, words):
+        terms = {normalize_text(w).strip() for w in words}
+        self.terms = frozenset(t for t in terms if t)
+        self._pattern = re.compile(self._trie_pattern(self.terms)) if self.terms else None
+
+    @staticmethod
+    def _trie_pattern(terms):
+        trie = {}
+        for term in terms:
+            node = trie
+            for ch in term:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+
+        def build(node):
+            # A term that ends here already matches; longer terms sharing
+            # this prefix can never change the answer, so drop them.
+            if "" in node:
+                return ""
+            branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items())]
+            if len(branches) == 1:
+                return branches[0]
+            return "(?:" + "|".join(branches) + ")"
+
+        return build(trie)
+
+    def search(self, normalized_text):
+        """Return the first sensitive term found in already-normalized text, or None."""
+        if self._pattern is None:
+            return None
+        match = self._pattern.search(normalized_text)
+        return match.group(0) if match else None
+
+
+def read_word_list(path):
+    """One term per line; blank lines and lines starting with '#' are ignored."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+_matcher = SensitiveMatcher(SENSITIVE_WORDS)
+# (path, mtime) of the word list behind _matcher; None for the built-in list
+_loaded_from = None
+
+
+def load_sensitive_words(path=None):
+    """Compile a new lexicon and swap it in atomically.
+
+    With no path, SENSITIVE_WORDS_FILE is used if set, otherwise the built-in
+    SENSITIVE_WORDS. Safe to call while requests are being served: the new
+    matcher is built first and replaces the old one in a single assignment.
+    """
+    global _matcher, _loaded_from
+    path = path or os.getenv("SENSITIVE_WORDS_FILE")
+    if path:
+        mtime = os.stat(path).st_mtime_ns
+        words = read_word_list(path)
+    else:
+        words = SENSITIVE_WORDS
+    matcher = SensitiveMatcher(words)
+    _matcher, _loaded_from = matcher, (path, mtime) if path else None
+    return len(matcher.terms)
+
+
+def reload_sensitive_words_if_changed():
+    """Reload SENSITIVE_WORDS_FILE when it has changed since the last load; True when a new lexicon is in place."""
+    path = os.getenv("SENSITIVE_WORDS_FILE")
+    if not path:
+        return False
+    if _loaded_from and _loaded_from[0] == path and os.stat(path).st_mtime_ns == _loaded_from[1]:
+        return False
+    terms = load_sensitive_words(path)
+    log.info("sensitive_words_reloaded", path=path, terms=terms)
+    return True
+
+
+async def watch_sensitive_words(interval):
+    """Poll SENSITIVE_WORDS_FILE every ``interval`` seconds and swap in edits (runs in every worker)."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(reload_sensitive_words_if_changed)
+        except Exception as e:
+            # A missing or unreadable file keeps the current lexicon
+            log.warning("sensitive_words_reload_failed", error=str(e) or type(e).__name__)
+
+
+if os.getenv("SENSITIVE_WORDS_FILE"):
+    load_sensitive_words()
+
+
 def contains_sensitive(text):
-    text = normalize_text(text)
     # Match sensitive words even if embedded in other words (e.g., 'i'llkillyou' matches 'kill')
-    pattern = r"(" + r"|".join([re.escape(word) for word in SENSITIVE_WORDS]) + r")"
-    match = re.search(pattern, text, re.IGNORECASE)
+    match = _matcher.search(normalize_text(text))
     if match:
-        print(f"[DEBUG] Sensitive detected: '{match.group(0)}' in '{text}'")
+        log.debug("sensitive_match", term=match)
     return match is not None
+
+
+# Sentence enders (Latin, Devanagari danda, CJK full-width) and clause breaks
+_SENTENCE_END = re.compile(r"(?<=[.!?।॥。！？])\s+|(?<=[。！？])|\n+")
+_CLAUSE_END = re.compile(r"(?<=[,;:，、；：])\s*")
+
+
+def split_sentences(text, max_chars=300):
+    """Split text into speakable segments of at most max_chars.
+
+    Cuts at sentence boundaries first, then at clause punctuation, then at
+    whitespace, and only hard-cuts a single run with no break at all. Short
+    neighbouring sentences are merged back together up to max_chars so the
+    synthesizer isn't handed lots of tiny requests.
+    """
+    pieces = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        for clause in _CLAUSE_END.split(sentence):
+            pieces.extend(_split_long(clause.strip(), max_chars))
+
+    segments = []
+    for piece in pieces:
+        if segments and len(segments[-1]) + 1 + len(piece) <= max_chars:
+            segments[-1] = f"{segments[-1]} {piece}"
+        else:
+            segments.append(piece)
+    return segments
+
+
+def _split_long(text, max_chars):
+    while len(text) > max_chars:
+        cut = text.rfind(" ", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        head, text = text[:cut].strip(), text[cut:].strip()
+        if head:
+            yield head
+    if text:
+        yield text
+
+
+# Streaming input: a sentence ender only counts once the next character
+# (whitespace) has arrived, so "3.5" or "e.g." mid-token isn't cut early.
+_PHRASE_END = re.compile(r"[.!?।॥](?=\s)|[。！？]|\n")
+_PHRASE_CLAUSE = re.compile(r"[,;:](?=\s)|[，、；：]")
+
+
+class PhraseSegmenter:
+    """Incremental counterpart of split_sentences for text that arrives in fragments.
+
+    ``feed`` returns the phrases completed by a fragment; ``flush`` returns
+    whatever is left. Phrases end at sentence boundaries, at clause
+    punctuation once at least ``min_clause_chars`` are buffered, or at the
+    last space before ``max_chars`` when no boundary shows up.
+    """
+
+    def __init__(self, max_chars=300, min_clause_chars=40):
+        self.max_chars = max_chars
+        self.min_clause_chars = min_clause_chars
+        self._buffer = ""
+
+    def feed(self, fragment):
+        self._buffer += fragment
+        phrases = []
+        while True:
+            end = self._boundary()
+            if end is None:
+                break
+            phrase, self._buffer = self._buffer[:end].strip(), self._buffer[end:].lstrip()
+            if phrase:
+                phrases.append(phrase)
+        return phrases
+
+    def flush(self):
+        phrases = list(_split_long(self._buffer.strip(), self.max_chars))
+        self._buffer = ""
+        return phrases
+
+    def _boundary(self):
+        buffer = self._buffer
+        match = _PHRASE_END.search(buffer)
+        if match and match.end() <= self.max_chars:
+            return match.end()
+        for clause in _PHRASE_CLAUSE.finditer(buffer, 0, self.max_chars):
+            if clause.end() >= self.min_clause_chars:
+                return clause.end()
+        if len(buffer) > self.max_chars:
+            cut = buffer.rfind(" ", 0, self.max_chars + 1)
+            return cut if cut > 0 else self.max_chars
+        return None
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+import edge_tts
+from fastapi import APIRouter, Request
+from fastapi.responses import Response
+
+from .http_cache import etag_matches
+from .logs import get_logger
+
+router = APIRouter()
+log = get_logger("voices")
+
+DEFAULT_PERSONA = "Kore"
+
+# edge-tts voice list, saved so startup never needs the network. Kept in the
+# persistent data dir (next to the history blobs) so restarts reuse it.
+DEFAULT_SNAPSHOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data/voices.json"))
+SNAPSHOT_PATH = os.getenv("VOICES_SNAPSHOT") or DEFAULT_SNAPSHOT_PATH
+# Snapshots older than this are refreshed in the background (0 = never refresh)
+SNAPSHOT_MAX_AGE = float(os.getenv("VOICES_SNAPSHOT_MAX_AGE_HOURS", "168")) * 3600
+CATALOG_MAX_AGE = int(os.getenv("VOICES_CACHE_MAX_AGE_SECONDS", "3600"))
+
+# Persona → (Microsoft voice ID, UI group, description). The locale, and so
+# the translation target, comes from the voice ID.
+PERSONAS = {
+    # English
+    "Kore": ("en-US-ChristopherNeural", "English (Global)", "US Male"),
+    "Jenny": ("en-US-JennyNeural", "English (Global)", "US Female"),
+    "Eric": ("en-US-EricNeural", "English (Global)", "US Male"),
+    "Ryan": ("en-GB-RyanNeural", "English (Global)", "UK Male"),
+    "Sonia": ("en-GB-SoniaNeural", "English (Global)", "UK Female"),
+    "Liam": ("en-CA-LiamNeural", "English (Global)", "Canada Male"),
+    "Natasha": ("en-AU-NatashaNeural", "English (Global)", "Australia Female"),
+    # Indian
+    "Madhur": ("hi-IN-MadhurNeural", "Indian (Regional)", "Hindi Male"),
+    "Swara": ("hi-IN-SwaraNeural", "Indian (Regional)", "Hindi Female"),
+    "Karthik": ("ta-IN-ValluvarNeural", "Indian (Regional)", "Tamil Male"),
+    "Pallavi": ("ta-IN-PallaviNeural", "Indian (Regional)", "Tamil Female"),
+    "Gagan": ("kn-IN-GaganNeural", "Indian (Regional)", "Kannada Male"),
+    "Sapna": ("kn-IN-SapnaNeural", "Indian (Regional)", "Kannada Female"),
+    "Mohan": ("te-IN-MohanNeural", "Indian (Regional)", "Telugu Male"),
+    "Shruti": ("te-IN-ShrutiNeural", "Indian (Regional)", "Telugu Female"),
+    "Dhaval": ("gu-IN-DhavalNeural", "Indian (Regional)", "Gujarati Male"),
+    "Nirmala": ("mr-IN-NirmalaNeural", "Indian (Regional)", "Marathi Female"),
+    "Sagar": ("bn-IN-BashkarNeural", "Indian (Regional)", "Bengali Male"),
+    "Tanishaa": ("bn-IN-TanishaaNeural", "Indian (Regional)", "Bengali Female"),
+    # European
+    "Remy": ("fr-FR-RemyMultilingualNeural", "European", "French Male"),
+    "Eloise": ("fr-FR-EloiseNeural", "European", "French Female"),
+    "Alvaro": ("es-ES-AlvaroNeural", "European", "Spanish Male"),
+    "Elena": ("es-ES-ElviraNeural", "European", "Spanish Female"),
+    "Lukas": ("de-DE-KillianNeural", "European", "German Male"),
+    "Katrin": ("de-DE-KatjaNeural", "European", "German Female"),
+    "Bibi": ("it-IT-ElsaNeural", "European", "Italian Female"),
+    # Asian & Middle East
+    "Nanami": ("ja-JP-NanamiNeural", "Asian & Middle East", "Japanese Female"),
+    "Keita": ("ja-JP-KeitaNeural", "Asian & Middle East", "Japanese Male"),
+    "Zhiyu": ("zh-CN-XiaoxiaoNeural", "Asian & Middle East", "Mandarin Female"),
+    "Sun-Hi": ("ko-KR-SunHiNeural", "Asian & Middle East", "Korean Female"),
+    "Layla": ("ar-AE-FatimaNeural", "Asian & Middle East", "Arabic Female"),
+    "Ali": ("ar-AE-HamdanNeural", "Asian & Middle East", "Arabic Male"),
+    # South American
+    "Francisca": ("pt-BR-FranciscaNeural", "South American", "Brazilian Portuguese Female"),
+    "Antonio": ("pt-BR-AntonioNeural", "South American", "Brazilian Portuguese Male"),
+}
+
+
+class UnknownPersona(KeyError):
+    """Raised for a persona (or voice ID) that is not in the registry."""
+
+
+@dataclass(frozen=True)
+class Persona:
+    name: str
+    voice_id: str
+    group: str
+    description: str
+    locale: str
+    # From the edge-tts snapshot; None when no snapshot has been loaded
+    gender: Optional[str] = None
+    available: Optional[bool] = None
+
+    @property
+    def language(self) -> str:
+        """Translation target, e.g. "hi" for hi-IN."""
+        return self.locale.split("-")[0]
+
+
+class VoiceRegistry:
+    """The persona table, indexed for O(1) case-insensitive lookup by persona name or voice ID.
+
+    ``snapshot`` is an ``edge_tts.list_voices()`` result; when given, each
+    persona is annotated with the voice's gender and whether the service
+    still lists it. The serialized catalog and its ETag are built once.
+    """
+
+    def __init__(self, personas: dict, snapshot: Optional[list] = None):
+        listed = {v.get("ShortName"): v for v in snapshot or ()}
+        self.personas = []
+        for name, (voice_id, group, description) in personas.items():
+            voice = listed.get(voice_id)
+            self.personas.append(Persona(
+                name=name,
+                voice_id=voice_id,
+                group=group,
+                description=description,
+                locale=voice_id.rsplit("-", 1)[0],
+                gender=voice.get("Gender") if voice else None,
+                available=(voice is not None) if snapshot else None,
+            ))
+        self._index = {}
+        for persona in self.personas:
+            self._index[persona.voice_id.lower()] = persona
+        for persona in self.personas:
+            self._index[persona.name.lower()] = persona
+
+        self.body = json.dumps(
+            {"default": DEFAULT_PERSONA, "personas": [asdict(p) for p in self.personas]},
+            separators=(",", ":"),
+        ).encode()
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+    def resolve(self, name: str) -> Persona:
+        persona = self._index.get((name or "").lower())
+        if persona is None:
+            raise UnknownPersona(name)
+        return persona
+
+
+def load_snapshot(path: str) -> Optional[list]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            voices = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log.warning("voices_snapshot_unreadable", path=path, error=str(e))
+        return None
+    return voices if isinstance(voices, list) else None
+
+
+def save_snapshot(path: str, voices: list) -> None:
+    # Write-then-rename so a crash never leaves a truncated snapshot
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(voices, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+registry = VoiceRegistry(PERSONAS, load_snapshot(SNAPSHOT_PATH))
+
+
+def resolve(name: str) -> Persona:
+    """Persona for a request's ``voice`` (persona name or voice ID); raises UnknownPersona."""
+    return registry.resolve(name)
+
+
+def snapshot_is_stale(path: str = SNAPSHOT_PATH, max_age: float = SNAPSHOT_MAX_AGE) -> bool:
+    if max_age <= 0:
+        return False
+    try:
+        return time.time() - os.path.getmtime(path) > max_age
+    except OSError:
+        return True
+
+
+async def refresh(path: str = SNAPSHOT_PATH) -> int:
+    """Fetch the edge-tts voice list, save it to ``path`` and swap in a new registry.
+
+    Returns the number of voices listed. Safe to call while requests are
+    being served.
+    """
+    global registry
+    voices = await edge_tts.list_voices()
+    save_snapshot(path, voices)
+    registry = VoiceRegistry(PERSONAS, voices)
+    return len(voices)
+
+
+async def refresh_if_stale() -> None:
+    if not snapshot_is_stale():
+        return
+    try:
+        count = await refresh()
+        log.info("voices_snapshot_refreshed", path=SNAPSHOT_PATH, voices=count)
+    except Exception as e:
+        log.warning("voices_snapshot_refresh_failed", error=str(e) or type(e).__name__)
+
+
+@router.get("/voices")
+def list_personas(request: Request):
+    """The persona catalog; clients should revalidate with If-None-Match."""
+    current = registry
+    headers = {"ETag": current.etag, "Cache-Control": f"public, max-age={CATALOG_MAX_AGE}"}
+    if etag_matches(request.headers.get("if-none-match", ""), current.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(current.body, media_type="application/json", headers=headers)
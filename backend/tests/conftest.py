@@ -9,13 +9,30 @@ from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
 
+def _matches(doc: dict[str, Any], query: dict[str, Any]) -> bool:
+    """Tiny subset of Mongo query semantics: equality, $lt and $or."""
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(_matches(doc, sub) for sub in cond):
+                return False
+        elif isinstance(cond, dict) and "$lt" in cond:
+            value = doc.get(key)
+            if value is None or not value < cond["$lt"]:
+                return False
+        elif doc.get(key) != cond:
+            return False
+    return True
+
+
 class _FakeCursor:
     def __init__(self, items: list[dict[str, Any]]):
         self._items = items
 
-    def sort(self, key: str, direction: int):
-        reverse = direction == -1
-        self._items.sort(key=lambda x: x.get(key), reverse=reverse)
+    def sort(self, key, direction: int = 1):
+        keys = key if isinstance(key, list) else [(key, direction)]
+        # stable sorts applied from the least significant key; None sorts lowest
+        for name, order in reversed(keys):
+            self._items.sort(key=lambda x: (x.get(name) is not None, x.get(name)), reverse=order == -1)
         return self
 
     def limit(self, n: int):
@@ -29,6 +46,8 @@ class _FakeCursor:
 class FakeHistoryCollection:
     def __init__(self):
         self.items: list[dict[str, Any]] = []
+        self.insert_many_calls: list[int] = []
+        self.indexes: list = []
 
     def insert_one(self, doc: dict[str, Any]):
         doc = dict(doc)
@@ -37,8 +56,22 @@ class FakeHistoryCollection:
         self.items.append(doc)
         return {"inserted_id": doc["_id"]}
 
-    def find(self):
-        return _FakeCursor(list(self.items))
+    def insert_many(self, docs: list[dict[str, Any]], ordered: bool = True):
+        self.insert_many_calls.append(len(docs))
+        return {"inserted_ids": [self.insert_one(doc)["inserted_id"] for doc in docs]}
+
+    def find(self, query: dict[str, Any] | None = None, projection: dict[str, int] | None = None):
+        docs = [doc for doc in self.items if _matches(doc, query or {})]
+        if projection:
+            keep = set(projection) | {"_id"}
+            docs = [{k: v for k, v in doc.items() if k in keep} for doc in docs]
+        else:
+            docs = [dict(doc) for doc in docs]
+        return _FakeCursor(docs)
+
+    def create_index(self, keys, **kwargs):
+        self.indexes.append(keys)
+        return "_".join(f"{name}_{order}" for name, order in keys)
 
 
 @dataclass
@@ -49,11 +82,22 @@ class AppContext:
 
 
 @pytest.fixture()
-def app_ctx(monkeypatch: pytest.MonkeyPatch) -> AppContext:
+def app_ctx(monkeypatch: pytest.MonkeyPatch, tmp_path) -> AppContext:
     """Build a minimal FastAPI app for tests (no real Mongo / no network)."""
 
     # Import routers (safe; doesn't touch MongoDB)
-    from backend.routes import history, tts, translate
+    from backend.routes import history, prewarm, translator, tts, tts_ws, translate, voices
+    from backend.routes.audio_cache import AudioCache
+    from backend.routes.blob_store import FileBlobStore
+    from backend.routes.resilience import Upstream
+    from backend.routes.scheduler import SynthesisScheduler
+
+    # Fresh caches (and admission state) per test so nothing leaks between tests
+    monkeypatch.setattr(tts, "audio_cache", AudioCache(disk_dir=str(tmp_path / "tts-cache")))
+    monkeypatch.setattr(translator, "translator", translator.CachedTranslator())
+    monkeypatch.setattr(tts, "scheduler", SynthesisScheduler())
+    monkeypatch.setattr(tts, "synthesis_upstream", Upstream("edge-tts", backoff=0, is_failure=tts.is_synthesis_failure))
+    monkeypatch.setattr(voices, "registry", voices.VoiceRegistry(voices.PERSONAS))
 
     app = FastAPI()
     history_collection = FakeHistoryCollection()
@@ -78,10 +122,14 @@ def app_ctx(monkeypatch: pytest.MonkeyPatch) -> AppContext:
     })
 
     # Attach fake DB collection where routes expect it
-    app.voice_history_collection = history_collection
+    app.state.voice_history_collection = history_collection
+    app.state.blob_store = FileBlobStore(str(tmp_path / "history-blobs"))
 
     app.include_router(history.router, prefix="/api")
     app.include_router(tts.router, prefix="/api")
+    app.include_router(tts_ws.router, prefix="/api")
+    app.include_router(prewarm.router, prefix="/api")
+    app.include_router(voices.router, prefix="/api")
     app.include_router(translate.router, prefix="/api")
 
     client = TestClient(app)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _offline_voices(monkeypatch):
+    # The lifespan refreshes a stale voice snapshot from the network; keep tests offline
+    async def _no_refresh() -> None:
+        return None
+
+    monkeypatch.setattr("backend.routes.voices.refresh_if_stale", _no_refresh)
+
+
+def test_app_boots_and_reports_db_readiness_without_waiting(monkeypatch):
+    import time
+
+    from fastapi.testclient import TestClient
+
+    # Nothing listens here; startup must not block on it
+    monkeypatch.setenv("MONGO_URI", "mongodb://127.0.0.1:1/")
+    monkeypatch.setenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "200")
+
+    from backend.app import app
+
+    started = time.perf_counter()
+    with TestClient(app) as client:
+        assert time.perf_counter() - started < 1.0
+        db = app.state.db
+        assert db.client_options["serverSelectionTimeoutMS"] == 200
+
+        body = client.get("/healthz").json()
+        assert body["status"] == "ok"
+        assert body["db"] == "unavailable"
+
+        async def _ready(timeout: float = 2.0) -> bool:
+            db.ready, db.last_error = True, None
+            return True
+
+        monkeypatch.setattr(db, "check", _ready)
+        assert client.get("/healthz").json()["db"] == "ready"
+
+
+def test_app_runs_without_a_configured_database(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    monkeypatch.delenv("MONGO_URI", raising=False)
+
+    from backend.app import app
+
+    with TestClient(app) as client:
+        assert app.state.db.client is None
+        assert client.get("/healthz").json() == {"status": "ok", "db": "not configured", "db_error": None}
+        assert client.get("/api/history").status_code == 503
+
+
+def test_history_routes_return_503_without_a_database():
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from backend.routes import history
+
+    app = FastAPI()
+    app.include_router(history.router, prefix="/api")
+
+    res = TestClient(app).get("/api/history")
+    assert res.status_code == 503
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+
+def test_cache_key_depends_on_every_synthesis_input():
+    from backend.routes.audio_cache import cache_key
+
+    base = cache_key("en-US-JennyNeural", "+0%", "+0Hz", "Hello")
+    assert base == cache_key("en-US-JennyNeural", "+0%", "+0Hz", "Hello")
+    assert base != cache_key("en-US-AriaNeural", "+0%", "+0Hz", "Hello")
+    assert base != cache_key("en-US-JennyNeural", "+10%", "+0Hz", "Hello")
+    assert base != cache_key("en-US-JennyNeural", "+0%", "+5Hz", "Hello")
+    assert base != cache_key("en-US-JennyNeural", "+0%", "+0Hz", "Hello!")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    from backend.routes.audio_cache import AudioCache
+
+    cache = AudioCache(memory_bytes=10, disk_dir=None)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"  # a is now most recent
+    cache.put("c", b"cccc")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+    stats = cache.stats()
+    assert stats["memory_evictions"] == 1
+    assert stats["memory_bytes"] <= 10
+
+
+def test_disk_tier_survives_restart_and_respects_budget(tmp_path):
+    from backend.routes.audio_cache import AudioCache
+
+    disk_dir = str(tmp_path / "cache")
+    cache = AudioCache(memory_bytes=0, disk_dir=disk_dir, disk_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    cache.put("c", b"cccc")
+    assert cache.stats()["disk_evictions"] == 1
+
+    reopened = AudioCache(memory_bytes=1024, disk_dir=disk_dir, disk_bytes=10)
+    assert reopened.get("a") is None
+    assert reopened.get("b") == b"bbbb"
+    assert reopened.get("c") == b"cccc"
+    stats = reopened.stats()
+    assert stats["disk_hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["disk_bytes"] == 8
+
+    # promoted to memory on read
+    assert reopened.get("b") == b"bbbb"
+    assert reopened.stats()["memory_hits"] == 1
+
+
+def test_disk_tier_adopts_entries_written_with_the_old_suffix(tmp_path):
+    import os
+    import sqlite3
+
+    from backend.routes.audio_cache import AudioCache
+    from backend.routes.shared_cache import SharedDiskCache
+
+    disk_dir = tmp_path / "cache"
+    # a pre-index cache, and an index from before the neutral suffix
+    (disk_dir / "ab").mkdir(parents=True)
+    (disk_dir / "ab" / "abcd.mp3").write_bytes(b"old audio")
+    old = SharedDiskCache(str(disk_dir), suffix=".mp3")
+    assert old.put("cdef", b"indexed audio")
+    old.close()
+    with sqlite3.connect(disk_dir / "index.sqlite3") as db:
+        db.execute("PRAGMA user_version = 1")
+
+    cache = AudioCache(memory_bytes=0, disk_dir=str(disk_dir))
+    assert cache.get("abcd") == b"old audio"
+    assert cache.get("cdef") == b"indexed audio"
+    cache.put("efgh", b'{"type": "word"}')
+    assert sorted(name for _, _, files in os.walk(disk_dir) for name in files if not name.startswith("index")) == [
+        "abcd.bin", "cdef.bin", "efgh.bin",
+    ]
+    assert cache.stats()["disk_bytes"] == len(b"old audio") + len(b"indexed audio") + len(b'{"type": "word"}')
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import os
 from pathlib import Path
 
 
@@ -24,7 +25,7 @@ def test_history_post_saves_document_offline(app_ctx, monkeypatch):
         def translate(self, text: str) -> str:
             return text
 
-    monkeypatch.setattr("deep_translator.GoogleTranslator", _FakeTranslator)
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _FakeTranslator)
 
     files = {"file": ("sample.wav", b"FAKEWAV", "audio/wav")}
     res = app_ctx.client.post(
@@ -54,7 +55,7 @@ def test_history_post_blocks_sensitive(app_ctx, monkeypatch):
         def translate(self, text: str) -> str:
             return text
 
-    monkeypatch.setattr("deep_translator.GoogleTranslator", _FakeTranslator)
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _FakeTranslator)
 
     files = {"file": ("sample.wav", b"FAKEWAV", "audio/wav")}
     res = app_ctx.client.post(
@@ -65,3 +66,272 @@ def test_history_post_blocks_sensitive(app_ctx, monkeypatch):
 
     assert res.status_code == 200
     assert "warning" in res.json()
+
+
+
+def test_history_writer_batches_and_drains_on_stop(app_ctx):
+    import asyncio
+
+    from backend.routes.history_writer import HistoryWriter
+
+    collection = app_ctx.history_collection
+    collection.items.clear()
+    writer = HistoryWriter(collection, batch_size=3, flush_interval=0.05)
+
+    async def scenario():
+        await writer.start()
+        for i in range(7):
+            await writer.enqueue({"text": f"doc {i}"})
+        # two full batches go out without waiting for the interval
+        await asyncio.sleep(0.01)
+        assert collection.insert_many_calls[:2] == [3, 3]
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert [item["text"] for item in collection.items] == [f"doc {i}" for i in range(7)]
+    assert sum(collection.insert_many_calls) == 7
+    assert writer.stats()["written"] == 7
+
+
+def test_history_writer_retries_only_the_failed_part_of_a_batch(app_ctx):
+    import asyncio
+
+    from pymongo.errors import BulkWriteError
+
+    from backend.routes.history_writer import HistoryWriter
+
+    class _FlakyCollection:
+        """Stores every doc except those it has been told to fail, once, with the given code."""
+
+        def __init__(self, failures: dict):
+            self.failures = failures
+            self.batches: list[list[str]] = []
+            self.stored: list[str] = []
+
+        def insert_many(self, docs, ordered: bool = True):
+            self.batches.append([doc["text"] for doc in docs])
+            errors = []
+            for index, doc in enumerate(docs):
+                code = self.failures.pop(doc["text"], None)
+                if doc["text"] in self.stored:
+                    code = 11000
+                if code is None:
+                    self.stored.append(doc["text"])
+                else:
+                    errors.append({"index": index, "code": code, "errmsg": "injected"})
+            if errors:
+                raise BulkWriteError({"writeErrors": errors, "nInserted": len(docs) - len(errors)})
+
+    # b: transient, retried alone; c: already stored (a duplicate key counts as written); d: invalid, never retried
+    collection = _FlakyCollection({"b": 91, "d": 121})
+    collection.stored.append("c")
+    writer = HistoryWriter(collection, batch_size=10, flush_interval=0.01)
+
+    async def scenario():
+        await writer.start()
+        for text in "abcde":
+            await writer.enqueue({"text": text})
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert collection.batches == [list("abcde"), ["b"]]
+    assert collection.stored == ["c", "a", "e", "b"]
+    stats = writer.stats()
+    assert (stats["written"], stats["dropped"], stats["failed_flushes"]) == (4, 1, 1)
+
+
+def test_history_writer_applies_backpressure_when_full(app_ctx):
+    import asyncio
+
+    from backend.routes.history_writer import HistoryQueueFull, HistoryWriter
+
+    writer = HistoryWriter(app_ctx.history_collection, max_queue=2, enqueue_timeout=0.05)
+
+    async def scenario():
+        # not started: nothing drains the queue
+        await writer.enqueue({"text": "a"})
+        await writer.enqueue({"text": "b"})
+        try:
+            await writer.enqueue({"text": "c"})
+        except HistoryQueueFull:
+            pass
+        else:  # pragma: no cover
+            raise AssertionError("expected backpressure")
+        await writer.stop()
+
+    asyncio.run(scenario())
+    assert writer.stats()["rejected"] == 1
+    assert [item["text"] for item in app_ctx.history_collection.items][-2:] == ["a", "b"]
+
+
+def test_history_post_uses_write_behind_writer(app_ctx, monkeypatch):
+    from contextlib import asynccontextmanager
+
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from backend.routes import history
+    from backend.routes.history_writer import HistoryWriter
+
+    class _FakeTranslator:
+        def __init__(self, source: str, target: str):
+            pass
+
+        def translate(self, text: str) -> str:
+            return text
+
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _FakeTranslator)
+
+    collection = app_ctx.history_collection
+    writer = HistoryWriter(collection, batch_size=50, flush_interval=60)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        app.state.voice_history_collection = collection
+        app.state.history_writer = writer
+        await writer.start()
+        yield
+        await writer.stop()
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(history.router, prefix="/api")
+
+    before = len(collection.items)
+    with TestClient(app) as client:
+        for i in range(3):
+            res = client.post(
+                "/api/history",
+                data={"text": f"queued {i}", "voice": "Kore", "emotion": "Neutral", "pitch": "0", "speed": "1.0"},
+                files={"file": ("sample.wav", b"FAKEWAV", "audio/wav")},
+            )
+            assert res.json() == {"status": "ok"}
+        # handler returned before anything was written
+        assert len(collection.items) == before
+
+    # shutdown drained the queue in one insert_many
+    assert [item["text"] for item in collection.items[before:]] == ["queued 0", "queued 1", "queued 2"]
+    assert collection.insert_many_calls == [3]
+
+
+def test_history_get_pages_with_keyset_cursor(app_ctx):
+    from datetime import datetime, timedelta
+
+    collection = app_ctx.history_collection
+    collection.items.clear()
+    base = datetime(2024, 1, 1)
+    for i in range(25):
+        collection.insert_one({
+            "_id": f"{i:03d}",
+            "text": f"entry {i}",
+            "voice": "Madhur" if i % 2 else "Kore",
+            "emotion": "Neutral",
+            # pairs of entries share a timestamp to exercise the _id tie-break
+            "timestamp": base + timedelta(seconds=i // 2),
+        })
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 10}
+        if cursor:
+            params["cursor"] = cursor
+        body = app_ctx.client.get("/api/history", params=params).json()
+        seen.extend(item["_id"] for item in body["history"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [f"{i:03d}" for i in reversed(range(25))]
+
+
+def test_history_get_filters_and_projects(app_ctx):
+    collection = app_ctx.history_collection
+    collection.insert_one({"_id": "x1", "text": "hola", "voice": "Elena", "emotion": "Sad", "pitch": 3})
+
+    body = app_ctx.client.get("/api/history", params={"voice": "Elena", "fields": "text"}).json()
+    assert len(body["history"]) == 1
+    assert set(body["history"][0]) == {"_id", "text", "timestamp"}
+    assert body["next_cursor"] is None
+
+    body = app_ctx.client.get("/api/history", params={"voice": "Kore", "emotion": "Sad"}).json()
+    assert body["history"] == []
+
+
+def test_history_get_rejects_bad_cursor_and_fields(app_ctx):
+    assert app_ctx.client.get("/api/history", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert app_ctx.client.get("/api/history", params={"fields": "$where"}).status_code == 400
+
+
+def test_ensure_history_indexes(app_ctx):
+    from backend.routes.history import ensure_history_indexes
+
+    ensure_history_indexes(app_ctx.history_collection)
+    assert [("timestamp", -1), ("_id", -1)] in app_ctx.history_collection.indexes
+    assert [("voice", 1), ("timestamp", -1), ("_id", -1)] in app_ctx.history_collection.indexes
+
+
+def test_history_upload_is_stored_deduplicated_and_served_with_ranges(app_ctx, monkeypatch):
+    import hashlib
+
+    class _FakeTranslator:
+        def __init__(self, source: str, target: str):
+            pass
+
+        def translate(self, text: str) -> str:
+            return text
+
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _FakeTranslator)
+
+    store = app_ctx.app.state.blob_store
+    # several chunks per upload
+    store.chunk_size = 1000
+    audio = b"RIFF" + bytes(range(256)) * 40
+    digest = hashlib.sha256(audio).hexdigest()
+    form = {"text": "take", "voice": "Kore", "emotion": "Neutral", "pitch": "0", "speed": "1.0"}
+
+    for name in ("first.wav", "second.wav"):
+        res = app_ctx.client.post("/api/history", data=form, files={"file": (name, audio, "audio/wav")})
+        assert res.json() == {"status": "ok"}
+
+    docs = [item for item in app_ctx.history_collection.items if item.get("text") == "take"]
+    assert [doc["audio"]["sha256"] for doc in docs] == [digest, digest]
+    assert docs[1]["audio"] == {"sha256": digest, "size": len(audio), "content_type": "audio/wav", "filename": "second.wav"}
+    # one blob, no leftover temporary files
+    stored = [os.path.join(d, f) for d, _, files in os.walk(store.root) for f in files]
+    assert stored == [store.path(digest)]
+
+    url = f"/api/history/audio/{digest}"
+    res = app_ctx.client.get(url)
+    assert res.status_code == 200
+    assert res.content == audio
+    assert res.headers["content-type"] == "audio/wav"
+    assert res.headers["etag"] == f'"{digest}"'
+
+    res = app_ctx.client.get(url, headers={"Range": "bytes=4-99"})
+    assert res.status_code == 206
+    assert res.content == audio[4:100]
+    assert res.headers["content-range"] == f"bytes 4-99/{len(audio)}"
+
+    assert app_ctx.client.get(url, headers={"If-None-Match": f'"{digest}"'}).status_code == 304
+    assert app_ctx.client.get("/api/history/audio/" + "0" * 64).status_code == 404
+    assert app_ctx.client.get("/api/history/audio/../secrets").status_code == 404
+
+    # oversized uploads are refused without storing anything
+    store.max_bytes = len(audio) - 1
+    res = app_ctx.client.post("/api/history", data=form, files={"file": ("big.wav", audio + b"!", "audio/wav")})
+    assert res.status_code == 413
+    assert [os.path.join(d, f) for d, _, files in os.walk(store.root) for f in files] == stored
+
+
+def test_blob_store_defaults_to_the_data_directory(monkeypatch, tmp_path):
+    import tempfile
+
+    from backend.routes.blob_store import FileBlobStore
+
+    monkeypatch.delenv("HISTORY_BLOB_DIR", raising=False)
+    root = FileBlobStore.from_env().root
+    assert root.endswith(os.path.join("data", "history-blobs"))
+    assert not root.startswith(tempfile.gettempdir())
+
+    monkeypatch.setenv("HISTORY_BLOB_DIR", str(tmp_path))
+    assert FileBlobStore.from_env().root == str(tmp_path)
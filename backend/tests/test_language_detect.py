@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+
+def test_detect_by_script_and_ngrams():
+    from backend.routes.language_detect import detect
+
+    # Scripts used by a single persona language decide on their own
+    assert detect("வணக்கம், எப்படி இருக்கிறீர்கள்?").language == "ta"
+    assert detect("안녕하세요").language == "ko"
+    assert detect("今日はいい天気ですね。").language == "ja"
+    assert detect("今天天气很好。").language == "zh"
+    assert detect("வணக்கம்").method == "script"
+
+    # Shared scripts go through the trigram models
+    assert detect("Ich möchte einen Tisch für zwei Personen reservieren.").language == "de"
+    assert detect("Je voudrais réserver une table pour deux personnes ce soir.").language == "fr"
+    assert detect("Your order has been shipped and will arrive soon.").language == "en"
+    hindi = detect("हमें प्रोजेक्ट पूरा करने के लिए और समय चाहिए।")
+    assert (hindi.language, hindi.method) == ("hi", "ngram")
+    assert detect("आम्हाला प्रकल्प पूर्ण करण्यासाठी अधिक वेळ हवा आहे.").language == "mr"
+
+    # Too short, mixed or letterless text is never guessed
+    for text in ("ok", "Hello नमस्ते दोस्त", "12345 !!", "Привет, как дела?"):
+        assert detect(text).language is None
+
+
+def test_tts_skips_translation_for_text_already_in_persona_language(app_ctx, monkeypatch):
+    from backend.routes.metrics import TTS_LANGUAGE_DETECTIONS
+
+    calls = []
+
+    class _FakeTranslator:
+        def __init__(self, source: str, target: str):
+            self.target = target
+
+        def translate(self, text: str) -> str:
+            calls.append(text)
+            return "नमस्ते दुनिया"
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            self.text = text
+
+        async def stream(self):
+            yield {"type": "audio", "data": self.text.encode()}
+
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _FakeTranslator)
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+    skipped = TTS_LANGUAGE_DETECTIONS.value(target="hi", decision="skip", method="ngram")
+    translated = TTS_LANGUAGE_DETECTIONS.value(target="hi", decision="translate", method="ngram")
+
+    hindi = "क्या आप मुझे शुक्रवार तक रिपोर्ट भेज सकते हैं?"
+    res = app_ctx.client.post("/api/tts", json={"text": hindi, "voice": "Madhur"})
+    assert res.status_code == 200
+    assert res.content.decode() == hindi
+    assert calls == []
+
+    # English for a Hindi persona still goes upstream
+    res = app_ctx.client.post("/api/tts", json={"text": "Can you send me the report by Friday?", "voice": "Madhur"})
+    assert res.content.decode() == "नमस्ते दुनिया"
+    assert calls == ["Can you send me the report by Friday?"]
+
+    assert TTS_LANGUAGE_DETECTIONS.value(target="hi", decision="skip", method="ngram") == skipped + 1
+    assert TTS_LANGUAGE_DETECTIONS.value(target="hi", decision="translate", method="ngram") == translated + 1
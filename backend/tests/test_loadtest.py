@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+
+def test_percentile_and_threshold_gating():
+    from backend.benchmarks import loadtest
+
+    values = [i / 1000 for i in range(1, 101)]
+    assert loadtest.percentile(values, 50) == 0.05
+    assert loadtest.percentile(values, 99) == 0.099
+    assert loadtest.percentile([], 95) is None
+
+    args = loadtest.parse_args(["--max-p95-ms", "tts=100", "--min-rps", "50", "--max-rss-mb", "100"])
+    assert args.min_rps == {name: 50.0 for name in loadtest.SCENARIOS}
+
+    report = {
+        "scenarios": {
+            "tts": {**loadtest.summarize(values, values, 0, 1.0), "p95_ms": 150.0},
+            "translate": loadtest.summarize(values, values, 2, 1.0),
+        },
+        "peak_rss_mb": 80.0,
+    }
+    failures = loadtest.check_thresholds(report, args)
+    assert failures == ["tts: p95_ms 150.0 > 100.0", "translate: 2 failed requests"]
+
+
+def test_standins_serve_the_real_app_offline():
+    from fastapi.testclient import TestClient
+
+    from backend import app as app_module
+    from backend.benchmarks.standins import Latency, standins
+
+    tts = app_module.tts
+    original = tts.edge_tts.Communicate
+    with standins(handshake=Latency(0), chunk_interval=Latency(0), chunks=3, chunk_bytes=16, translate_latency=Latency(0)) as app:
+        with TestClient(app) as client:
+            res = client.post("/api/tts", json={"text": "hello there", "voice": "Madhur"})
+            assert res.status_code == 200
+            assert len(res.content) == 3 * 16
+
+            res = client.post("/api/history", data={"text": "hello", "voice": "Kore"}, files={"file": ("a.mp3", b"x")})
+            assert res.json() == {"status": "ok"}
+            assert client.get("/healthz").json()["db"] == "ready"
+        # lifespan shutdown flushed the write-behind queue
+        assert len(app.state.db.voice_history.items) == 1
+    assert tts.edge_tts.Communicate is original
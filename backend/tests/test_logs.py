@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import io
+import json
+import logging
+
+import pytest
+
+
+@pytest.fixture()
+def log_stream():
+    from backend.routes import logs
+
+    stream = io.StringIO()
+    listener = logs.configure_logging(level="DEBUG", max_field_chars=20, stream=stream)
+    yield listener, stream
+    listener.stop()
+    root = logging.getLogger(logs.ROOT_LOGGER)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.NOTSET)
+    root.propagate = True
+
+
+def test_structured_records_are_truncated_and_sampled(log_stream):
+    from backend.routes import logs
+
+    listener, stream = log_stream
+    log = logs.get_logger("test")
+    log.debug("tts_plan", voice_id="en-US-JennyNeural", text="x" * 50)
+    log.error("boom", error="upstream closed")
+    logs.EventLogger(log.logger, debug_sample_rate=0.0).debug("sampled_out", text="never")
+
+    logging.getLogger(logs.ROOT_LOGGER).setLevel(logging.INFO)
+    log.debug("gated", text="never")
+    listener.stop()
+
+    records = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [r["event"] for r in records] == ["tts_plan", "boom"]
+    assert records[0]["logger"] == "voiceai.test" and records[0]["level"] == "debug"
+    assert records[0]["voice_id"] == "en-US-JennyNeural"
+    assert records[0]["text"] == "x" * 20 + "…(+30 chars)"
+    assert records[1]["error"] == "upstream closed"
+    listener.start()
+
+
+def test_full_queue_drops_instead_of_blocking(monkeypatch):
+    import queue
+
+    from backend.routes import logs
+    from backend.routes.metrics import LOG_RECORDS_DROPPED
+
+    handler = logs._DroppingQueueHandler(queue.Queue(maxsize=1))
+    logger = logging.getLogger("voiceai.test_drop")
+    monkeypatch.setattr(logger, "handlers", [handler])
+    monkeypatch.setattr(logger, "propagate", False)
+    monkeypatch.setattr(logger, "level", logging.INFO)
+
+    before = LOG_RECORDS_DROPPED.value()
+    log = logs.EventLogger(logger)
+    for _ in range(3):
+        log.info("burst", n=1)
+    assert handler.queue.qsize() == 1
+    assert LOG_RECORDS_DROPPED.value() == before + 2
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    from backend.routes.metrics import Counter, Histogram, Registry
+
+    registry = Registry()
+    hist = registry.register(Histogram("demo_seconds", "Demo.", ["stage"], buckets=(0.1, 1.0)))
+    errors = registry.register(Counter("demo_errors_total", "Errors.", ["voice_id"]))
+
+    hist.observe(0.05, stage="a")
+    hist.observe(0.5, stage="a")
+    hist.observe(5, stage="a")
+    errors.inc(voice_id='x"y')
+
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{stage="a",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="a",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{stage="a",le="+Inf"} 3' in text
+    assert 'demo_seconds_count{stage="a"} 3' in text
+    assert 'demo_seconds_sum{stage="a"} 5.55' in text
+    assert 'demo_errors_total{voice_id="x\\"y"} 1' in text
+
+
+def test_tts_stages_and_upstream_errors_are_exposed(app_ctx, monkeypatch):
+    from backend.routes import metrics
+
+    app_ctx.app.include_router(metrics.router)
+
+    class _FakeCommunicate:
+        fail = False
+
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            pass
+
+        async def stream(self):
+            yield {"type": "WordBoundary"}
+            if _FakeCommunicate.fail:
+                raise RuntimeError("upstream closed")
+            yield {"type": "audio", "data": b"MP3"}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+
+    stages = metrics.TTS_STAGE_SECONDS
+    before = {stage: stages.count(stage=stage) for stage in ("moderation", "handshake", "first_audio", "stream_total")}
+    errors_before = metrics.TTS_UPSTREAM_ERRORS.value(voice_id="en-US-JennyNeural")
+
+    res = app_ctx.client.post("/api/tts", json={"text": "metrics please", "voice": "Jenny"})
+    assert res.status_code == 200
+    for stage, count in before.items():
+        assert stages.count(stage=stage) == count + 1, stage
+
+    _FakeCommunicate.fail = True
+    res = app_ctx.client.post("/api/tts", json={"text": "this one fails", "voice": "Jenny"})
+    assert res.status_code == 502
+    # one failure per attempt (the session is retried once)
+    assert metrics.TTS_UPSTREAM_ERRORS.value(voice_id="en-US-JennyNeural") == errors_before + 2
+
+    res = app_ctx.client.get("/metrics")
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    assert 'tts_stage_seconds_bucket{stage="handshake",le="+Inf"}' in res.text
+    assert 'tts_upstream_errors_total{voice_id="en-US-JennyNeural"}' in res.text
+    assert "tts_cache_stores" in res.text
+
+
+def test_middleware_tracks_inflight_and_latency_per_route():
+    from fastapi import FastAPI
+    from fastapi.responses import StreamingResponse
+    from fastapi.testclient import TestClient
+
+    from backend.routes import metrics
+
+    app = FastAPI()
+    app.add_middleware(metrics.MetricsMiddleware, routes=["/api/slow"])
+    seen = []
+
+    @app.get("/api/slow")
+    def slow():
+        def body():
+            # Still counted while the body is being streamed
+            seen.append(metrics.INFLIGHT_REQUESTS.value(route="/api/slow"))
+            yield b"ok"
+
+        return StreamingResponse(body())
+
+    before = metrics.HTTP_REQUEST_SECONDS.count(route="/api/slow", method="GET", status="200")
+    assert TestClient(app).get("/api/slow").status_code == 200
+
+    assert seen == [1]
+    assert metrics.INFLIGHT_REQUESTS.value(route="/api/slow") == 0
+    assert metrics.HTTP_REQUEST_SECONDS.count(route="/api/slow", method="GET", status="200") == before + 1
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+def _wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_prewarm_manifest_and_history_in_background(app_ctx, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from backend.routes import tts
+    from backend.routes.prewarm import Prewarmer
+    from backend.routes.scheduler import SynthesisScheduler
+
+    synthesized = []
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            synthesized.append((text, voice))
+
+        async def stream(self):
+            yield {"type": "audio", "data": b"MP3"}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+    scheduler = SynthesisScheduler(max_active=2)
+    monkeypatch.setattr(tts, "scheduler", scheduler)
+    app_ctx.app.state.prewarmer = Prewarmer(idle_poll=0.01)
+
+    body = {
+        "items": [
+            {"persona": "Jenny", "emotion": "Cheerful", "text": "Welcome back!"},
+            {"voice": "Jenny", "emotion": "Cheerful", "text": "Welcome back!"},
+            {"persona": "Kore", "text": "kill"},
+            {"persona": "Kore", "emotion": "Sad"},
+        ],
+        "top_history": 1,
+    }
+
+    with TestClient(app_ctx.app) as client:
+        # Live traffic holds half the global cap: pre-warming must wait
+        held = asyncio.run(scheduler.acquire("en-US-JennyNeural"))
+        res = client.post("/api/tts/prewarm", json=body)
+        assert res.status_code == 202
+        assert res.json()["total"] == 3 and res.json()["invalid"] == 1
+        assert client.post("/api/tts/prewarm", json=body).status_code == 409
+
+        time.sleep(0.1)
+        assert synthesized == []
+        assert client.get("/api/tts/prewarm").json()["state"] == "running"
+
+        held.release()
+        _wait_until(lambda: client.get("/api/tts/prewarm").json()["state"] == "done")
+        status = client.get("/api/tts/prewarm").json()
+        assert (status["warmed"], status["skipped"], status["failed"], status["progress"]) == (2, 1, 0, 1.0)
+        # The newest history entry was picked from the fake collection
+        assert synthesized == [("Welcome back!", "en-US-JennyNeural"), ("newer", "en-US-ChristopherNeural")]
+
+        res = client.post("/api/tts", json={"text": "Welcome back!", "voice": "Jenny", "emotion": "Cheerful"})
+        assert res.headers["X-Cache"] == "HIT"
+
+        # A second run finds everything already cached
+        assert client.post("/api/tts/prewarm", json=body).status_code == 202
+        _wait_until(lambda: client.get("/api/tts/prewarm").json()["state"] == "done")
+        assert client.get("/api/tts/prewarm").json()["cached"] == 2
+        assert len(synthesized) == 2
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+def test_upstream_retries_times_out_and_opens_the_circuit():
+    from backend.routes.resilience import CircuitOpen, Upstream, UpstreamTimeout
+
+    upstream = Upstream("fake", deadline=0.05, attempts=2, backoff=0, failure_threshold=3, reset_timeout=0.2)
+    calls = []
+
+    def operation(outcome):
+        async def run():
+            calls.append(outcome)
+            if outcome == "error":
+                raise ConnectionError("injected")
+            if outcome == "stall":
+                await asyncio.sleep(1)
+            return outcome
+        return run
+
+    async def scenario():
+        outcomes = iter(["error", "ok"])
+        # a failed attempt is retried
+        assert await upstream.call(lambda: operation(next(outcomes))()) == "ok"
+
+        # a stalled attempt misses its deadline on every try
+        try:
+            await upstream.call(operation("stall"))
+        except UpstreamTimeout:
+            pass
+        else:  # pragma: no cover
+            raise AssertionError("expected a timeout")
+
+        # the third consecutive failed attempt opens the circuit; the retry fails fast
+        try:
+            await upstream.call(operation("error"), key="voice-a")
+        except CircuitOpen as e:
+            assert e.retry_after >= 1
+        else:  # pragma: no cover
+            raise AssertionError("expected the circuit to be open")
+        started = len(calls)
+        try:
+            await upstream.call(operation("ok"))
+        except CircuitOpen:
+            pass
+        assert len(calls) == started
+        assert upstream.open_circuits() == ["*"]
+
+        # half-open after the reset timeout: one success closes it again
+        await asyncio.sleep(0.25)
+        assert await upstream.call(operation("ok")) == "ok"
+        assert upstream.open_circuits() == []
+
+    asyncio.run(scenario())
+    assert calls[:4] == ["error", "ok", "stall", "stall"]
+
+
+def test_upstream_hedges_slow_calls_at_p95():
+    from backend.routes.metrics import UPSTREAM_EVENTS
+    from backend.routes.resilience import Upstream
+
+    upstream = Upstream("hedged", deadline=2.0, attempts=1, hedge=True)
+    for _ in range(upstream.latency.min_samples):
+        upstream.latency.add(0.02)
+    won = UPSTREAM_EVENTS.value(upstream="hedged", event="hedge_won")
+    started_calls = []
+    discarded = []
+
+    async def operation():
+        # the first call hangs; its hedge answers quickly
+        index = len(started_calls)
+        started_calls.append(index)
+        await asyncio.sleep(1.0 if index == 0 else 0.01)
+        return index
+
+    async def discard(result):
+        discarded.append(result)
+
+    async def scenario():
+        started = time.perf_counter()
+        result = await upstream.call(operation, discard=discard)
+        return result, time.perf_counter() - started
+
+    result, elapsed = asyncio.run(scenario())
+    assert result == 1
+    assert elapsed < 0.5
+    assert started_calls == [0, 1]
+    assert discarded == []  # the slow call was cancelled, not completed
+    assert UPSTREAM_EVENTS.value(upstream="hedged", event="hedge_won") == won + 1
+
+    # blocking callables on worker threads get the same treatment
+    blocking_calls = []
+
+    def slow_then_fast():
+        blocking_calls.append(None)
+        time.sleep(0.5 if len(blocking_calls) == 1 else 0.01)
+        return len(blocking_calls)
+
+    started = time.perf_counter()
+    assert upstream.call_blocking(slow_then_fast) == 2
+    assert time.perf_counter() - started < 0.4
+    upstream.shutdown()
+
+
+def test_tts_survives_injected_synthesizer_faults(app_ctx, monkeypatch):
+    from backend.benchmarks.standins import Faults, Latency, paced_communicate
+    from backend.routes import tts
+    from backend.routes.resilience import Upstream
+
+    monkeypatch.setattr(
+        tts, "synthesis_upstream",
+        Upstream(
+            "edge-tts", deadline=0.2, idle_timeout=0.2, backoff=0, failure_threshold=3, reset_timeout=60,
+            is_failure=tts.is_synthesis_failure,
+        ),
+    )
+    faults = Faults(script=["error"], stall=1.0)
+    monkeypatch.setattr(
+        "backend.routes.tts.edge_tts.Communicate",
+        paced_communicate(Latency(0), Latency(0), chunks=2, chunk_bytes=4, faults=faults),
+    )
+
+    # a failed first attempt is retried transparently
+    res = app_ctx.client.post("/api/tts", json={"text": "first", "voice": "Kore"})
+    assert res.status_code == 200
+    assert len(res.content) == 8
+
+    # an error, then a retry that stalls past the deadline: 504, no raw exception text
+    faults._script = ["error", "stall"]
+    res = app_ctx.client.post("/api/tts", json={"text": "second", "voice": "Kore"})
+    assert res.status_code == 504
+    assert res.json() == {"error": "Speech synthesis timed out."}
+
+    # one voice failing hard trips its own breaker; other voices are unaffected
+    faults.voices, faults.error_rate = {"en-US-JennyNeural"}, 1.0
+    assert app_ctx.client.post("/api/tts", json={"text": "recovered", "voice": "Kore"}).status_code == 200
+    res = app_ctx.client.post("/api/tts", json={"text": "third", "voice": "Jenny"})
+    assert res.status_code == 502
+    assert res.json() == {"error": "Speech synthesis failed."}
+    assert app_ctx.client.post("/api/tts", json={"text": "fourth", "voice": "Kore"}).status_code == 200
+    res = app_ctx.client.post("/api/tts", json={"text": "fifth", "voice": "Jenny"})
+    assert res.status_code == 503
+    assert int(res.headers["retry-after"]) > 0
+    assert tts.synthesis_upstream.open_circuits() == ["en-US-JennyNeural"]
+    assert app_ctx.client.post("/api/tts", json={"text": "sixth", "voice": "Kore"}).status_code == 200
+
+
+def test_translator_deadline_and_circuit_breaker(app_ctx, monkeypatch):
+    from backend.benchmarks.standins import Faults, Latency, delayed_translator
+    from backend.routes import translator
+    from backend.routes.resilience import Upstream
+
+    faults = Faults(script=["stall"], stall=0.5)
+    monkeypatch.setattr(translator, "GoogleTranslator", delayed_translator(Latency(0), faults=faults))
+    upstream = Upstream(
+        "translator", deadline=0.1, backoff=0, failure_threshold=2, reset_timeout=60,
+        is_failure=translator.is_upstream_failure,
+    )
+    monkeypatch.setattr(translator, "translator", translator.CachedTranslator(upstream=upstream))
+
+    # the stalled call is abandoned at the deadline and the retry answers
+    started = time.perf_counter()
+    res = app_ctx.client.post("/api/translate", json={"text": "hello", "target_lang": "es"})
+    assert res.json() == {"translatedText": "[es] hello"}
+    assert time.perf_counter() - started < 0.4
+
+    # a failing provider opens the circuit: the TTS path answers 503 without calling it
+    faults.error_rate = 1.0
+    res = app_ctx.client.post("/api/tts", json={"text": "Please hold the line", "voice": "Madhur"})
+    assert res.status_code == 502
+    assert res.json() == {"error": "Translation failed."}
+    res = app_ctx.client.post("/api/tts", json={"text": "Please hold the line", "voice": "Madhur"})
+    assert res.status_code == 503
+    assert "retry-after" in res.headers
+    res = app_ctx.client.post("/api/translate", json={"text": "again", "target_lang": "es"})
+    assert res.status_code == 503
+    translator.translator.shutdown()
+
+
+def test_client_errors_are_not_retried_or_counted(app_ctx, monkeypatch):
+    import edge_tts
+    from deep_translator.exceptions import LanguageNotSupportedException
+
+    from backend.routes import translator, tts
+    from backend.routes.resilience import Upstream
+
+    built = []
+
+    class _StrictTranslator:
+        def __init__(self, source: str, target: str):
+            built.append(target)
+            if target == "zz":
+                raise LanguageNotSupportedException(target)
+            self.target = target
+
+        def translate(self, text: str) -> str:
+            return f"[{self.target}] {text}"
+
+    monkeypatch.setattr(translator, "GoogleTranslator", _StrictTranslator)
+    upstream = Upstream(
+        "translator", backoff=0, failure_threshold=2, reset_timeout=60, is_failure=translator.is_upstream_failure
+    )
+    monkeypatch.setattr(translator, "translator", translator.CachedTranslator(upstream=upstream))
+
+    # An unsupported language is the client's mistake: 400, tried once, breaker untouched
+    for i in range(3):
+        res = app_ctx.client.post("/api/translate", json={"text": f"hello {i}", "target_lang": "zz"})
+        assert res.status_code == 400
+    assert built == ["zz"] * 3
+    assert upstream.open_circuits() == []
+    res = app_ctx.client.post("/api/translate", json={"text": "hello", "target_lang": "fr"})
+    assert res.json() == {"translatedText": "[fr] hello"}
+
+    # Text edge-tts produces no audio for: 422, one session, the voice's breaker stays closed
+    sessions = []
+
+    class _Silent:
+        def __init__(self, text: str, voice: str, **kwargs):
+            sessions.append(text)
+
+        async def stream(self):
+            raise edge_tts.exceptions.NoAudioReceived("No audio was received.")
+            yield  # pragma: no cover
+
+    monkeypatch.setattr(
+        tts, "synthesis_upstream",
+        Upstream("edge-tts", backoff=0, failure_threshold=2, reset_timeout=60, is_failure=tts.is_synthesis_failure),
+    )
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _Silent)
+    for i in range(3):
+        res = app_ctx.client.post("/api/tts", json={"text": f"... {i}", "voice": "Kore"})
+        assert res.status_code == 422
+    assert len(sessions) == 3
+    assert tts.synthesis_upstream.open_circuits() == []
+    translator.translator.shutdown()
+
+
+def test_internal_errors_are_not_mistaken_for_client_errors(app_ctx, monkeypatch):
+    from backend.routes import tts
+    from backend.routes.resilience import Upstream
+
+    class _Broken:
+        def __init__(self, text: str, voice: str, **kwargs):
+            pass
+
+        async def stream(self):
+            raise ValueError("bug in our own parsing")
+            yield  # pragma: no cover
+
+    upstream = Upstream("edge-tts", backoff=0, attempts=1, failure_threshold=1, reset_timeout=60,
+                        is_failure=tts.is_synthesis_failure)
+    monkeypatch.setattr(tts, "synthesis_upstream", upstream)
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _Broken)
+
+    # A bug is a 502 with a stable message, and it counts against the breaker
+    res = app_ctx.client.post("/api/tts", json={"text": "hello", "voice": "Kore"})
+    assert res.status_code == 502
+    assert res.json() == {"error": "Speech synthesis failed."}
+    assert upstream.open_circuits() != []
+
+    # Prosody edge-tts would reject is refused before any synthesis
+    res = app_ctx.client.get("/api/tts", params={"text": "hello", "voice": "Kore", "speed": "nan"})
+    assert res.status_code == 400
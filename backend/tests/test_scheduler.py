@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+
+
+def test_per_voice_cap_lets_other_voices_through_in_order():
+    from backend.routes.scheduler import SynthesisScheduler
+
+    async def scenario():
+        scheduler = SynthesisScheduler(max_active=3, max_per_voice=1, max_waiting=10, wait_timeout=5)
+        a1 = await scheduler.acquire("A")
+        order = []
+
+        async def wait_for(voice):
+            ticket = await scheduler.acquire(voice)
+            order.append(voice)
+            return ticket
+
+        # A is at its cap, so a second A waits while B is admitted immediately
+        waiting_a = asyncio.create_task(wait_for("A"))
+        await asyncio.sleep(0)
+        b1 = await wait_for("B")
+        assert order == ["B"]
+        assert scheduler.stats()["waiting"] == 1
+        assert scheduler.stats()["active_per_voice"] == {"A": 1, "B": 1}
+
+        a1.release()
+        a2 = await waiting_a
+        assert order == ["B", "A"]
+        for ticket in (a2, b1):
+            ticket.release()
+        a2.release()  # idempotent
+        stats = scheduler.stats()
+        assert stats["active"] == 0 and stats["admitted"] == 3 and stats["queued"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_weighted_tickets_count_every_session():
+    from backend.routes.scheduler import SynthesisScheduler
+
+    async def scenario():
+        scheduler = SynthesisScheduler(max_active=4, max_per_voice=3, max_waiting=10, wait_timeout=5)
+        chunked = await scheduler.acquire("A", weight=3)
+        assert scheduler.stats()["active_per_voice"] == {"A": 3}
+
+        # One more A session would exceed the voice's cap; B's fits the remaining global slot
+        waiting_a = asyncio.create_task(scheduler.acquire("A"))
+        await asyncio.sleep(0)
+        b1 = await scheduler.acquire("B")
+        assert scheduler.stats()["active"] == 4 and scheduler.stats()["waiting"] == 1
+
+        # A weight above the limits is capped so it can still be granted
+        oversized = asyncio.create_task(scheduler.acquire("C", weight=10))
+        chunked.release()
+        a1 = await waiting_a
+        b1.release()
+        a1.release()
+        c = await oversized
+        assert c.weight == 3 and scheduler.stats()["active"] == 3
+        c.release()
+        assert scheduler.stats()["active"] == 0 and scheduler.stats()["active_per_voice"] == {}
+
+    asyncio.run(scenario())
+
+
+def test_queued_heavy_request_is_not_overtaken_by_light_ones():
+    from backend.routes.scheduler import SynthesisScheduler
+
+    async def scenario():
+        scheduler = SynthesisScheduler(max_active=3, max_per_voice=3, max_waiting=10, wait_timeout=5)
+        held = [await scheduler.acquire(voice) for voice in "AB"]
+        order = []
+
+        async def wait_for(voice, weight=1):
+            ticket = await scheduler.acquire(voice, weight)
+            order.append(voice)
+            return ticket
+
+        # a chunked request needs all three slots; one is free
+        chunked = asyncio.create_task(wait_for("C", weight=3))
+        await asyncio.sleep(0)
+        # the free slot is not handed to a newcomer ahead of it
+        light = asyncio.create_task(wait_for("D"))
+        await asyncio.sleep(0)
+        assert order == [] and scheduler.stats()["active"] == 2
+
+        for ticket in held:
+            ticket.release()
+        (await chunked).release()
+        (await light).release()
+        assert order == ["C", "D"]
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_and_deadline_are_rejected_with_retry_after():
+    from backend.routes.scheduler import AdmissionRejected, SynthesisScheduler
+
+    async def scenario():
+        scheduler = SynthesisScheduler(max_active=1, max_per_voice=1, max_waiting=1, wait_timeout=0.05)
+        held = await scheduler.acquire("A")
+
+        waiter = asyncio.create_task(scheduler.acquire("B"))
+        await asyncio.sleep(0)
+        try:
+            await scheduler.acquire("C")
+            raise AssertionError("expected the full queue to reject")
+        except AdmissionRejected as e:
+            assert "full" in str(e)
+            assert e.retry_after >= 1
+
+        try:
+            await waiter
+            raise AssertionError("expected the deadline to pass")
+        except AdmissionRejected as e:
+            assert "0.05" in str(e)
+
+        held.release()
+        stats = scheduler.stats()
+        assert stats["rejected_full"] == 1 and stats["rejected_timeout"] == 1
+        assert stats["waiting"] == 0 and stats["active"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_tts_returns_429_when_saturated(app_ctx, monkeypatch):
+    from backend.routes import tts
+    from backend.routes.scheduler import SynthesisScheduler
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            pass
+
+        async def stream(self):
+            yield {"type": "audio", "data": b"MP3"}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+    scheduler = SynthesisScheduler(max_active=1, max_per_voice=1, max_waiting=0)
+    monkeypatch.setattr(tts, "scheduler", scheduler)
+
+    held = asyncio.run(scheduler.acquire("en-US-JennyNeural"))
+    res = app_ctx.client.post("/api/tts", json={"text": "busy right now", "voice": "Jenny"})
+    assert res.status_code == 429
+    assert res.headers["Retry-After"] == "1"
+
+    held.release()
+    res = app_ctx.client.post("/api/tts", json={"text": "busy right now", "voice": "Jenny"})
+    assert res.status_code == 200
+    assert res.content == b"MP3"
+    # The streamed response gave its slot back
+    assert app_ctx.client.get("/api/tts/scheduler").json()["active"] == 0
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+
+def test_matches_embedded_and_accented_terms():
+    from backend.routes.utils import contains_sensitive
+
+    assert contains_sensitive("i'llkillyou")
+    assert contains_sensitive("KÍLL them")
+    assert contains_sensitive("terrorist attack")
+    assert not contains_sensitive("a perfectly safe sentence")
+    assert not contains_sensitive("")
+    assert not contains_sensitive(None)
+
+
+def test_matcher_handles_shared_prefixes_and_large_lexicons():
+    from backend.routes.utils import SensitiveMatcher
+
+    matcher = SensitiveMatcher(["kill", "killer", "kiss", "ass", "Ärger"])
+    assert matcher.search("the killer") == "kill"
+    assert matcher.search("a kiss") == "kiss"
+    assert matcher.search("class") == "ass"
+    assert matcher.search("arger") == "arger"
+    assert matcher.search("kil kis") is None
+
+    big = SensitiveMatcher([f"term{i:05d}x" for i in range(10_000)])
+    assert big.search("prefix term09999x suffix") == "term09999x"
+    assert big.search("term1 term12 term123x") is None
+
+
+def test_load_sensitive_words_hot_swaps_lexicon(tmp_path, monkeypatch):
+    from backend.routes import utils
+
+    monkeypatch.setattr(utils, "_matcher", utils._matcher)
+    words = tmp_path / "words.txt"
+    words.write_text("# custom lexicon\nbanana\n\n  kiwi  \n", encoding="utf-8")
+
+    assert utils.load_sensitive_words(str(words)) == 2
+    assert utils.contains_sensitive("Banana bread")
+    assert not utils.contains_sensitive("kill")
+
+    monkeypatch.delenv("SENSITIVE_WORDS_FILE", raising=False)
+    utils.load_sensitive_words()
+    assert utils.contains_sensitive("kill")
+    assert not utils.contains_sensitive("banana")
+
+
+def test_edited_word_file_is_reloaded_while_requests_run(tmp_path, monkeypatch):
+    import asyncio
+    import os
+    import threading
+
+    from backend.routes import utils
+
+    monkeypatch.setattr(utils, "_matcher", utils._matcher)
+    monkeypatch.setattr(utils, "_loaded_from", None)
+    words = tmp_path / "words.txt"
+    words.write_text("banana\n", encoding="utf-8")
+    monkeypatch.setenv("SENSITIVE_WORDS_FILE", str(words))
+    assert utils.reload_sensitive_words_if_changed()
+    assert not utils.reload_sensitive_words_if_changed()  # unchanged: nothing to do
+
+    # Checks keep running during the swap; each thread sees the old list, then the new one, never a mix
+    seen, errors, done = [[] for _ in range(4)], [], threading.Event()
+
+    def check(answers):
+        while not done.is_set():
+            try:
+                answers.append(utils.contains_sensitive("banana"))
+                answers.append(not utils.contains_sensitive("kiwi"))
+            except Exception as e:  # pragma: no cover
+                errors.append(e)
+
+    checkers = [threading.Thread(target=check, args=(answers,)) for answers in seen]
+    for thread in checkers:
+        thread.start()
+
+    async def scenario():
+        watcher = asyncio.create_task(utils.watch_sensitive_words(0.01))
+        await asyncio.sleep(0.05)
+        words.write_text("kiwi\n", encoding="utf-8")
+        stat = os.stat(words)
+        os.utime(words, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if utils.contains_sensitive("kiwi"):
+                break
+        # A broken file keeps the current lexicon
+        words.unlink()
+        await asyncio.sleep(0.05)
+        watcher.cancel()
+
+    asyncio.run(scenario())
+    done.set()
+    for thread in checkers:
+        thread.join()
+    assert errors == []
+    for answers in seen:
+        switched = answers.index(False)
+        assert all(answers[:switched]) and not any(answers[switched:])
+    assert utils.contains_sensitive("kiwi") and not utils.contains_sensitive("banana")
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sqlite3
+import time
+
+
+def _fill_from_worker(root: str, worker: int) -> None:
+    from backend.routes.shared_cache import SharedDiskCache
+
+    cache = SharedDiskCache(root, max_bytes=2000, touch_interval=0)
+    for i in range(40):
+        key = f"{worker:02d}{i:04d}"
+        assert cache.put(key, bytes([worker]) * 100)
+        data = cache.get(key)
+        # another worker may already have evicted it, never a torn value
+        assert data is None or data == bytes([worker]) * 100
+
+
+def test_shared_disk_cache_across_processes(tmp_path):
+    from backend.routes.shared_cache import SharedDiskCache, host_lock
+
+    root = str(tmp_path / "shared")
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_fill_from_worker, args=(root, n)) for n in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    # One budget for every process; the running totals match the index and the files
+    cache = SharedDiskCache(root, max_bytes=2000, touch_interval=0)
+    stats = cache.stats()
+    assert 0 < stats["bytes"] <= 2000
+    with sqlite3.connect(os.path.join(root, "index.sqlite3")) as db:
+        keys = [key for key, in db.execute("SELECT key FROM entries ORDER BY accessed_at")]
+        assert db.execute("SELECT COUNT(*), SUM(size) FROM entries").fetchone() == (stats["entries"], stats["bytes"])
+    assert all(os.path.getsize(cache.path(key)) == 100 for key in keys)
+    files = sum(len(names) for directory, _, names in os.walk(root) if directory != root)
+    assert files == len(keys)
+
+    # Written by one instance, read (and evicted in LRU order) by another
+    other = SharedDiskCache(root, max_bytes=2000, inline_bytes=16, touch_interval=0)
+    assert other.put("small", b"inline value")
+    assert not os.path.exists(other.path("small"))
+    assert cache.get("small") == b"inline value"
+    assert other.put("short-lived", b"x" * 10, ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get("short-lived") is None
+    oldest = keys[0]
+    other.put("big", b"b" * 1500)
+    assert cache.get("big") == b"b" * 1500
+    assert cache.get("small") == b"inline value"  # recently used
+    assert cache.get(oldest) is None
+    assert not os.path.exists(cache.path(oldest))
+
+    # Once-per-host work: only one holder of the lock at a time
+    lock = host_lock(os.path.join(root, "job.lock"))
+    assert lock is not None
+    assert host_lock(os.path.join(root, "job.lock")) is None
+    lock.close()
+    assert host_lock(os.path.join(root, "job.lock")) is not None
+
+
+def test_translators_share_results_through_the_disk_cache(tmp_path, monkeypatch):
+    import asyncio
+
+    from backend.routes import translator
+    from backend.routes.shared_cache import SharedDiskCache
+
+    calls = []
+
+    class _FakeTranslator:
+        def __init__(self, source: str, target: str):
+            self.target = target
+
+        def translate(self, text: str) -> str:
+            calls.append(text)
+            return "\n".join(f"{self.target}:{line}" for line in text.split("\n"))
+
+    monkeypatch.setattr(translator, "GoogleTranslator", _FakeTranslator)
+    root = str(tmp_path / "translate")
+    # one per worker process
+    first = translator.CachedTranslator(shared=SharedDiskCache(root, inline_bytes=1024))
+    second = translator.CachedTranslator(shared=SharedDiskCache(root, inline_bytes=1024))
+
+    assert first.translate("hello", "es") == "es:hello"
+    assert second.translate("hello", "es") == "es:hello"
+    assert calls == ["hello"]
+    assert second.stats()["shared_hits"] == 1
+    assert second.stats()["shared_entries"] == 1
+
+    # Batches only send what no worker has translated yet
+    results = asyncio.run(second.translate_batch(["hello", "one", "two"], "es"))
+    assert results == ["es:hello", "es:one", "es:two"]
+    assert calls[1:] in (["two\none"], ["one\ntwo"])
+    results = asyncio.run(first.translate_batch(["one", "two", "three"], "es"))
+    assert results == ["es:one", "es:two", "es:three"]
+    assert calls[2:] == ["three"]
+    first.shutdown()
+    second.shutdown()
@@ -15,8 +15,111 @@ def test_translate_ok(app_ctx, monkeypatch):
         def translate(self, text: str) -> str:
             return "hola mundo"
 
-    monkeypatch.setattr("backend.routes.translate.GoogleTranslator", _FakeTranslator)
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _FakeTranslator)
 
     res = app_ctx.client.post("/api/translate", json=data)
     assert res.status_code == 200
     assert res.json()["translatedText"] == "hola mundo"
+
+
+def test_translate_batch_packs_texts_and_keeps_order(app_ctx, monkeypatch):
+    calls: list = []
+
+    class _FakeTranslator:
+        def __init__(self, source: str, target: str):
+            self.target = target
+
+        def translate(self, text: str) -> str:
+            calls.append((self.target, text))
+            return "\n".join(f"{self.target}:{line}" for line in text.split("\n"))
+
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _FakeTranslator)
+
+    texts = ["one", "two", "three", "two", "   "]
+    res = app_ctx.client.post("/api/translate/batch", json={"texts": texts, "target_langs": ["es", "fr"]})
+    assert res.status_code == 200
+    body = res.json()
+
+    assert body["translations"]["es"] == ["es:one", "es:two", "es:three", "es:two", "   "]
+    assert body["translations"]["fr"] == ["fr:one", "fr:two", "fr:three", "fr:two", "   "]
+    assert body["errors"] == []
+    # one packed upstream call per target language
+    assert sorted(target for target, _ in calls) == ["es", "fr"]
+
+    # everything is cached now
+    res = app_ctx.client.post("/api/translate/batch", json={"texts": ["three", "one"], "target_lang": "es"})
+    assert res.json()["translations"] == {"es": ["es:three", "es:one"]}
+    assert len(calls) == 2
+
+
+def test_translate_batch_respects_pack_limit_and_reports_errors(app_ctx, monkeypatch):
+    from backend.routes import translate as translator_routes
+    from backend.routes import translator
+
+    monkeypatch.setattr(translator, "translator", translator.CachedTranslator(pack_chars=12))
+    calls: list = []
+
+    class _FakeTranslator:
+        def __init__(self, source: str, target: str):
+            pass
+
+        def translate(self, text: str) -> str:
+            calls.append(text)
+            if "bad" in text.split("\n"):
+                if "\n" in text:
+                    return "merged lines"  # provider mangled the pack -> per-item fallback
+                raise RuntimeError("provider error")
+            return text.upper()
+
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _FakeTranslator)
+
+    texts = ["aaaa", "bbbb", "cccc", "bad", "x" * 20]
+    res = app_ctx.client.post("/api/translate/batch", json={"texts": texts, "target_lang": "de"})
+    body = res.json()
+
+    assert body["translations"]["de"] == ["AAAA", "BBBB", "CCCC", None, "X" * 20]
+    # the provider's own error text stays in the log
+    assert body["errors"] == [{"index": 3, "target_lang": "de", "error": "Translation failed."}]
+    assert all(len(call) <= 12 for call in calls if "\n" in call)
+
+    # every target fans out over all the texts: their number is capped too
+    targets = [f"l{i}" for i in range(translator_routes.BATCH_MAX_TARGETS + 1)]
+    res = app_ctx.client.post("/api/translate/batch", json={"texts": ["aaaa"], "target_langs": targets})
+    assert res.status_code == 422
+
+
+def test_pack_texts_first_fit():
+    from backend.routes.translator import pack_texts
+
+    packs, singles = pack_texts(["aaaa", "bb", "cccccc", "multi\nline", "z" * 30], limit=10)
+    assert singles == ["z" * 30, "multi\nline"]
+    assert packs == [["cccccc", "bb"], ["aaaa"]]
+
+
+def test_auto_detected_batches_only_pack_texts_sharing_a_script(app_ctx, monkeypatch):
+    from backend.routes.translator import group_for_packing
+
+    calls: list = []
+
+    class _FakeTranslator:
+        def __init__(self, source: str, target: str):
+            self.source = source
+
+        def translate(self, text: str) -> str:
+            calls.append((self.source, text))
+            # a provider that pads its lines: packed parts must be cached as returned
+            return "\n".join(f" {line.upper()} " for line in text.split("\n"))
+
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _FakeTranslator)
+
+    texts = ["hello", "world", "नमस्ते", "दुनिया", "1234"]
+    groups, singles = group_for_packing(texts, "auto")
+    assert groups == [["hello", "world"], ["नमस्ते", "दुनिया"]]
+    assert singles == ["1234"]
+    assert group_for_packing(texts, "en") == ([texts], [])
+
+    res = app_ctx.client.post("/api/translate/batch", json={"texts": texts, "target_lang": "fr"})
+    assert res.json()["translations"]["fr"] == [" HELLO ", " WORLD ", " नमस्ते ", " दुनिया ", " 1234 "]
+    # one pack per script, the digits alone
+    sent = sorted(sorted(text.split("\n")) for _, text in calls)
+    assert sent == [["1234"], ["hello", "world"], ["दुनिया", "नमस्ते"]]
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _counting_translator(calls: list, delay: float = 0.0):
+    class _FakeTranslator:
+        def __init__(self, source: str, target: str):
+            self.source = source
+            self.target = target
+
+        def translate(self, text: str) -> str:
+            calls.append((self.source, self.target, text))
+            time.sleep(delay)
+            return f"{self.target}:{text}"
+
+    return _FakeTranslator
+
+
+def test_translator_caches_by_source_target_and_text(monkeypatch):
+    from backend.routes.translator import CachedTranslator
+
+    calls: list = []
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _counting_translator(calls))
+    cache = CachedTranslator()
+
+    assert cache.translate("hello", "es") == "es:hello"
+    assert cache.translate("hello", "es") == "es:hello"
+    assert cache.translate("hello", "fr") == "fr:hello"
+    assert cache.translate("hello", "es", source="en") == "es:hello"
+
+    assert len(calls) == 3
+    assert cache.stats()["hits"] == 1
+
+
+def test_translator_entries_expire_and_are_bounded(monkeypatch):
+    from backend.routes.translator import CachedTranslator
+
+    calls: list = []
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _counting_translator(calls))
+
+    expiring = CachedTranslator(ttl_seconds=0)
+    expiring.translate("hello", "es")
+    expiring.translate("hello", "es")
+    assert len(calls) == 2
+
+    bounded = CachedTranslator(max_entries=1)
+    bounded.translate("a", "es")
+    bounded.translate("b", "es")
+    bounded.translate("a", "es")
+    assert len(calls) == 5
+    assert bounded.stats()["entries"] == 1
+
+
+def test_translator_coalesces_concurrent_misses(monkeypatch):
+    from backend.routes.translator import CachedTranslator
+
+    calls: list = []
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _counting_translator(calls, delay=0.2))
+    cache = CachedTranslator()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: cache.translate("hello", "hi"), range(8)))
+
+    assert results == ["hi:hello"] * 8
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_translator_does_not_cache_failures(monkeypatch):
+    from backend.routes.translator import CachedTranslator
+
+    attempts = {"count": 0}
+    lock = threading.Lock()
+
+    class _FlakyTranslator:
+        def __init__(self, source: str, target: str):
+            pass
+
+        def translate(self, text: str) -> str:
+            with lock:
+                attempts["count"] += 1
+                if attempts["count"] == 1:
+                    raise RuntimeError("quota exceeded")
+            return "ok"
+
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _FlakyTranslator)
+    cache = CachedTranslator()
+
+    try:
+        cache.translate("hello", "es")
+    except RuntimeError:
+        pass
+    else:  # pragma: no cover
+        raise AssertionError("expected the upstream error to propagate")
+
+    assert cache.translate("hello", "es") == "ok"
+    assert cache.stats()["errors"] == 1
+
+
+def test_translate_async_times_out_without_cancelling_shared_call(monkeypatch):
+    import asyncio
+
+    from backend.routes.translator import CachedTranslator, TranslationTimeout
+
+    calls: list = []
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _counting_translator(calls, delay=0.3))
+    cache = CachedTranslator(timeout_seconds=0.05)
+
+    async def scenario():
+        try:
+            await cache.translate_async("hello", "ja")
+        except TranslationTimeout:
+            pass
+        else:  # pragma: no cover
+            raise AssertionError("expected a timeout")
+        # The upstream call keeps going and still fills the cache
+        return await cache.translate_async("hello", "ja", timeout=1.0)
+
+    assert asyncio.run(scenario()) == "ja:hello"
+    assert len(calls) == 1
+    cache.shutdown()
+
+
+def test_explicit_zero_timeout_is_not_replaced_by_the_default(monkeypatch):
+    import asyncio
+    import time
+
+    from backend.routes.translator import CachedTranslator, TranslationTimeout
+
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _counting_translator([], delay=0.3))
+    cache = CachedTranslator(timeout_seconds=5.0)
+
+    async def scenario():
+        started = time.perf_counter()
+        try:
+            await cache.translate_async("hello", "ko", timeout=0)
+        except TranslationTimeout as e:
+            assert "after 0s" in str(e)
+        else:  # pragma: no cover
+            raise AssertionError("expected a timeout")
+        results = await cache.translate_batch(["one", "two"], "ko", timeout=0)
+        assert all(isinstance(result, TranslationTimeout) for result in results)
+        return time.perf_counter() - started
+
+    assert asyncio.run(scenario()) < 0.2
+    cache.shutdown()
+
+
+def test_translate_async_keeps_event_loop_responsive(monkeypatch):
+    import asyncio
+
+    from backend.routes.translator import CachedTranslator
+
+    calls: list = []
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _counting_translator(calls, delay=0.2))
+    cache = CachedTranslator(max_workers=4)
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        results = await asyncio.gather(*(cache.translate_async(f"t{i}", "de") for i in range(4)))
+        task.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(scenario())
+    assert results == [f"de:t{i}" for i in range(4)]
+    # four 200 ms calls ran in parallel on the pool while the loop kept ticking
+    assert ticks >= 10
+    cache.shutdown()
+
+
+def test_translator_rejects_work_past_max_pending_and_drops_abandoned_jobs(monkeypatch):
+    import asyncio
+    import time
+
+    from backend.routes.translator import CachedTranslator, TranslationTimeout, TranslatorBusy
+
+    calls: list = []
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _counting_translator(calls, delay=0.3))
+    cache = CachedTranslator(max_workers=1, max_pending=2, timeout_seconds=0.05)
+
+    async def scenario():
+        for text in ("running", "queued"):
+            try:
+                await cache.translate_async(text, "fr")
+            except TranslationTimeout:
+                pass
+            else:  # pragma: no cover
+                raise AssertionError("expected a timeout")
+        started = time.perf_counter()
+        try:
+            await cache.translate_async("rejected", "fr")
+        except TranslatorBusy as e:
+            assert e.retry_after >= 1
+        else:  # pragma: no cover
+            raise AssertionError("expected the pool to be saturated")
+        assert time.perf_counter() - started < 0.05
+        # Once the running call finishes, the queued one is dropped unsent
+        await asyncio.sleep(0.45)
+        return await cache.translate_async("later", "fr", timeout=1.0)
+
+    assert asyncio.run(scenario()) == "fr:later"
+    assert [text for _, _, text in calls] == ["running", "later"]
+    stats = cache.stats()
+    assert (stats["rejected"], stats["abandoned"], stats["pending"], stats["inflight"]) == (1, 1, 0, 0)
+    cache.shutdown()
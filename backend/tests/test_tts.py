@@ -28,7 +28,7 @@ def test_tts_returns_audio_bytes_offline(app_ctx, monkeypatch):
         def translate(self, text: str) -> str:
             return text
 
-    monkeypatch.setattr("backend.routes.tts.GoogleTranslator", _FakeTranslator)
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _FakeTranslator)
 
     # Fake edge_tts stream
     class _FakeCommunicate:
@@ -59,7 +59,7 @@ def test_tts_translates_for_non_english_voice(app_ctx, monkeypatch):
             translated_calls["count"] += 1
             return "नमस्ते"  # deterministic fake translation
 
-    monkeypatch.setattr("backend.routes.tts.GoogleTranslator", _FakeTranslator)
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _FakeTranslator)
 
     class _FakeCommunicate:
         def __init__(self, text: str, voice: str, rate: str, pitch: str):
@@ -75,3 +75,455 @@ def test_tts_translates_for_non_english_voice(app_ctx, monkeypatch):
     assert res.status_code == 200
     assert res.content == b"FAKE_NON_EN"
     assert translated_calls["count"] == 1
+
+
+def test_tts_streams_chunks_in_order(app_ctx, monkeypatch):
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            pass
+
+        async def stream(self):
+            yield {"type": "audio", "data": b"one-"}
+            yield {"type": "WordBoundary", "offset": 0, "duration": 1, "text": "Hello"}
+            yield {"type": "audio", "data": b"two-"}
+            yield {"type": "audio", "data": b"three"}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+
+    with app_ctx.client.stream("POST", "/api/tts", json={"text": "Hello", "voice": "Kore"}) as res:
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("audio/")
+        chunks = list(res.iter_bytes())
+
+    assert b"".join(chunks) == b"one-two-three"
+
+
+def test_tts_error_before_first_chunk_is_json(app_ctx, monkeypatch):
+    class _FailingCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            pass
+
+        async def stream(self):
+            raise RuntimeError("upstream refused")
+            yield  # pragma: no cover
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FailingCommunicate)
+
+    res = app_ctx.client.post("/api/tts", json={"text": "Hello", "voice": "Kore"})
+    assert res.status_code == 502
+    assert res.json()["error"] == "Speech synthesis failed."
+
+
+def test_tts_no_audio_is_json_error(app_ctx, monkeypatch):
+    class _SilentCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            pass
+
+        async def stream(self):
+            yield {"type": "SentenceBoundary", "offset": 0, "duration": 1, "text": "Hello"}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _SilentCommunicate)
+
+    res = app_ctx.client.post("/api/tts", json={"text": "Hello", "voice": "Kore"})
+    assert res.status_code == 500
+    assert res.json()["error"] == "No audio generated."
+
+
+def test_tts_serves_repeat_requests_from_cache(app_ctx, monkeypatch):
+    calls = {"count": 0}
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            calls["count"] += 1
+
+        async def stream(self):
+            yield {"type": "audio", "data": b"CACHED_"}
+            yield {"type": "audio", "data": b"AUDIO"}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+
+    payload = {"text": "Hello again", "voice": "Kore", "emotion": "Cheerful"}
+    first = app_ctx.client.post("/api/tts", json=payload)
+    second = app_ctx.client.post("/api/tts", json=payload)
+
+    assert first.headers["x-cache"] == "MISS"
+    assert second.headers["x-cache"] == "HIT"
+    assert first.content == second.content == b"CACHED_AUDIO"
+    assert calls["count"] == 1
+
+    # different prosody -> different entry
+    app_ctx.client.post("/api/tts", json={**payload, "emotion": "Sad"})
+    assert calls["count"] == 2
+
+    stats = app_ctx.client.get("/api/tts/cache").json()
+    assert stats["memory_hits"] == 1
+    assert stats["stores"] == 2
+
+
+def test_tts_returns_504_when_translation_times_out(app_ctx, monkeypatch):
+    import time
+
+    from backend.routes import translator
+
+    class _SlowTranslator:
+        def __init__(self, source: str, target: str):
+            pass
+
+        def translate(self, text: str) -> str:
+            time.sleep(0.3)
+            return text
+
+    monkeypatch.setattr("backend.routes.translator.GoogleTranslator", _SlowTranslator)
+    monkeypatch.setattr(translator, "translator", translator.CachedTranslator(timeout_seconds=0.05))
+
+    res = app_ctx.client.post("/api/tts", json={"text": "Hello", "voice": "Madhur"})
+    assert res.status_code == 504
+    assert "timed out" in res.json()["error"]
+
+
+def test_tts_long_text_mode_streams_segments_in_order(app_ctx, monkeypatch):
+    from backend.routes import tts
+
+    monkeypatch.setattr(tts, "CHUNK_MAX_CHARS", 20)
+    monkeypatch.setattr(tts, "CHUNK_PARALLELISM", 2)
+    state = {"active": 0, "peak": 0, "texts": []}
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            self.text = text
+            assert rate == "+10%" and pitch == "+15Hz"  # Cheerful prosody applied per segment
+            state["texts"].append(text)
+
+        async def stream(self):
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            # later segments finish first; output must still be in order
+            await asyncio.sleep(0.05 if self.text.startswith("First") else 0.01)
+            yield {"type": "audio", "data": f"<{self.text[:5]}>".encode()}
+            state["active"] -= 1
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+
+    text = "First sentence here. Second one now. Third and last."
+    res = app_ctx.client.post("/api/tts", json={"text": text, "voice": "Kore", "emotion": "Cheerful", "chunked": True})
+
+    assert res.status_code == 200
+    assert res.content == b"<First><Secon><Third>"
+    assert sorted(state["texts"]) == ["First sentence here.", "Second one now.", "Third and last."]
+    assert state["peak"] == 2
+
+
+def test_tts_long_text_mode_buffers_later_segments_up_to_a_bound(app_ctx, monkeypatch):
+    from backend.routes import tts
+
+    produced: list = []
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            self.text = text
+
+        async def stream(self):
+            if self.text == "slow":
+                await asyncio.sleep(0.1)
+                yield {"type": "audio", "data": b"<slow>"}
+                return
+            for i in range(10):
+                produced.append(i)
+                yield {"type": "audio", "data": b"%d" % i}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+
+    async def scenario():
+        stream = tts._segmented_audio(["slow", "fast"], "en-US-AriaNeural", "+0%", "+0Hz", 2, 2)
+        first = await anext(stream)
+        # The fast segment stops after filling its buffer (plus the chunk waiting to go in)
+        held = len(produced)
+        rest = [chunk async for chunk in stream]
+        return first, held, rest
+
+    first, held, rest = asyncio.run(scenario())
+    assert first == b"<slow>"
+    assert held <= 3
+    assert rest == [b"%d" % i for i in range(10)]
+
+
+def test_tts_long_text_mode_retries_a_failed_segment(app_ctx, monkeypatch):
+    from backend.routes import tts
+
+    monkeypatch.setattr(tts, "CHUNK_MAX_CHARS", 20)
+    attempts: dict = {}
+
+    class _FlakyCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            self.text = text
+            attempts[text] = attempts.get(text, 0) + 1
+
+        async def stream(self):
+            if self.text.startswith("Two") and attempts[self.text] == 1:
+                raise ConnectionError("websocket closed")
+            yield {"type": "audio", "data": self.text[:3].encode()}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FlakyCommunicate)
+
+    res = app_ctx.client.post("/api/tts", json={"text": "One is first. Two is next.", "voice": "Kore", "chunked": True})
+    assert res.status_code == 200
+    assert res.content == b"OneTwo"
+    assert attempts["Two is next."] == 2
+
+
+def test_split_sentences_respects_max_chars():
+    from backend.routes.utils import split_sentences
+
+    assert split_sentences("Hi. Yo. This is a longer sentence.", 10) == ["Hi. Yo.", "This is a", "longer", "sentence."]
+    assert split_sentences("こんにちは。元気ですか？", 6) == ["こんにちは。", "元気ですか？"]
+    assert all(len(s) <= 12 for s in split_sentences("word, " * 50, 12))
+    assert split_sentences("   ") == []
+
+
+def test_tts_batch_returns_zip_with_inline_errors(app_ctx, monkeypatch):
+    import io
+    import zipfile
+
+    calls: list = []
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            self.text = text
+            calls.append(text)
+
+        async def stream(self):
+            if self.text == "Broken":
+                raise RuntimeError("upstream refused")
+            yield {"type": "audio", "data": f"MP3:{self.text}".encode()}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+
+    items = [
+        {"text": "Press one for sales", "voice": "Kore"},
+        {"text": "Press two for support", "voice": "Jenny"},
+        {"text": "Press one for sales", "voice": "Kore"},
+        {"text": "kill", "voice": "Kore"},
+        {"text": "Broken", "voice": "Kore"},
+    ]
+    res = app_ctx.client.post("/api/tts/batch", json={"items": items, "concurrency": 2})
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(res.content))
+    manifest = json.loads(archive.read("manifest.json"))["items"]
+
+    assert [m["index"] for m in manifest] == [0, 1, 2, 3, 4]
+    assert manifest[0]["file"] == manifest[2]["file"] == "0000.mp3"
+    assert archive.read("0000.mp3") == b"MP3:Press one for sales"
+    assert archive.read(manifest[1]["file"]) == b"MP3:Press two for support"
+    assert "sensitive" in manifest[3]["warning"].lower()
+    # upstream details stay in the log
+    assert manifest[4]["error"] == "Speech synthesis failed."
+    # duplicate synthesized once (the failing one retried); the sensitive item never reached the synthesizer
+    assert sorted(calls) == ["Broken", "Broken", "Press one for sales", "Press two for support"]
+
+
+def test_tts_batch_rejects_empty_batches(app_ctx):
+    res = app_ctx.client.post("/api/tts/batch", json={"items": []})
+    assert res.status_code == 422
+
+
+def test_tts_timings_are_streamed_and_cached(app_ctx, monkeypatch):
+    import base64
+
+    calls = []
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str, boundary: str = "SentenceBoundary"):
+            calls.append(boundary)
+
+        async def stream(self):
+            yield {"type": "audio", "data": b"AUD1"}
+            yield {"type": "WordBoundary", "offset": 1_000_000, "duration": 2_500_000, "text": "Hello"}
+            yield {"type": "audio", "data": b"AUD2"}
+            yield {"type": "WordBoundary", "offset": 4_000_000, "duration": 3_000_000, "text": "world"}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+    payload = {"text": "Hello world", "voice": "Kore", "timings": "word"}
+
+    res = app_ctx.client.post("/api/tts", json=payload)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("application/x-ndjson")
+    assert res.headers["X-Cache"] == "MISS"
+    events = [json.loads(line) for line in res.text.splitlines()]
+    assert [e["type"] for e in events] == ["audio", "word", "audio", "word", "end"]
+    assert events[1] == {"type": "word", "offset_ms": 100.0, "duration_ms": 250.0, "text": "Hello"}
+    audio = b"".join(base64.b64decode(e["data"]) for e in events if e["type"] == "audio")
+    assert audio == b"AUD1AUD2"
+    assert calls == ["WordBoundary"]
+
+    # Timings come back from the cache with the audio, no upstream call
+    res = app_ctx.client.post("/api/tts", json=payload)
+    assert res.headers["X-Cache"] == "HIT"
+    cached = [json.loads(line) for line in res.text.splitlines()]
+    assert [e for e in cached if e["type"] == "word"] == [e for e in events if e["type"] == "word"]
+    assert base64.b64decode(next(e for e in cached if e["type"] == "audio")["data"]) == audio
+    assert cached[-1] == {"type": "end", "bytes": 8}
+
+    # Plain requests share the cached audio
+    res = app_ctx.client.post("/api/tts", json={"text": "Hello world", "voice": "Kore"})
+    assert res.headers["X-Cache"] == "HIT"
+    assert res.content == audio
+    assert len(calls) == 1
+
+    assert app_ctx.client.post("/api/tts", json={**payload, "timings": "phoneme"}).status_code == 422
+
+
+def test_tts_get_is_http_cacheable(app_ctx, monkeypatch):
+    calls = []
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            calls.append(text)
+
+        async def stream(self):
+            for part in (b"0123", b"4567", b"89"):
+                yield {"type": "audio", "data": part}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+    params = {"text": "cache me", "voice": "Jenny"}
+
+    # The streamed MISS could be cut short: no validators to revalidate it with
+    res = app_ctx.client.get("/api/tts", params=params)
+    assert (res.status_code, res.headers["X-Cache"], res.content) == (200, "MISS", b"0123456789")
+    assert res.headers["Cache-Control"] == "no-cache"
+    assert "ETag" not in res.headers and "Content-Location" not in res.headers
+
+    res = app_ctx.client.get("/api/tts", params=params)
+    assert (res.headers["X-Cache"], res.headers["Accept-Ranges"]) == ("HIT", "bytes")
+    assert "immutable" in res.headers["Cache-Control"]
+    etag, location = res.headers["ETag"], res.headers["Content-Location"]
+    assert location == f"/api/tts/audio/{etag.strip(chr(34))}"
+
+    res = app_ctx.client.get("/api/tts", params=params, headers={"If-None-Match": etag})
+    assert (res.status_code, res.content) == (304, b"")
+
+    res = app_ctx.client.get("/api/tts", params=params, headers={"Range": "bytes=2-5"})
+    assert (res.status_code, res.content, res.headers["Content-Range"]) == (206, b"2345", "bytes 2-5/10")
+    res = app_ctx.client.get(location, headers={"Range": "bytes=-3"})
+    assert (res.status_code, res.content) == (206, b"789")
+    res = app_ctx.client.get(location, headers={"Range": "bytes=2-", "If-Range": '"stale"'})
+    assert (res.status_code, res.content) == (200, b"0123456789")
+    res = app_ctx.client.get(location, headers={"Range": "bytes=10-"})
+    assert (res.status_code, res.headers["Content-Range"]) == (416, "bytes */10")
+    assert app_ctx.client.get(location, headers={"If-None-Match": etag}).status_code == 304
+
+    # POST answers carry the same validators
+    res = app_ctx.client.post("/api/tts", json=params)
+    assert (res.headers["ETag"], res.headers["Content-Location"]) == (etag, location)
+    assert calls == ["cache me"]
+
+    assert app_ctx.client.get("/api/tts/audio/" + "0" * 64).status_code == 404
+
+    # Once the clip is gone, a matching If-None-Match is not answered with 304
+    from backend.routes import tts
+    from backend.routes.audio_cache import AudioCache
+
+    monkeypatch.setattr(tts, "audio_cache", AudioCache())
+    assert app_ctx.client.get(location, headers={"If-None-Match": etag}).status_code == 404
+    res = app_ctx.client.get("/api/tts", params=params, headers={"If-None-Match": etag})
+    assert (res.status_code, res.headers["X-Cache"], res.content) == (200, "MISS", b"0123456789")
+    assert app_ctx.client.get("/api/tts/audio/not-a-key").status_code == 404
+
+
+def test_tts_output_format_negotiation(app_ctx, monkeypatch, tmp_path):
+    import pytest
+
+    from backend.routes import audio_formats
+    from backend.routes.audio_formats import UnsupportedFormat, negotiate
+
+    monkeypatch.setattr(audio_formats, "FFMPEG", None)
+    with pytest.raises(UnsupportedFormat):
+        negotiate("opus")
+    assert negotiate(None, "audio/ogg, audio/mpeg;q=0.1").name == "mp3"
+
+    # Stand-in for ffmpeg: prefixes an Ogg signature to whatever it is fed
+    fake_ffmpeg = tmp_path / "ffmpeg"
+    fake_ffmpeg.write_text("#!/bin/sh\nprintf OggS\nexec cat\n")
+    fake_ffmpeg.chmod(0o755)
+    monkeypatch.setattr(audio_formats, "FFMPEG", str(fake_ffmpeg))
+
+    assert negotiate(None, "*/*").name == "mp3"
+    assert negotiate(None, "audio/*").name == "mp3"
+    assert negotiate(None, "audio/webm, audio/mpeg;q=0.5").name == "webm"
+    assert negotiate("MULAW-8K").media_type == "audio/wav"
+    with pytest.raises(UnsupportedFormat):
+        negotiate(None, "text/html")
+
+    calls = []
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            calls.append(text)
+
+        async def stream(self):
+            for part in (b"ID3", b"mp3"):
+                yield {"type": "audio", "data": part}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+
+    res = app_ctx.client.post("/api/tts", json={"text": "small please", "format": "opus"})
+    assert res.status_code == 200
+    assert res.headers["content-type"] == "audio/ogg; codecs=opus"
+    assert res.content == b"OggSID3mp3"
+    assert "Vary" not in res.headers
+
+    # Each format is cached separately; Accept picks the cached Opus variant
+    res = app_ctx.client.get("/api/tts", params={"text": "small please"}, headers={"Accept": "audio/ogg"})
+    assert (res.headers["X-Cache"], res.headers["Vary"], res.content) == ("HIT", "Accept", b"OggSID3mp3")
+    audio_url = res.headers["Content-Location"]
+    res = app_ctx.client.post("/api/tts", json={"text": "small please"})
+    assert (res.headers["X-Cache"], res.headers["content-type"], res.content) == ("MISS", "audio/mpeg", b"ID3mp3")
+    assert calls == ["small please", "small please"]
+    assert app_ctx.client.get(audio_url).headers["content-type"] == "audio/ogg; codecs=opus"
+
+    res = app_ctx.client.post("/api/tts", json={"text": "small please", "format": "flac"})
+    assert res.status_code == 406 and "Unsupported format" in res.json()["error"]
+    assert app_ctx.client.get("/api/tts/formats").json()["formats"][2]["name"] == "opus"
+
+
+def test_transcoded_wav_is_stored_with_real_sizes(app_ctx, monkeypatch, tmp_path):
+    import struct
+
+    from backend.routes import audio_formats
+
+    # Stand-in for ffmpeg writing µ-law WAV to a pipe: a header with placeholder
+    # sizes, after more stderr output than a pipe buffer holds
+    header = (
+        b"RIFF" + b"\xff" * 4 + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHHH", 18, 7, 1, 8000, 8000, 1, 8, 0)
+        + b"fact" + struct.pack("<I", 4) + b"\xff" * 4
+        + b"data" + b"\xff" * 4
+    )
+    (tmp_path / "header.wav").write_bytes(header)
+    fake_ffmpeg = tmp_path / "ffmpeg"
+    fake_ffmpeg.write_text(f"#!/bin/sh\nhead -c 200000 /dev/zero >&2\ncat {tmp_path / 'header.wav'}\nexec cat\n")
+    fake_ffmpeg.chmod(0o755)
+    monkeypatch.setattr(audio_formats, "FFMPEG", str(fake_ffmpeg))
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            pass
+
+        async def stream(self):
+            for part in (b"ID3", b"mp3"):
+                yield {"type": "audio", "data": part}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+
+    payload = {"text": "call me", "format": "mulaw-8k"}
+    res = app_ctx.client.post("/api/tts", json=payload)
+    assert (res.status_code, res.headers["X-Cache"], res.content) == (200, "MISS", header + b"ID3mp3")
+
+    res = app_ctx.client.post("/api/tts", json=payload)
+    assert res.headers["X-Cache"] == "HIT"
+    stored = res.content
+    assert stored.endswith(b"ID3mp3")
+    assert struct.unpack_from("<I", stored, 4)[0] == len(stored) - 8
+    assert struct.unpack_from("<I", stored, len(header) - 12)[0] == 6  # fact: frames
+    assert struct.unpack_from("<I", stored, len(header) - 4)[0] == 6  # data size
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+
+def test_phrase_segmenter_waits_for_real_boundaries():
+    from backend.routes.utils import PhraseSegmenter
+
+    segmenter = PhraseSegmenter(max_chars=40, min_clause_chars=15)
+    assert segmenter.feed("Version 3.") == []
+    # "3.5" is not a boundary; the full stop only counts once whitespace follows
+    assert segmenter.feed("5 is out.") == []
+    assert segmenter.feed(" Next") == ["Version 3.5 is out."]
+    assert segmenter.feed(", short") == []
+    assert segmenter.feed(" clause, then more words") == ["Next, short clause,"]
+    assert segmenter.feed(" and more words without any stop") == ["then more words and more words without"]
+    assert segmenter.feed("你好。再见") == ["any stop你好。"]
+    assert segmenter.flush() == ["再见"]
+    assert segmenter.flush() == []
+
+
+def test_websocket_streams_audio_per_phrase(app_ctx, monkeypatch):
+    calls = []
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            calls.append((text, voice))
+            self.text = text
+
+        async def stream(self):
+            for part in (b"A", b"B"):
+                yield {"type": "audio", "data": self.text.encode()[:3] + part}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+
+    with app_ctx.client.websocket_connect("/api/tts/ws") as ws:
+        ws.send_json({"type": "config", "voice": "Jenny"})
+        ws.send_json({"type": "text", "text": "Hello there"})
+        ws.send_json({"type": "text", "text": ". How are"})
+
+        # The first phrase is pushed before the rest of the text exists
+        assert ws.receive_json() == {"type": "segment", "index": 0, "text": "Hello there."}
+        assert ws.receive_bytes() == b"HelA"
+        assert ws.receive_bytes() == b"HelB"
+        assert ws.receive_json() == {"type": "segment_end", "index": 0, "bytes": 8}
+
+        ws.send_json({"type": "text", "text": " you? I will kill"})
+        ws.send_json({"type": "bogus"})
+        ws.send_json({"type": "end"})
+
+        assert ws.receive_json()["text"] == "How are you?"
+        assert ws.receive_bytes() == b"HowA"
+        assert ws.receive_bytes() == b"HowB"
+        assert ws.receive_json()["type"] == "segment_end"
+        assert ws.receive_json() == {"type": "error", "message": "Unknown message type: 'bogus'"}
+        assert ws.receive_json() == {"type": "segment", "index": 2, "text": "I will kill"}
+        warning = ws.receive_json()
+        assert warning["type"] == "warning" and warning["index"] == 2
+        assert ws.receive_json() == {"type": "segment_end", "index": 2, "bytes": 0}
+        assert ws.receive_json() == {"type": "done"}
+
+    assert calls == [("Hello there.", "en-US-JennyNeural"), ("How are you?", "en-US-JennyNeural")]
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import asyncio
+
+
+def test_voices_catalog_is_cacheable_and_enriched_from_snapshot(app_ctx, monkeypatch, tmp_path):
+    from backend.routes import voices
+
+    res = app_ctx.client.get("/api/voices")
+    assert res.status_code == 200
+    assert res.headers["Cache-Control"].startswith("public, max-age=")
+    body = res.json()
+    assert body["default"] == "Kore"
+    madhur = next(p for p in body["personas"] if p["name"] == "Madhur")
+    assert (madhur["voice_id"], madhur["locale"], madhur["available"]) == ("hi-IN-MadhurNeural", "hi-IN", None)
+
+    etag = res.headers["ETag"]
+    assert app_ctx.client.get("/api/voices", headers={"If-None-Match": etag}).status_code == 304
+
+    # A refreshed edge-tts listing is snapshotted to disk and changes the catalog (and its ETag)
+    listing = [{"ShortName": "hi-IN-MadhurNeural", "Gender": "Male", "Locale": "hi-IN"}]
+
+    async def _list_voices():
+        return listing
+
+    monkeypatch.setattr(voices.edge_tts, "list_voices", _list_voices)
+    snapshot = tmp_path / "voices.json"
+    assert voices.snapshot_is_stale(str(snapshot))
+    assert asyncio.run(voices.refresh(str(snapshot))) == 1
+    assert voices.load_snapshot(str(snapshot)) == listing
+    assert not voices.snapshot_is_stale(str(snapshot))
+
+    res = app_ctx.client.get("/api/voices", headers={"If-None-Match": etag})
+    assert res.status_code == 200 and res.headers["ETag"] != etag
+    by_name = {p["name"]: p for p in res.json()["personas"]}
+    assert (by_name["Madhur"]["gender"], by_name["Madhur"]["available"]) == ("Male", True)
+    assert by_name["Jenny"]["available"] is False
+
+
+def test_tts_resolves_personas_and_rejects_unknown(app_ctx, monkeypatch):
+    calls = []
+
+    class _FakeCommunicate:
+        def __init__(self, text: str, voice: str, rate: str, pitch: str):
+            calls.append(voice)
+
+        async def stream(self):
+            yield {"type": "audio", "data": b"MP3"}
+
+    monkeypatch.setattr("backend.routes.tts.edge_tts.Communicate", _FakeCommunicate)
+
+    # Case-insensitive persona names and raw voice IDs both resolve
+    for voice in ("jenny", "en-GB-SoniaNeural", "Eric"):
+        assert app_ctx.client.post("/api/tts", json={"text": "hello", "voice": voice}).status_code == 200
+    assert calls == ["en-US-JennyNeural", "en-GB-SoniaNeural", "en-US-EricNeural"]
+
+    res = app_ctx.client.post("/api/tts", json={"text": "hello", "voice": "Nobody"})
+    assert res.status_code == 400
+    assert "Unknown voice" in res.json()["error"]
+    assert len(calls) == 3
@@ -1,6 +1,7 @@
 import { useState, useRef, useEffect } from "react";
 import { Download, Trash2, Mic2, Settings2, Clock, Sparkles, Mic, Upload, StopCircle, Play, Pause } from "lucide-react";
 import "./App.css";
+import type { Persona } from "./types";
 
 const API_BASE = (() => {
   const envBase = import.meta.env.VITE_API_BASE_URL as string | undefined;
@@ -47,6 +48,23 @@ const App = () => {
   const [latencyStats, setLatencyStats] = useState<{ last: number, avg: number, count: number, total: number }>({ last: 0, avg: 0, count: 0, total: 0 });
   const [history, setHistory] = useState<any[]>([]);
 
+  // Persona catalog from the backend (the browser revalidates it with the ETag)
+  const [personas, setPersonas] = useState<Persona[]>([
+    { name: "Kore", voice_id: "en-US-ChristopherNeural", group: "English (Global)", description: "US Male", locale: "en-US" },
+  ]);
+  useEffect(() => {
+    fetch(`${API_BASE}/api/voices`)
+      .then((res) => (res.ok ? res.json() : Promise.reject(res.status)))
+      .then((data) => setPersonas(data.personas || []))
+      .catch(() => {});
+  }, []);
+  const personaGroups = Object.entries(
+    personas.reduce<Record<string, Persona[]>>((groups, p) => {
+      (groups[p.group] ||= []).push(p);
+      return groups;
+    }, {})
+  );
+
   // Fetch voice history from backend on mount
   useEffect(() => {
     const fetchHistory = async () => {
@@ -60,7 +78,7 @@ const App = () => {
           id: item._id,
           voiceName: item.voice,
           emotion: item.emotion,
-          url: null,
+          url: item.audio ? `${API_BASE}/api/history/audio/${item.audio.sha256}` : null,
           timestamp: item.timestamp
         }));
         setHistory(mapped);
@@ -86,6 +104,9 @@ const App = () => {
   // Playback States
   const [playingId, setPlayingId] = useState<number | null>(null);
   const audioRef = useRef<HTMLAudioElement | null>(null);
+  // Content-Location of clips the server has cached, by request (only cache hits carry it):
+  // replays revalidate the content address without planning or translating again
+  const audioLocations = useRef<Map<string, string>>(new Map());
 
   const [config, setConfig] = useState({
     voice: "Kore",
@@ -333,11 +354,32 @@ const App = () => {
     setIsGenerating(true);
     const start = performance.now();
     try {
-      const response = await fetch(`${API_BASE}/api/tts`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ ...config, text: trimmed })
+      // GET is cacheable by the browser/CDN (repeat plays cost no backend work);
+      // very long texts don't fit in a URL and go through POST
+      const params = new URLSearchParams({
+        text: trimmed,
+        voice: config.voice,
+        emotion: config.emotion,
+        speed: String(config.speed),
+        pitch: String(config.pitch),
       });
+      const getUrl = `${API_BASE}/api/tts?${params}`;
+      const requestKey = params.toString();
+      const location = audioLocations.current.get(requestKey);
+      let response = location ? await fetch(`${API_BASE}${location}`) : null;
+      if (!response || !response.ok) {
+        // Not seen yet, or evicted from the server cache (404)
+        audioLocations.current.delete(requestKey);
+        response = getUrl.length <= 2000
+          ? await fetch(getUrl)
+          : await fetch(`${API_BASE}/api/tts`, {
+              method: "POST",
+              headers: { "Content-Type": "application/json" },
+              body: JSON.stringify({ ...config, text: trimmed })
+            });
+        const contentLocation = response.headers.get("content-location");
+        if (response.ok && contentLocation) audioLocations.current.set(requestKey, contentLocation);
+      }
       const contentType = response.headers.get("content-type");
       if (contentType && contentType.includes("application/json")) {
         const data = await response.json();
@@ -507,53 +549,13 @@ const App = () => {
               onChange={(e) => setConfig({...config, voice: e.target.value})}
               className="custom-select"
             >
-              <optgroup label="English (Global)">
-                <option value="Kore">Kore (US Male)</option>
-                <option value="Jenny">Jenny (US Female)</option>
-                <option value="Eric">Eric (US Male)</option>
-                <option value="Ryan">Ryan (UK Male)</option>
-                <option value="Sonia">Sonia (UK Female)</option>
-                <option value="Liam">Liam (Canada Male)</option>
-                <option value="Natasha">Natasha (Australia Female)</option>
-              </optgroup>
-
-              <optgroup label="Indian (Regional)">
-                <option value="Madhur">Madhur (Hindi Male)</option>
-                <option value="Swara">Swara (Hindi Female)</option>
-                <option value="Karthik">Karthik (Tamil Male)</option>
-                <option value="Pallavi">Pallavi (Tamil Female)</option>
-                <option value="Mohan">Mohan (Telugu Male)</option>
-                <option value="Shruti">Shruti (Telugu Female)</option>
-                
-                <option value="Sagar">Sagar (Bengali Male)</option>
-                <option value="Tanishaa">Tanishaa (Bengali Female)</option>
-              </optgroup>
-
-              <optgroup label="European">
-              
-                <option value="Eloise">Eloise (French Female)</option>
-
-                <option value="Alvaro">Alvaro (Spanish Male)</option>
-                <option value="Elena">Elena (Spanish Female)</option>
-                <option value="Lukas">Lukas (German Male)</option>
-                <option value="Katrin">Katrin (German Female)</option>
-                <option value="Bibi">Bibi (Italian Female)</option>
-
-              </optgroup>
-
-              <optgroup label="Asian & Middle East">
-                <option value="Nanami">Nanami (Japanese Female)</option>
-                <option value="Keita">Keita (Japanese Male)</option>
-                <option value="Zhiyu">Zhiyu (Mandarin Female)</option>
-                <option value="Sun-Hi">Sun-Hi (Korean Female)</option>
-                <option value="Layla">Layla (Arabic Female)</option>
-                <option value="Ali">Ali (Arabic Male)</option>
-              </optgroup>
-
-              <optgroup label="South American">
-                <option value="Francisca">Francisca (Brazilian Portuguese Female)</option>
-                <option value="Antonio">Antonio (Brazilian Portuguese Male)</option>
-              </optgroup>
+              {personaGroups.map(([group, members]) => (
+                <optgroup key={group} label={group}>
+                  {members.map((p) => (
+                    <option key={p.name} value={p.name}>{p.name} ({p.description})</option>
+                  ))}
+                </optgroup>
+              ))}
             </select>
 
             <label className="label">Emotion Engine</label>
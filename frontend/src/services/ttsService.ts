@@ -90,6 +90,79 @@ export const generateSpeech = async (
   };
 };
 
+/* ---------- STREAMING TTS (WebSocket) ---------- */
+export interface SpeechStreamEvent {
+  type: "segment" | "segment_end" | "word" | "sentence" | "warning" | "error" | "done";
+  index?: number;
+  text?: string;
+  message?: string;
+  bytes?: number;
+  // word / sentence events (when the stream was opened with timings)
+  offset_ms?: number;
+  duration_ms?: number;
+}
+
+export interface SpeechStream {
+  send: (text: string) => void;
+  flush: () => void;
+  end: () => void;
+  close: () => void;
+}
+
+const wsUrl = (path: string): string =>
+  (API_BASE || window.location.origin).replace(/^http/, "ws") + path;
+
+// Text can be sent fragment by fragment (e.g. tokens from an agent); the
+// backend cuts it at phrase boundaries and pushes MP3 frames per phrase.
+export const streamSpeech = (
+  config: GenerationConfig,
+  onAudio: (chunk: ArrayBuffer, segmentIndex: number) => void,
+  onEvent?: (event: SpeechStreamEvent) => void,
+  timings?: "word" | "sentence"
+): SpeechStream => {
+  const socket = new WebSocket(wsUrl("/api/tts/ws"));
+  socket.binaryType = "arraybuffer";
+
+  const pending: string[] = [];
+  let segmentIndex = -1;
+
+  const post = (message: object) => {
+    const data = JSON.stringify(message);
+    if (socket.readyState === WebSocket.OPEN) socket.send(data);
+    else pending.push(data);
+  };
+
+  socket.onopen = () => {
+    pending.splice(0).forEach((data) => socket.send(data));
+  };
+
+  socket.onmessage = (e: MessageEvent) => {
+    if (typeof e.data !== "string") {
+      onAudio(e.data as ArrayBuffer, segmentIndex);
+      return;
+    }
+    const event = JSON.parse(e.data) as SpeechStreamEvent;
+    if (event.type === "segment" && event.index !== undefined) segmentIndex = event.index;
+    onEvent?.(event);
+  };
+
+  post({
+    type: "config",
+    voice: config.voice,
+    emotion: config.emotion,
+    pitch: config.pitch,
+    speed: config.speed,
+    timings: timings ?? null,
+  });
+
+  return {
+    send: (text: string) => post({ type: "text", text }),
+    flush: () => post({ type: "flush" }),
+    end: () => post({ type: "end" }),
+    close: () => socket.close(),
+  };
+};
+
 /* ---------- WAV EXPORT ---------- */
 export const audioBufferToWav = (buffer: AudioBuffer): Blob => {
   const length = buffer.length * 2;
@@ -11,6 +11,17 @@ export enum VoiceID {
   Isabelle = "fr-FR-IsabelleNeural",
 }
 
+// Persona catalog entry, as served by GET /api/voices
+export interface Persona {
+  name: string;
+  voice_id: string;
+  group: string;
+  description: string;
+  locale: string;
+  gender?: string | null;
+  available?: boolean | null;
+}
+
 // ================= EMOTIONS =================
 export enum Emotion {
   Neutral = "Neutral",